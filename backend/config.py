@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from typing import Optional
 
 from dotenv import load_dotenv
 
@@ -15,6 +16,63 @@ class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL")
     SECRET_KEY: str = os.getenv("SECRET_KEY", "change-me-in-production-use-strong-key")
     OPENAI_KEY: str = os.getenv("OPENAI_KEY", "")
+    # Inny serwer zgodny z API OpenAI (np. scripts/openai_stub.py); puste = api.openai.com
+    OPENAI_BASE_URL: Optional[str] = os.getenv("OPENAI_BASE_URL") or None
+    OPENAI_EMBEDDING_MODEL: str = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+    # Maksymalna liczba tekstów w jednym zapytaniu o embeddingi
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+    # Katalog dyskowego cache embeddingów (klucz = hash modelu i tekstu); puste = wyłączony
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "data/embedding_cache")
+
+    # Matching - scorer: "openai" (LLM) lub "heuristic" (lokalny, bez sieci)
+    MATCH_SCORER: str = os.getenv("MATCH_SCORER", "openai")
+    # Zmiana promptu/modelu wymaga podbicia wersji (unieważnia cache signal_match)
+    MATCH_SCORER_VERSION: str = os.getenv("MATCH_SCORER_VERSION", "gpt-4o-mini:v1")
+    # Ile najbliższych (cosine) kandydatów trafia do LLM; 0 = bez prefiltra
+    MATCH_VECTOR_TOP_N: int = int(os.getenv("MATCH_VECTOR_TOP_N", "30"))
+    # Kaskada przed LLM (kolejne etapy zawężają pulę): filter, heuristic, embedding; puste = cała pula do LLM
+    MATCH_CASCADE_STAGES: str = os.getenv("MATCH_CASCADE_STAGES", "filter,heuristic,embedding")
+    # Limity kandydatów po etapach filter / heuristic (0 = bez limitu); po embedding - MATCH_VECTOR_TOP_N
+    MATCH_CASCADE_FILTER_MAX: int = int(os.getenv("MATCH_CASCADE_FILTER_MAX", "5000"))
+    MATCH_CASCADE_HEURISTIC_TOP_N: int = int(os.getenv("MATCH_CASCADE_HEURISTIC_TOP_N", "200"))
+    # Budżety czasu etapów (ms). Embedding po przekroczeniu przepuszcza kandydatów bez zmiany kolejności;
+    # heurystyka (wektorowo, ~25 ms p95 dla 5000 kandydatów) tylko odnotowuje timeout w statystykach
+    MATCH_CASCADE_HEURISTIC_BUDGET_MS: int = int(os.getenv("MATCH_CASCADE_HEURISTIC_BUDGET_MS", "50"))
+    MATCH_CASCADE_EMBEDDING_BUDGET_MS: int = int(os.getenv("MATCH_CASCADE_EMBEDDING_BUDGET_MS", "2000"))
+    # Katalog magazynu embeddingów (memmap współdzielony przez workery); puste = wyłączony
+    EMBEDDING_STORE_PATH: str = os.getenv("EMBEDDING_STORE_PATH", "data/embeddings")
+    # Format wektorów w magazynie: "float16" albo "int8" (4x mniej niż float32)
+    EMBEDDING_STORE_DTYPE: str = os.getenv("EMBEDDING_STORE_DTYPE", "float16")
+    # Pula kandydatów tylko z sygnałów o wspólnym terminie (skills, focus_areas, ...) - indeks odwrócony
+    MATCH_TERM_INDEX: bool = os.getenv("MATCH_TERM_INDEX", "true").lower() in ("1", "true", "yes")
+    # Pula aktywnych sygnałów w pamięci procesu (zamiast zapytania o pulę kategorii przy każdym żądaniu)
+    MATCH_SIGNAL_POOL: bool = os.getenv("MATCH_SIGNAL_POOL", "true").lower() in ("1", "true", "yes")
+    # Co ile sekund pula i indeks terminów porównują się z listą aktywnych sygnałów
+    # (dezaktywowane w innym procesie, zapisy zatwierdzone poza kolejnością ID)
+    MATCH_SIGNAL_POOL_RECONCILE_SECONDS: float = float(os.getenv("MATCH_SIGNAL_POOL_RECONCILE_SECONDS", "30"))
+    # Tryb top-k: scoring kończy się, gdy znajdzie `limit` wyników z co najmniej takim wynikiem
+    MATCH_TOPK_CONFIDENT_SCORE: float = float(os.getenv("MATCH_TOPK_CONFIDENT_SCORE", "80"))
+    # Domyślny budżet czasu (ms) endpointów matchowania; po nim wynik częściowy, 0 = bez limitu
+    MATCH_DEADLINE_MS: int = int(os.getenv("MATCH_DEADLINE_MS", "10000"))
+
+    # Batch scoring LLM - budżety tokenów na jedno zapytanie i równoległość
+    LLM_PROMPT_TOKEN_BUDGET: int = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "6000"))
+    LLM_MAX_COMPLETION_TOKENS: int = int(os.getenv("LLM_MAX_COMPLETION_TOKENS", "1000"))
+    LLM_MAX_BATCH_SIZE: int = int(os.getenv("LLM_MAX_BATCH_SIZE", "20"))
+    # Długie pola tekstowe `details` są w promptach przycinane do tylu znaków (0 = bez limitu)
+    LLM_TEXT_FIELD_MAX_CHARS: int = int(os.getenv("LLM_TEXT_FIELD_MAX_CHARS", "400"))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_BACKGROUND_CONCURRENCY: int = int(os.getenv("LLM_BACKGROUND_CONCURRENCY", "4"))
+    LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+    LLM_HTTP_KEEPALIVE_SECONDS: float = float(os.getenv("LLM_HTTP_KEEPALIVE_SECONDS", "30"))
+    LLM_REQUEST_TIMEOUT_SECONDS: float = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "60"))
+    # Ledger zapytań LLM (tabela llm_call) - zapis wsadowy co tyle rekordów / sekund, retencja w dniach (0 = bez usuwania)
+    LLM_LEDGER_ENABLED: bool = os.getenv("LLM_LEDGER_ENABLED", "true").lower() in ("1", "true", "yes")
+    LLM_LEDGER_FLUSH_SIZE: int = int(os.getenv("LLM_LEDGER_FLUSH_SIZE", "20"))
+    LLM_LEDGER_FLUSH_SECONDS: float = float(os.getenv("LLM_LEDGER_FLUSH_SECONDS", "5"))
+    LLM_LEDGER_RETENTION_DAYS: int = int(os.getenv("LLM_LEDGER_RETENTION_DAYS", "30"))
+    # E-maile użytkowników z dostępem do /metrics (po przecinku); puste = endpointy niedostępne
+    METRICS_ADMIN_EMAILS: str = os.getenv("METRICS_ADMIN_EMAILS", "")
     
     # JWT Settings
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))  # 24h default
@@ -2,12 +2,17 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlmodel import Session
 
 from routers import auth as auth_router
 from routers import signals as signals_router
 from routers import users as users_router
 from routers import chat as chat_router
-from services.db import create_db_and_tables
+from routers import metrics as metrics_router
+from services.db import create_db_and_tables, engine
+from services.llm_gateway import close_client
+from services.llm_ledger import flush_llm_ledger
+from services.signal_features import sync_signal_features
 
 # Zezwalamy na komunikację z frontendem
 origins = [
@@ -27,7 +32,13 @@ async def lifespan(app: FastAPI):
     # Run startup actions
     if create_db_and_tables:
         create_db_and_tables()
+    # Cechy sygnałów zapisanych z pominięciem API (seedy, wiersze sprzed signal_features)
+    with Session(engine) as session:
+        sync_signal_features(session)
     yield
+    # Zamknij pulę połączeń do OpenAI i zapisz resztę ledgera
+    await close_client()
+    flush_llm_ledger()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -57,4 +68,5 @@ app.include_router(auth_router.router, prefix="/api/v1")
 app.include_router(users_router.router, prefix="/api/v1")
 app.include_router(signals_router.router, prefix="/api/v1")
 app.include_router(chat_router.router, prefix="/api/v1")
+app.include_router(metrics_router.router, prefix="/api/v1")
 
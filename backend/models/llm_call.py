@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import ClassVar, Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class LLMCall(SQLModel, table=True):
+    """
+    Rejestr zapytań do OpenAI (ledger) - czas, tokeny i wynik parsowania
+    każdego zapytania, do analizy opóźnień i kosztów matchowania.
+    """
+    __tablename__: ClassVar[str] = "llm_call"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    endpoint: str = Field(max_length=100, index=True)  # np. "/signals/match/{signal_id}", "materialize", "recompute"
+    operation: str = Field(max_length=32)  # "match_chunk" | "embedding"
+    model: str = Field(max_length=64)
+    source_signal_id: Optional[int] = Field(default=None)
+    candidates: int = 0  # sygnały docelowe w zapytaniu (dla embeddingów - liczba tekstów)
+    prompt_tokens: Optional[int] = None  # z response.usage
+    completion_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None  # część prompt_tokens wzięta z cache promptów OpenAI
+    latency_ms: float
+    finish_reason: Optional[str] = Field(default=None, max_length=32)  # "length" = odpowiedź ucięta przez max_tokens
+    parse_ok: bool = True  # czy odpowiedź dała się sparsować
+    missing_results: int = 0  # kandydaci bez wyniku w odpowiedzi (dostają wynik awaryjny 0)
+    error: Optional[str] = Field(default=None, max_length=200)  # typ i treść wyjątku API
+
+
+__all__ = ["LLMCall"]
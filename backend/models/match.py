@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import ClassVar, Optional
+
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Field, SQLModel
+
+
+class SignalMatch(SQLModel, table=True):
+    """
+    Cache wyników dopasowania między parą sygnałów.
+
+    Para jest nieuporządkowana - klucz to (min_id, max_id), więc jeden wynik
+    obsługuje oba kierunki matchowania. Wiersz jest aktualny tylko wtedy,
+    gdy hashe obu `details` oraz wersja scorera zgadzają się z bieżącymi.
+    """
+    __tablename__: ClassVar[str] = "signal_match"
+    __table_args__ = (
+        UniqueConstraint("signal_low_id", "signal_high_id", "scorer_version"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    signal_low_id: int = Field(foreign_key="user_signal.id", index=True)  # mniejsze ID z pary
+    signal_high_id: int = Field(foreign_key="user_signal.id", index=True)  # większe ID z pary
+    low_hash: str = Field(max_length=64)  # sha256 z details sygnału signal_low_id
+    high_hash: str = Field(max_length=64)  # sha256 z details sygnału signal_high_id
+    accurate: float
+    scorer_version: str = Field(max_length=64)
+    created_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
+
+
+__all__ = ["SignalMatch"]
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, ClassVar
+
+from sqlalchemy.dialects.postgresql import JSON
+from sqlmodel import Column, Field, SQLModel
+
+
+class SignalEmbedding(SQLModel, table=True):
+    """
+    Embedding sygnału (tabela poboczna user_signal, 1:1). Osobna tabela
+    zamiast kolumny w user_signal - `create_all` tworzy ją w istniejącej
+    bazie, a zapytania o sygnały nie ciągną wektora.
+    """
+    __tablename__: ClassVar[str] = "signal_embedding"
+
+    signal_id: int = Field(foreign_key="user_signal.id", primary_key=True)
+    model: str = Field(max_length=64)  # model embeddingów, którym policzono wektor
+    embedding: Any = Field(sa_column=Column(JSON, nullable=False))  # Wektor z OpenAI embeddings (lista floatów)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+__all__ = ["SignalEmbedding"]
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, ClassVar, Optional
+
+from sqlalchemy.dialects.postgresql import JSON
+from sqlmodel import Column, Field, SQLModel
+
+
+class SignalFeatures(SQLModel, table=True):
+    """
+    Cechy sygnału wyciągnięte z `details` przy zapisie (tabela poboczna
+    user_signal, 1:1) - hash treści, umiejętności, etap i przedziały kwot.
+    Matchowanie, filtry i cache czytają je zamiast parsować JSON przy każdym żądaniu.
+    """
+    __tablename__: ClassVar[str] = "signal_features"
+
+    signal_id: int = Field(foreign_key="user_signal.id", primary_key=True)
+    details_hash: str = Field(max_length=64, index=True)  # sha256 z kanonicznego details
+    skills: list[str] = Field(default_factory=list, sa_column=Column(JSON))  # skills + needed_skills (znormalizowane)
+    stage: list[str] = Field(default_factory=list, sa_column=Column(JSON))  # stage + investment_stage
+    money_min: Optional[float] = Field(default=None, index=True)  # budżet/ticket albo finansowanie
+    money_max: Optional[float] = Field(default=None, index=True)
+    hourly_rate_min: Optional[float] = Field(default=None, index=True)
+    hourly_rate_max: Optional[float] = Field(default=None, index=True)
+    features: Optional[Any] = Field(default=None, sa_column=Column(JSON))  # pełne cechy heurystyki (extract_features)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+__all__ = ["SignalFeatures"]
@@ -0,0 +1,45 @@
+"""
+Router z metrykami matchowania - koszt i opóźnienia zapytań LLM, etapy kaskady.
+"""
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+
+from models.user import User
+from schemas.metrics import CascadeStageStats, LLMUsageSummary
+from services.db import get_session
+from services.dependencies import get_metrics_admin
+from services.llm_ledger import summarize_llm_calls
+from services.match_cascade import get_cascade_stats
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/llm", response_model=LLMUsageSummary)
+def get_llm_usage(
+    hours: float = Query(24, gt=0, le=24 * 90),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_metrics_admin),  # Tylko METRICS_ADMIN_EMAILS
+):
+    """
+    Podsumowanie zapytań do OpenAI z ostatnich `hours` godzin, pogrupowane
+    po endpoincie, operacji i modelu.
+    
+    - **hours**: Okno czasu (domyślnie 24h)
+    
+    Zwraca liczbę zapytań i kandydatów, tokeny, koszt (USD), opóźnienia
+    (avg/p95/max) oraz błędy API, nieparsowalne i ucięte odpowiedzi.
+    """
+    return summarize_llm_calls(session, datetime.utcnow() - timedelta(hours=hours))
+
+
+@router.get("/cascade", response_model=dict[str, CascadeStageStats])
+def get_cascade_metrics(
+    current_user: User = Depends(get_metrics_admin),  # Tylko METRICS_ADMIN_EMAILS
+):
+    """
+    Statystyki etapów kaskady matchowania (od startu procesu): czas
+    i odsetek kandydatów przechodzących przez każdy etap.
+    """
+    return get_cascade_stats()
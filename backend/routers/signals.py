@@ -1,29 +1,49 @@
 # routers/signals.py
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, col, select
 
 from models.signal import UserSignal
 from models.user import User
 from schemas.signal import (
     SignalMatchAllResponse,
+    SignalMatchFilters,
     SignalMatchResponse,
     UserSignalCreate,
     UserSignalResponse,
     UserSignalsResponse,
 )
-from services.db import get_session
-from services.dependencies import get_current_user
-from services.openai import (
-    calculate_bulk_signal_matches,
-    get_matching_category_ids,
+from services.db import engine, get_session, release_connection
+from services.dependencies import get_current_user, tag_llm_endpoint
+from services.match_jobs import materialize_signal_matches, purge_signal_matches
+from services.matching import (
+    decode_cursor,
+    iter_signal_matches,
+    load_candidate_pool,
+    load_relevant_pool,
+    page_signal_matches,
+    relevant_candidate_ids,
 )
+from services.openai import get_matching_category_ids
+from services.signal_features import build_signal_features, normalize_details
+from services.signal_pool import signal_pool
+from services.term_index import term_index
+
+# Górny limit `limit` w trybie top-k
+MAX_MATCH_PAGE_SIZE = 100
 
-router = APIRouter(prefix="/signals", tags=["Signals"])
+router = APIRouter(prefix="/signals", tags=["Signals"], dependencies=[Depends(tag_llm_endpoint)])
 
 
 @router.post("/", response_model=UserSignalResponse, status_code=status.HTTP_201_CREATED)
 def add_signal(
     signal_data: UserSignalCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session),
 ):
@@ -38,6 +58,8 @@ def add_signal(
     - 3 = Investor
     
     details: dowolny JSON (string, lista, obiekt - cokolwiek z frontu)
+    
+    Embedding i dopasowania do puli kandydatów liczone są w tle po odpowiedzi.
     """
     # Sprawdź czy signal_category_id jest poprawny (1-3)
     if signal_data.signal_category_id not in [1, 2, 3]:
@@ -55,14 +77,24 @@ def add_signal(
     new_signal = UserSignal(
         user_id=current_user.id,
         signal_category_id=signal_data.signal_category_id,
-        details=signal_data.details,
+        details=normalize_details(signal_data.details),
         is_active=True
     )
     
     session.add(new_signal)
+    session.flush()
+    # Cechy (hash, umiejętności, kwoty) w tej samej transakcji co sygnał
+    session.add(build_signal_features(new_signal.id, new_signal.details))
     session.commit()
     session.refresh(new_signal)
     
+    # Dociągnij nowy sygnał do indeksu terminów i puli (razem z ewentualnymi z innych procesów)
+    term_index.sync(session)
+    signal_pool.sync(session)
+    
+    # Policz dopasowania w obie strony (nowy <-> istniejące) poza ścieżką żądania
+    background_tasks.add_task(materialize_signal_matches, new_signal.id)
+    
     return new_signal
 
 
@@ -120,6 +152,7 @@ def get_user_signals(
 @router.delete("/{signal_id}", status_code=status.HTTP_204_NO_CONTENT)
 def remove_signal(
     signal_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session),
 ):
@@ -143,13 +176,197 @@ def remove_signal(
     signal.is_active = False
     session.add(signal)
     session.commit()
+    term_index.remove(signal_id)
+    signal_pool.remove(signal_id)
+    
+    # Usuń zmaterializowane dopasowania dezaktywowanego sygnału
+    background_tasks.add_task(purge_signal_matches, signal_id)
     
     return None
 
 
+def _get_own_signal(session: Session, signal_id: int, user: User) -> UserSignal:
+    """Pobiera sygnał źródłowy i sprawdza, czy należy do użytkownika."""
+    source_signal = session.get(UserSignal, signal_id)
+    
+    if not source_signal:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Signal not found"
+        )
+    
+    if source_signal.user_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only match your own signals"
+        )
+    
+    return source_signal
+
+
+def _match_filters(
+    location: Optional[str] = Query(None, max_length=100),
+    min_experience_years: Optional[int] = Query(None, ge=0),
+    max_experience_years: Optional[int] = Query(None, ge=0),
+    budget_min: Optional[float] = Query(None, ge=0),
+    budget_max: Optional[float] = Query(None, ge=0),
+    hourly_rate_min: Optional[float] = Query(None, ge=0),
+    hourly_rate_max: Optional[float] = Query(None, ge=0),
+    skills: list[str] = Query([]),
+) -> SignalMatchFilters:
+    """
+    Filtry kandydatów z parametrów zapytania (wspólne dla endpointów matchowania).
+    
+    - **location**: fragment lokalizacji autora (np. `Warsaw`)
+    - **min_experience_years** / **max_experience_years**: lata doświadczenia autora
+    - **budget_min** / **budget_max**: przedział, na który musi nachodzić budżet/ticket
+      inwestora lub potrzebne finansowanie pomysłu
+    - **hourly_rate_min** / **hourly_rate_max**: przedział stawki godzinowej
+    - **skills**: wymagane umiejętności (parametr powtarzalny: `skills=python&skills=react`)
+    """
+    return SignalMatchFilters(
+        location=location,
+        min_experience_years=min_experience_years,
+        max_experience_years=max_experience_years,
+        budget_min=budget_min,
+        budget_max=budget_max,
+        hourly_rate_min=hourly_rate_min,
+        hourly_rate_max=hourly_rate_max,
+        skills=skills,
+    )
+
+
+def _load_user_pools(
+    session: Session,
+    user_id: int,
+    filters: Optional[SignalMatchFilters] = None,
+) -> tuple[list[UserSignal], list[list[UserSignal]], dict[int, UserSignal]]:
+    """
+    Pobiera aktywne sygnały użytkownika i pule kandydatów dla każdego z nich.
+    
+    Sygnały o tym samym zestawie pasujących kategorii i kandydatach z indeksu
+    terminów dzielą pulę - każdą pulę ładujemy z bazy tylko raz.
+    
+    Returns:
+        (sygnały źródłowe, pula dla każdego z nich, wszyscy kandydaci po ID)
+    """
+    user_signals = session.exec(
+        select(UserSignal).where(
+            UserSignal.user_id == user_id,
+            UserSignal.is_active == True  # noqa: E712
+        )
+    ).all()
+    source_signals = [sig for sig in user_signals if sig.id is not None]
+    
+    pools: dict[tuple, list[UserSignal]] = {}
+    source_pools = []
+    for source_signal in source_signals:
+        category_ids = tuple(sorted(get_matching_category_ids(source_signal.signal_category_id)))
+        candidate_ids = relevant_candidate_ids(session, source_signal, user_id)
+        pool_key = (category_ids, frozenset(candidate_ids) if candidate_ids is not None else None)
+        if category_ids and pool_key not in pools:
+            pools[pool_key] = load_candidate_pool(session, category_ids, user_id, candidate_ids, filters)
+        source_pools.append(pools.get(pool_key, []))
+    
+    all_targets = {sig.id: sig for pool in pools.values() for sig in pool}
+    return source_signals, source_pools, all_targets
+
+
+def _load_usernames(session: Session, signals: list[UserSignal]) -> dict[int, str]:
+    """Mapowanie user_id -> username dla autorów sygnałów (jedno zapytanie)."""
+    user_ids = list(set(sig.user_id for sig in signals))
+    if not user_ids:
+        return {}
+    users = session.exec(select(User).where(col(User.id).in_(user_ids))).all()
+    return {u.id: u.username for u in users}
+
+
+def _load_match_pool(
+    session: Session,
+    signal_id: int,
+    user: User,
+    filters: SignalMatchFilters,
+) -> tuple[UserSignal, list[UserSignal]]:
+    """
+    Sygnał źródłowy użytkownika i jego pula kandydatów; na końcu oddaje
+    połączenie do puli (załadowane obiekty pozostają dostępne).
+    Synchroniczne - endpointy async wołają przez `run_in_threadpool`.
+    """
+    source_signal = _get_own_signal(session, signal_id, user)
+    target_signals = load_relevant_pool(session, source_signal, user.id, filters)
+    release_connection(session)
+    return source_signal, target_signals
+
+
+def _load_stream_pool(
+    session: Session,
+    signal_id: int,
+    user_id: int,
+    filters: SignalMatchFilters,
+) -> tuple[UserSignal, list[UserSignal], dict[int, str]]:
+    """Pula kandydatów sygnału (już sprawdzonego) + ich autorzy, potem oddaje połączenie do puli."""
+    source_signal = session.get(UserSignal, signal_id)
+    target_signals = load_relevant_pool(session, source_signal, user_id, filters)
+    user_map = _load_usernames(session, target_signals)
+    release_connection(session)
+    return source_signal, target_signals, user_map
+
+
+def _load_stream_pools(
+    session: Session,
+    user_id: int,
+    filters: SignalMatchFilters,
+) -> tuple[list[UserSignal], list[list[UserSignal]], dict[int, UserSignal], dict[int, str]]:
+    """`_load_user_pools` + autorzy wszystkich kandydatów, potem oddaje połączenie do puli."""
+    source_signals, source_pools, all_targets = _load_user_pools(session, user_id, filters)
+    user_map = _load_usernames(session, list(all_targets.values()))
+    release_connection(session)
+    return source_signals, source_pools, all_targets, user_map
+
+
+def _enrich_matches(
+    matches: list[dict],
+    targets: dict[int, UserSignal],
+    user_map: dict[int, str],
+    min_accurate: float,
+) -> list[dict]:
+    """Dodaje details, signal_category_id, user_id i username; filtruje po min_accurate."""
+    enriched = []
+    for m in matches:
+        if m["accurate"] >= min_accurate:
+            target = targets[m["signal_id"]]
+            enriched.append({
+                **m, 
+                "details": target.details,
+                "signal_category_id": target.signal_category_id,
+                "user_id": target.user_id,
+                "username": user_map.get(target.user_id)
+            })
+    return enriched
+
+
+def _stream_response(frames: AsyncIterator[dict], stream_format: str) -> StreamingResponse:
+    """Opakowuje ramki w odpowiedź NDJSON (domyślnie) lub SSE."""
+    if stream_format == "sse":
+        body = (
+            f"event: {frame['type']}\ndata: {json.dumps(frame, ensure_ascii=False)}\n\n"
+            async for frame in frames
+        )
+        return StreamingResponse(
+            body,
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    body = (json.dumps(frame, ensure_ascii=False) + "\n" async for frame in frames)
+    return StreamingResponse(body, media_type="application/x-ndjson")
+
+
 @router.get("/match-all", response_model=SignalMatchAllResponse)
-def match_all_signals(
+async def match_all_signals(
     min_accurate: float = 0,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_MATCH_PAGE_SIZE),
+    deadline_ms: Optional[int] = Query(None, ge=0),
+    filters: SignalMatchFilters = Depends(_match_filters),
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session),
 ):
@@ -157,18 +374,20 @@ def match_all_signals(
     Znajdź dopasowania dla WSZYSTKICH sygnałów użytkownika naraz.
     
     - **min_accurate**: Minimalny próg dopasowania (0-100), domyślnie 0
+    - **limit**: Tryb top-k - najwyżej tyle najlepszych dopasowań na sygnał;
+      kolejne strony przez `/match/{signal_id}?cursor=<next_cursor>`
+    - **deadline_ms**: Budżet czasu (domyślnie MATCH_DEADLINE_MS, 0 = bez limitu);
+      po jego przekroczeniu zwracany jest wynik częściowy (`partial`)
+    - Filtry kandydatów (lokalizacja, doświadczenie, kwoty, umiejętności) - jak w `/match/{signal_id}`
     
-    Zwraca wszystkie dopasowania pogrupowane po sygnałach źródłowych.
+    Zwraca dopasowania pogrupowane po sygnałach źródłowych.
     """
-    # Pobierz wszystkie aktywne sygnały użytkownika
-    user_signals = session.exec(
-        select(UserSignal).where(
-            UserSignal.user_id == current_user.id,
-            UserSignal.is_active == True  # noqa: E712
-        )
-    ).all()
+    # Zapytania do bazy w wątku - nie blokują pętli zdarzeń
+    source_signals, source_pools, all_targets = await run_in_threadpool(
+        _load_user_pools, session, current_user.id, filters
+    )
     
-    if not user_signals:
+    if not source_signals:
         return {
             "user_id": current_user.id,
             "total_signals": 0,
@@ -176,97 +395,119 @@ def match_all_signals(
             "results": []
         }
     
+    # Oddaj połączenie do puli na czas scoringu (załadowane obiekty pozostają dostępne)
+    await run_in_threadpool(release_connection, session)
+    
+    # Oblicz dopasowania dla wszystkich sygnałów źródłowych równolegle
+    pages = await asyncio.gather(*[
+        page_signal_matches(
+            session, source_signal, pool,
+            min_accurate=min_accurate, limit=limit, deadline_ms=deadline_ms
+        )
+        for source_signal, pool in zip(source_signals, source_pools)
+    ])
+    
+    user_map = await run_in_threadpool(
+        _load_usernames, session, [all_targets[m["signal_id"]] for matches, _, _ in pages for m in matches]
+    )
+    
     results = []
     total_matches = 0
     
-    for source_signal in user_signals:
-        # Pomiń sygnały bez ID (nie powinno się zdarzyć)
-        if source_signal.id is None:
-            continue
-            
-        # Pobierz kategorie które pasują do tego sygnału
-        matching_category_ids = get_matching_category_ids(source_signal.signal_category_id)
-        
-        if not matching_category_ids:
-            results.append({
-                "source_signal_id": source_signal.id,
-                "matches": []
-            })
-            continue
-        
-        # Pobierz sygnały z pasujących kategorii (nie własne)
-        target_signals = session.exec(
-            select(UserSignal).where(
-                col(UserSignal.signal_category_id).in_(matching_category_ids),
-                UserSignal.user_id != current_user.id,
-                UserSignal.is_active == True  # noqa: E712
-            )
-        ).all()
-        
-        if not target_signals:
-            results.append({
-                "source_signal_id": source_signal.id,
-                "matches": []
-            })
-            continue
-        
-        # Pobierz userów dla sygnałów
-        user_ids = list(set(sig.user_id for sig in target_signals))
-        users = session.exec(select(User).where(col(User.id).in_(user_ids))).all()
-        user_map = {u.id: u.username for u in users}
-        
-        # Przygotuj dane do matchowania
-        target_data = [
-            {"id": sig.id, "details": sig.details}
-            for sig in target_signals
-        ]
-        
-        # Słownik do szybkiego dostępu do details i user_id
-        target_details_map = {sig.id: sig.details for sig in target_signals}
-        target_user_map = {sig.id: sig.user_id for sig in target_signals}
-        
-        # Oblicz dopasowanie przez OpenAI
-        matches = calculate_bulk_signal_matches(
-            source_signal_id=source_signal.id,
-            source_details=source_signal.details,
-            target_signals=target_data
-        )
-        
-        # Dodaj details, user_id i username do wyników i filtruj po min_accurate
-        filtered_matches = []
-        for m in matches:
-            if m["accurate"] >= min_accurate:
-                sig_id = m["signal_id"]
-                user_id = target_user_map.get(sig_id)
-                filtered_matches.append({
-                    **m, 
-                    "details": target_details_map.get(sig_id),
-                    "user_id": user_id,
-                    "username": user_map.get(user_id) if user_id else None
-                })
-        
-        # Sortuj po accurate malejąco
-        filtered_matches.sort(key=lambda x: x["accurate"], reverse=True)
-        
+    for source_signal, (matches, next_cursor, partial) in zip(source_signals, pages):
+        filtered_matches = _enrich_matches(matches, all_targets, user_map, min_accurate)
         total_matches += len(filtered_matches)
         
         results.append({
             "source_signal_id": source_signal.id,
-            "matches": filtered_matches
+            "matches": filtered_matches,
+            "next_cursor": next_cursor,
+            "partial": partial
         })
     
     return {
         "user_id": current_user.id,
-        "total_signals": len(user_signals),
+        "total_signals": len(source_signals),
         "total_matches": total_matches,
+        "partial": any(partial for _, _, partial in pages),
         "results": results
     }
 
 
+@router.get("/match-all/stream")
+async def stream_match_all_signals(
+    min_accurate: float = 0,
+    stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$"),
+    filters: SignalMatchFilters = Depends(_match_filters),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Streamingowa wersja match-all - wyniki wysyłane paczkami, gdy tylko są gotowe.
+    
+    - **min_accurate**: Minimalny próg dopasowania (0-100), domyślnie 0
+    - **format**: `ndjson` (domyślnie) lub `sse`
+    
+    Ramki:
+    - `{"type": "matches", "source_signal_id": ..., "matches": [...]}` - kolejna paczka
+    - `{"type": "summary", "user_id": ..., "total_signals": ..., "total_matches": ...}` - na końcu
+    """
+    user_id = current_user.id
+    
+    async def frames() -> AsyncIterator[dict]:
+        # Własna sesja - sesja żądania może zostać zamknięta przed wysłaniem treści
+        with Session(engine) as stream_session:
+            source_signals, source_pools, all_targets, user_map = await run_in_threadpool(
+                _load_stream_pools, stream_session, user_id, filters
+            )
+            
+            queue: asyncio.Queue = asyncio.Queue()
+            
+            async def produce(source_signal: UserSignal, pool: list[UserSignal]) -> None:
+                try:
+                    async for matches in iter_signal_matches(stream_session, source_signal, pool):
+                        await queue.put((source_signal.id, matches))
+                finally:
+                    await queue.put((source_signal.id, None))
+            
+            tasks = [
+                asyncio.create_task(produce(source_signal, pool))
+                for source_signal, pool in zip(source_signals, source_pools)
+            ]
+            total_matches = 0
+            try:
+                finished = 0
+                while finished < len(tasks):
+                    source_signal_id, matches = await queue.get()
+                    if matches is None:
+                        finished += 1
+                        continue
+                    batch = _enrich_matches(matches, all_targets, user_map, min_accurate)
+                    if batch:
+                        total_matches += len(batch)
+                        yield {"type": "matches", "source_signal_id": source_signal_id, "matches": batch}
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+        
+        yield {
+            "type": "summary",
+            "user_id": user_id,
+            "total_signals": len(source_signals),
+            "total_matches": total_matches,
+        }
+    
+    return _stream_response(frames(), stream_format)
+
+
 @router.get("/match/{signal_id}", response_model=SignalMatchResponse)
-def match_signals(
+async def match_signals(
     signal_id: int,
     min_accurate: float = 0,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_MATCH_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    deadline_ms: Optional[int] = Query(None, ge=0),
+    filters: SignalMatchFilters = Depends(_match_filters),
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session),
 ):
@@ -274,6 +515,14 @@ def match_signals(
     Znajdź pasujące sygnały dla danego sygnału użytkownika.
     
     - **min_accurate**: Minimalny próg dopasowania (0-100), domyślnie 0
+    - **limit**: Tryb top-k - najwyżej tyle najlepszych dopasowań (bez limitu: wszystkie)
+    - **cursor**: `next_cursor` z poprzedniej strony
+    - **deadline_ms**: Budżet czasu (domyślnie MATCH_DEADLINE_MS, 0 = bez limitu);
+      po jego przekroczeniu zwracane są pary ocenione do tej pory (`partial`),
+      a reszta liczy się w tle
+    - Filtry kandydatów - zawężają pulę przed scoringiem:
+      **location**, **min/max_experience_years**, **budget_min/max**,
+      **hourly_rate_min/max**, **skills**
     
     Logika matchowania:
     - FREELANCER (1) szuka STARTUP_IDEA (2)
@@ -282,39 +531,19 @@ def match_signals(
     
     Zwraca listę pasujących sygnałów z współczynnikiem dopasowania (0-100).
     """
-    # Pobierz sygnał źródłowy
-    source_signal = session.get(UserSignal, signal_id)
-    
-    if not source_signal:
+    try:
+        page_cursor = decode_cursor(cursor) if cursor else None
+    except ValueError:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Signal not found"
-        )
-    
-    # Sprawdź czy sygnał należy do użytkownika
-    if source_signal.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You can only match your own signals"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
         )
     
-    # Pobierz kategorie które pasują
-    matching_category_ids = get_matching_category_ids(source_signal.signal_category_id)
-    
-    if not matching_category_ids:
-        return {
-            "source_signal_id": signal_id,
-            "matches": []
-        }
-    
-    # Pobierz sygnały z pasujących kategorii (nie własne)
-    target_signals = session.exec(
-        select(UserSignal).where(
-            col(UserSignal.signal_category_id).in_(matching_category_ids),
-            UserSignal.user_id != current_user.id,
-            UserSignal.is_active == True  # noqa: E712
-        )
-    ).all()
+    # Sygnał źródłowy i sygnały z pasujących kategorii (nie własne) o wspólnych terminach -
+    # zapytania do bazy w wątku, połączenie wraca do puli przed scoringiem
+    source_signal, target_signals = await run_in_threadpool(
+        _load_match_pool, session, signal_id, current_user, filters
+    )
     
     if not target_signals:
         return {
@@ -322,46 +551,63 @@ def match_signals(
             "matches": []
         }
     
-    # Przygotuj dane do matchowania
-    target_data = [
-        {"id": sig.id, "details": sig.details}
-        for sig in target_signals
-    ]
-    
-    # Słownik do szybkiego dostępu do details i signal_category_id
-    target_details_map = {sig.id: sig.details for sig in target_signals}
-    target_category_map = {sig.id: sig.signal_category_id for sig in target_signals}
-    
-    # Pobierz usernames dla target_signals
-    user_ids = list(set(sig.user_id for sig in target_signals))
-    users = session.exec(select(User).where(col(User.id).in_(user_ids))).all()
-    user_map = {u.id: u.username for u in users}
-    target_username_map = {sig.id: user_map.get(sig.user_id) for sig in target_signals}
-    target_user_id_map = {sig.id: sig.user_id for sig in target_signals}
-    
-    # Oblicz dopasowanie przez OpenAI
-    matches = calculate_bulk_signal_matches(
-        source_signal_id=signal_id,
-        source_details=source_signal.details,
-        target_signals=target_data
+    # Oblicz dopasowanie (cache + OpenAI dla nowych/zmienionych par), posortowane malejąco
+    matches, next_cursor, partial = await page_signal_matches(
+        session, source_signal, target_signals,
+        min_accurate=min_accurate, limit=limit, cursor=page_cursor, deadline_ms=deadline_ms
     )
     
-    # Dodaj details, signal_category_id, username i user_id do wyników i filtruj po min_accurate
-    filtered_matches = [
-        {
-            **m, 
-            "details": target_details_map.get(m["signal_id"]),
-            "signal_category_id": target_category_map.get(m["signal_id"]),
-            "username": target_username_map.get(m["signal_id"]),
-            "user_id": target_user_id_map.get(m["signal_id"])
-        }
-        for m in matches if m["accurate"] >= min_accurate
-    ]
-    
-    # Sortuj po accurate malejąco
-    filtered_matches.sort(key=lambda x: x["accurate"], reverse=True)
+    targets = {sig.id: sig for sig in target_signals}
+    user_map = await run_in_threadpool(_load_usernames, session, [targets[m["signal_id"]] for m in matches])
+    filtered_matches = _enrich_matches(matches, targets, user_map, min_accurate)
     
     return {
         "source_signal_id": signal_id,
-        "matches": filtered_matches
+        "matches": filtered_matches,
+        "next_cursor": next_cursor,
+        "partial": partial
     }
+
+
+@router.get("/match/{signal_id}/stream")
+async def stream_match_signals(
+    signal_id: int,
+    min_accurate: float = 0,
+    stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$"),
+    filters: SignalMatchFilters = Depends(_match_filters),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session),
+):
+    """
+    Streamingowa wersja `/match/{signal_id}` - wyniki wysyłane paczkami,
+    gdy tylko są gotowe (najpierw cache, potem kolejne paczki z LLM).
+    
+    - **min_accurate**: Minimalny próg dopasowania (0-100), domyślnie 0
+    - **format**: `ndjson` (domyślnie) lub `sse`
+    
+    Ramki:
+    - `{"type": "matches", "source_signal_id": ..., "matches": [...]}` - kolejna paczka
+    - `{"type": "summary", "source_signal_id": ..., "total_matches": ...}` - na końcu
+    """
+    # Walidacja przed rozpoczęciem streamu, żeby 404/403 wróciły jako zwykła odpowiedź
+    await run_in_threadpool(_get_own_signal, session, signal_id, current_user)
+    user_id = current_user.id
+    
+    async def frames() -> AsyncIterator[dict]:
+        total_matches = 0
+        # Własna sesja - sesja żądania może zostać zamknięta przed wysłaniem treści
+        with Session(engine) as stream_session:
+            source_signal, target_signals, user_map = await run_in_threadpool(
+                _load_stream_pool, stream_session, signal_id, user_id, filters
+            )
+            targets = {sig.id: sig for sig in target_signals}
+            
+            async for matches in iter_signal_matches(stream_session, source_signal, target_signals):
+                batch = _enrich_matches(matches, targets, user_map, min_accurate)
+                if batch:
+                    total_matches += len(batch)
+                    yield {"type": "matches", "source_signal_id": signal_id, "matches": batch}
+        
+        yield {"type": "summary", "source_signal_id": signal_id, "total_matches": total_matches}
+    
+    return _stream_response(frames(), stream_format)
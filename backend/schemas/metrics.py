@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+# Jedna grupa ledgera LLM: (endpoint, operacja, model)
+class LLMUsageGroup(BaseModel):
+    endpoint: str
+    operation: str
+    model: str
+    calls: int
+    candidates: int
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int  # tokeny promptu z cache OpenAI
+    cached_ratio: Optional[float] = None  # cached_tokens / prompt_tokens
+    cost_usd: Optional[float] = None  # None dla modelu spoza cennika
+    avg_latency_ms: float
+    p95_latency_ms: float
+    max_latency_ms: float
+    errors: int  # błędy API
+    parse_failures: int  # odpowiedzi, których nie dało się sparsować
+    truncated: int  # odpowiedzi ucięte przez max_tokens
+    missing_results: int  # kandydaci bez wyniku (wynik awaryjny 0)
+
+
+# Podsumowanie ledgera LLM
+class LLMUsageSummary(BaseModel):
+    since: datetime
+    total_calls: int
+    total_cost_usd: float
+    total_cached_ratio: Optional[float] = None
+    groups: list[LLMUsageGroup]
+
+
+# Statystyki jednego etapu kaskady matchowania
+class CascadeStageStats(BaseModel):
+    runs: int
+    candidates_in: int
+    candidates_out: int
+    total_ms: float
+    timeouts: int
+    avg_ms: float
+    survival_rate: Optional[float] = None
@@ -73,9 +73,23 @@ class SignalMatchResult(BaseModel):
     username: Optional[str] = None
 
 
+# Filtry kandydatów - zawężają pulę przed scoringiem (nie po nim, jak min_accurate)
+class SignalMatchFilters(BaseModel):
+    location: Optional[str] = None  # fragment User.location, bez rozróżniania wielkości liter
+    min_experience_years: Optional[int] = Field(default=None, ge=0)
+    max_experience_years: Optional[int] = Field(default=None, ge=0)
+    budget_min: Optional[float] = Field(default=None, ge=0)  # przedział kwot - budżet/ticket inwestora lub potrzebne finansowanie
+    budget_max: Optional[float] = Field(default=None, ge=0)
+    hourly_rate_min: Optional[float] = Field(default=None, ge=0)
+    hourly_rate_max: Optional[float] = Field(default=None, ge=0)
+    skills: list[str] = Field(default_factory=list)  # wszystkie muszą wystąpić w sygnale kandydata
+
+
 class SignalMatchResponse(BaseModel):
     source_signal_id: int
     matches: list[SignalMatchResult]
+    next_cursor: Optional[str] = None  # kursor kolejnej strony (gdy podano limit)
+    partial: bool = False  # True gdy przekroczono deadline - część par jeszcze się liczy
 
 
 class SignalMatchAllResponse(BaseModel):
@@ -83,6 +97,7 @@ class SignalMatchAllResponse(BaseModel):
     user_id: int
     total_signals: int
     total_matches: int
+    partial: bool = False  # True gdy wynik któregokolwiek sygnału jest częściowy
     results: list[SignalMatchResponse]
 
 
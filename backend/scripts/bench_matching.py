@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark endpointów matchowania - przepustowość i opóźnienia (p50/p90/p95/p99).
+
+Najlepiej uruchamiać z backendem wskazującym na lokalny stub OpenAI
+(scripts/openai_stub.py, OPENAI_BASE_URL), żeby wyniki były powtarzalne.
+
+Uruchom:
+    python scripts/bench_matching.py --email admin@gmail.com --password 12345678 \\
+        --endpoint match --requests 200 --concurrency 20 --reset-cache
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+# Dodaj główny katalog do PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def reset_match_cache() -> None:
+    """Czyści cache signal_match - pomiar 'na zimno' (wszystkie pary idą do LLM)."""
+    from sqlmodel import Session, delete
+
+    from models.match import SignalMatch
+    from services.db import engine
+
+    with Session(engine) as session:
+        session.exec(delete(SignalMatch))
+        session.commit()
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def pick_signal_id(client: httpx.AsyncClient) -> int:
+    response = await client.get("/signals/me")
+    response.raise_for_status()
+    signals = response.json()["signals"]
+    if not signals:
+        raise SystemExit("User has no signals to match")
+    return signals[0]["id"]
+
+
+async def run(args: argparse.Namespace) -> None:
+    from services.llm_ledger import percentile
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        token = await login(client, args.email, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        if args.endpoint == "match":
+            signal_id: Optional[int] = args.signal_id or await pick_signal_id(client)
+            path = f"/signals/match/{signal_id}"
+        else:
+            path = "/signals/match-all"
+        params = dict(p.split("=", 1) for p in args.param)
+
+        if args.reset_cache:
+            reset_match_cache()
+
+        latencies: list[float] = []
+        statuses: dict[int, int] = {}
+        partial = 0
+        queue: asyncio.Queue = asyncio.Queue()
+        for _ in range(args.requests):
+            queue.put_nowait(None)
+
+        async def worker() -> None:
+            nonlocal partial
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path, params=params)
+                    status = response.status_code
+                    if status == 200 and response.json().get("partial"):
+                        partial += 1
+                except httpx.HTTPError:
+                    status = 0
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+        elapsed = time.perf_counter() - started
+
+    print(f"\n📊 {args.endpoint} {path} params={params}")
+    print(f"  requests:    {len(latencies)} (concurrency {args.concurrency})")
+    print(f"  statuses:    {statuses}")
+    print(f"  partial:     {partial}")
+    print(f"  throughput:  {len(latencies) / elapsed:.1f} req/s")
+    print(f"  latency ms:  mean {statistics.mean(latencies):.1f}  "
+          f"p50 {percentile(latencies, 50):.1f}  p90 {percentile(latencies, 90):.1f}  "
+          f"p95 {percentile(latencies, 95):.1f}  p99 {percentile(latencies, 99):.1f}  "
+          f"max {max(latencies):.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark match endpoints")
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--endpoint", choices=["match", "match-all"], default="match")
+    parser.add_argument("--signal-id", type=int, help="match: sygnał źródłowy (domyślnie pierwszy sygnał użytkownika)")
+    parser.add_argument("--param", action="append", default=[], help="Parametr query, np. --param deadline_ms=0")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--reset-cache", action="store_true", help="Wyczyść cache signal_match przed pomiarem")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
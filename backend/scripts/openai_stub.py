@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Lokalny serwer zgodny z API OpenAI (chat.completions + embeddings) do
+deterministycznych benchmarków matchowania bez sieci.
+
+Tryby:
+- synth  - syntetyczne, deterministyczne wyniki dopasowania i embeddingi
+- replay - odpowiedzi z pliku nagrań; brak nagrania -> synth (albo 404 z --strict)
+- record - przekazuje zapytania do prawdziwego API i dopisuje odpowiedzi do pliku
+
+Opóźnienie odpowiedzi (--latency, w ms):
+    0 | fixed:200 | uniform:100,800 | normal:400,100 | lognormal:300,0.8 (mediana, sigma)
+
+Uruchom:
+    python scripts/openai_stub.py --mode synth --latency lognormal:400,0.6 --port 8100
+    OPENAI_BASE_URL=http://localhost:8100/v1 uvicorn main:app
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import re
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+_SOURCE_RE = re.compile(r"SYGNAŁ ŹRÓDŁOWY \(ID: (\d+)\)")
+_SINGLE_TARGET_RE = re.compile(r"SYGNAŁ DOCELOWY \(ID: (\d+)\)")
+_TARGET_RE = re.compile(r"SYGNAŁ ID (\d+)")
+_WORD_RE = re.compile(r"\w+")
+
+# Symulacja cache promptów OpenAI: prefiks od 1024 tokenów, trafienia w krokach po 128
+_CACHE_MIN_TOKENS = 1024
+_CACHE_INCREMENT = 128
+_seen_prefixes: set[str] = set()
+
+
+def parse_latency(spec: str, rng: random.Random) -> Callable[[], float]:
+    """Zwraca funkcję losującą opóźnienie w sekundach wg specyfikacji `--latency`."""
+    kind, _, raw = spec.partition(":")
+    args = [float(x) for x in raw.split(",") if x]
+    if kind in ("0", "none"):
+        return lambda: 0.0
+    if kind == "fixed":
+        return lambda: args[0] / 1000
+    if kind == "uniform":
+        return lambda: rng.uniform(args[0], args[1]) / 1000
+    if kind == "normal":
+        return lambda: max(0.0, rng.gauss(args[0], args[1])) / 1000
+    if kind == "lognormal":
+        median, sigma = args
+        return lambda: median * rng.lognormvariate(0, sigma) / 1000
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+def request_key(endpoint: str, body: dict) -> str:
+    """Klucz nagrania - hash kanonicznej postaci zapytania."""
+    canonical = json.dumps(body, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{endpoint}|{canonical}".encode("utf-8")).hexdigest()
+
+
+def _approx_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def synth_score(source_id: int, target_id: int) -> float:
+    """Deterministyczny wynik 0-100 dla pary (symetryczny, rozkład przesunięty w dół)."""
+    low, high = sorted((source_id, target_id))
+    rng = random.Random(f"{low}:{high}")
+    return round(100 * rng.betavariate(2, 3), 1)
+
+
+def cached_prefix_tokens(body: dict) -> int:
+    """
+    Tokeny prefiksu (wszystkie wiadomości poza ostatnią), które prawdziwe API
+    wzięłoby z cache - prefiks musi być już wcześniej widziany i mieć >= 1024 tokenów.
+    """
+    messages = [m.get("content") for m in body.get("messages", [])]
+    prefix = [m for m in messages[:-1] if isinstance(m, str)]
+    tokens = sum(_approx_tokens(m) for m in prefix)
+    if tokens < _CACHE_MIN_TOKENS:
+        return 0
+    key = request_key("prefix", {"model": body.get("model"), "messages": prefix})
+    if key not in _seen_prefixes:
+        _seen_prefixes.add(key)
+        return 0
+    return tokens // _CACHE_INCREMENT * _CACHE_INCREMENT
+
+
+def synth_chat(body: dict) -> dict:
+    """Odpowiedź chat.completions z wynikami dla sygnałów wymienionych w prompcie."""
+    text = "\n".join(
+        m["content"] for m in body.get("messages", []) if isinstance(m.get("content"), str)
+    )
+    source = _SOURCE_RE.search(text)
+    source_id = int(source.group(1)) if source else 0
+    single = _SINGLE_TARGET_RE.search(text)
+    if single:
+        target_id = int(single.group(1))
+        content = json.dumps({"signal_id": target_id, "accurate": synth_score(source_id, target_id)})
+    else:
+        results = [
+            {"signal_id": int(target_id), "accurate": synth_score(source_id, int(target_id))}
+            for target_id in _TARGET_RE.findall(text)
+        ]
+        # Structured Outputs (response_format json_schema) - tablica w obiekcie {"results": [...]}
+        schema_output = (body.get("response_format") or {}).get("type") == "json_schema"
+        content = json.dumps({"results": results} if schema_output else results)
+
+    # Jak prawdziwe API: odpowiedź dłuższa niż max_tokens jest ucinana
+    finish_reason = "stop"
+    max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+    if max_tokens and _approx_tokens(content) > max_tokens:
+        content = content[:max_tokens * 4]
+        finish_reason = "length"
+
+    prompt_tokens = _approx_tokens(text)
+    completion_tokens = _approx_tokens(content)
+    return {
+        "id": f"chatcmpl-stub-{request_key('chat', body)[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": finish_reason,
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_prefix_tokens(body)},
+        },
+    }
+
+
+def synth_embedding(text: str, dimensions: int) -> list[float]:
+    """Embedding typu bag-of-words (hashowanie słów) - podobne teksty mają bliskie wektory."""
+    vector = [0.0] * dimensions
+    for word in _WORD_RE.findall(text.lower()):
+        digest = hashlib.sha256(word.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % dimensions
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+def synth_embeddings(body: dict) -> dict:
+    inputs = body.get("input", [])
+    inputs = inputs if isinstance(inputs, list) else [inputs]
+    dimensions = int(body.get("dimensions") or 1536)
+    as_base64 = body.get("encoding_format") == "base64"
+
+    data = []
+    for i, text in enumerate(inputs):
+        vector = synth_embedding(str(text), dimensions)
+        embedding: Any = (
+            base64.b64encode(array("f", vector).tobytes()).decode("ascii") if as_base64 else vector
+        )
+        data.append({"object": "embedding", "index": i, "embedding": embedding})
+
+    tokens = sum(_approx_tokens(str(text)) for text in inputs)
+    return {
+        "object": "list",
+        "data": data,
+        "model": body.get("model", "stub"),
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+    }
+
+
+class Recordings:
+    """Nagrane odpowiedzi (JSONL: {"key", "endpoint", "response"}) z dopisywaniem."""
+
+    def __init__(self, path: Optional[Path]) -> None:
+        self.path = path
+        self.responses: dict[str, dict] = {}
+        if path is not None and path.exists():
+            with path.open(encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.responses[entry["key"]] = entry["response"]
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.responses.get(key)
+
+    def add(self, key: str, endpoint: str, response: dict) -> None:
+        self.responses[key] = response
+        if self.path is not None:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "endpoint": endpoint, "response": response}, ensure_ascii=False) + "\n")
+
+
+def create_app(args: argparse.Namespace) -> FastAPI:
+    rng = random.Random(args.seed)
+    latency = parse_latency(args.latency, rng)
+    recordings = Recordings(Path(args.recordings) if args.recordings else None)
+    synthesizers = {"chat/completions": synth_chat, "embeddings": synth_embeddings}
+    upstream = httpx.AsyncClient(base_url=args.upstream, timeout=120) if args.mode == "record" else None
+    stats = {"requests": 0, "replayed": 0, "synthesized": 0, "recorded": 0, "errors": 0}
+
+    app = FastAPI(title="OpenAI stub")
+
+    async def handle(endpoint: str, request: Request) -> JSONResponse:
+        body = await request.json()
+        key = request_key(endpoint, body)
+        stats["requests"] += 1
+
+        if args.mode == "record":
+            headers = {"Authorization": request.headers.get("authorization", "")}
+            upstream_response = await upstream.post(f"/{endpoint}", json=body, headers=headers)
+            if upstream_response.status_code == 200:
+                recordings.add(key, endpoint, upstream_response.json())
+                stats["recorded"] += 1
+            return JSONResponse(upstream_response.json(), status_code=upstream_response.status_code)
+
+        await asyncio.sleep(latency())
+        if rng.random() < args.error_rate:
+            stats["errors"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_error", "code": "rate_limit_exceeded"}},
+                status_code=429,
+            )
+
+        response = recordings.get(key) if args.mode == "replay" else None
+        if response is not None:
+            stats["replayed"] += 1
+            return JSONResponse(response)
+        if args.mode == "replay" and args.strict:
+            return JSONResponse({"error": {"message": "No recording for request", "type": "stub_miss"}}, status_code=404)
+
+        stats["synthesized"] += 1
+        return JSONResponse(synthesizers[endpoint](body))
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        return await handle("chat/completions", request)
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        return await handle("embeddings", request)
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub for offline benchmarks")
+    parser.add_argument("--mode", choices=["synth", "replay", "record"], default="synth")
+    parser.add_argument("--recordings", help="Plik JSONL z nagraniami (replay/record)")
+    parser.add_argument("--strict", action="store_true", help="replay: 404 zamiast syntetycznej odpowiedzi")
+    parser.add_argument("--upstream", default="https://api.openai.com/v1", help="record: adres prawdziwego API")
+    parser.add_argument("--latency", default="0", help="Rozkład opóźnienia, np. lognormal:400,0.6")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Odsetek odpowiedzi 429 (0-1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    if args.mode in ("replay", "record") and not args.recordings:
+        parser.error(f"--recordings is required in {args.mode} mode")
+
+    print(f"🤖 OpenAI stub ({args.mode}, latency={args.latency}) on http://{args.host}:{args.port}/v1")
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Przeliczenie dopasowań wszystkich aktywnych sygnałów (np. po zmianie promptu
+albo modelu i podbiciu MATCH_SCORER_VERSION) bez czekania, aż użytkownicy
+otworzą radar.
+
+Sygnały źródłowe są dzielone na shardy liczone w puli procesów. Globalny
+limit równoległych zapytań LLM (--llm-concurrency) jest dzielony między
+procesy. Pary już obecne w cache dla bieżącej wersji scorera są pomijane,
+wyniki zapisywane są wsadowo (--write-batch par na commit), a ukończone
+shardy trafiają do pliku checkpointu - przerwane przeliczenie można wznowić.
+
+Uruchom:
+    python scripts/recompute_matches.py --workers 4 --llm-concurrency 8
+    python scripts/recompute_matches.py --scorer heuristic --restart
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Optional
+
+# Dodaj główny katalog do PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+DEFAULT_CHECKPOINT = Path(__file__).parent.parent / "data" / "recompute_checkpoint.json"
+
+
+# --- worker (osobny proces) ---
+
+async def _score_source(
+    session: Any,
+    source: Any,
+    pool: list[Any],
+    scorer: str,
+    all_pairs: bool,
+) -> Optional[tuple[int, str, dict[int, float], dict[int, str]]]:
+    """Wyniki brakujących par jednego sygnału źródłowego (bez zapisu do cache)."""
+    from services.heuristic import calculate_heuristic_matches
+    from services.llm_gateway import Priority
+    from services.match_cache import details_hash, get_uncached_target_ids
+    from services.match_cascade import run_cascade
+    from services.matching import get_scorer_version
+    from services.openai import calculate_bulk_signal_matches
+    from services.signal_pool import signal_pool
+
+    if scorer != "heuristic" and not all_pairs:
+        # Te same pary, o które zapytałyby endpointy matchowania
+        pool, _ = await run_cascade(session, source, pool, priority=Priority.BACKGROUND)
+
+    source_hash = details_hash(source.details)
+    target_hashes = {sig.id: signal_pool.details_hash(sig) for sig in pool}
+    uncached = await asyncio.to_thread(
+        get_uncached_target_ids, session, source.id, source_hash, target_hashes, get_scorer_version(scorer)
+    )
+    target_data = [{"id": sig.id, "details": sig.details} for sig in pool if sig.id in uncached]
+    if not target_data:
+        return None
+
+    if scorer == "heuristic":
+        matches = calculate_heuristic_matches(source.id, source.details, target_data)
+    else:
+        matches = await calculate_bulk_signal_matches(
+            source.id, source.details, target_data, priority=Priority.BACKGROUND
+        )
+    # Wyniki awaryjne (błąd parsowania / brak odpowiedzi) nie trafiają do cache
+    scores = {m["signal_id"]: m["accurate"] for m in matches if not m.get("fallback")}
+    return source.id, source_hash, scores, target_hashes
+
+
+async def _recompute_shard_async(source_ids: list[int], scorer: str, all_pairs: bool, write_batch: int) -> int:
+    from sqlmodel import Session, col, select
+
+    from models.signal import UserSignal
+    from services.db import engine, release_connection
+    from services.llm_ledger import flush_llm_ledger, llm_endpoint
+    from services.match_cache import store_scores_bulk
+    from services.matching import get_scorer_version, load_relevant_pool
+
+    llm_endpoint.set("recompute")
+    scorer_version = get_scorer_version(scorer)
+    with Session(engine) as session:
+        sources = session.exec(
+            select(UserSignal).where(
+                col(UserSignal.id).in_(source_ids),
+                UserSignal.is_active == True  # noqa: E712
+            )
+        ).all()
+        pools = [load_relevant_pool(session, source, source.user_id) for source in sources]
+        release_connection(session)
+
+        pending: list[tuple[int, str, dict[int, float], dict[int, str]]] = []
+        pending_pairs = 0
+        stored = 0
+        # Równoległość ogranicza semafor bramki LLM (LLM_BACKGROUND_CONCURRENCY tego procesu)
+        for task in asyncio.as_completed([
+            _score_source(session, source, pool, scorer, all_pairs)
+            for source, pool in zip(sources, pools)
+        ]):
+            entry = await task
+            if entry is None:
+                continue
+            pending.append(entry)
+            pending_pairs += len(entry[2])
+            if pending_pairs >= write_batch:
+                stored += store_scores_bulk(session, pending, scorer_version)
+                pending, pending_pairs = [], 0
+        stored += store_scores_bulk(session, pending, scorer_version)
+    flush_llm_ledger()
+    return stored
+
+
+# Pętla zdarzeń procesu roboczego - semafory bramki LLM i pula połączeń HTTP
+# są związane z pętlą, więc kolejne shardy w tym samym procesie używają tej samej
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def recompute_shard(source_ids: list[int], scorer: str, all_pairs: bool, write_batch: int) -> int:
+    """Punkt wejścia procesu roboczego - przelicza jeden shard sygnałów źródłowych."""
+    global _worker_loop
+    if _worker_loop is None:
+        _worker_loop = asyncio.new_event_loop()
+    return _worker_loop.run_until_complete(_recompute_shard_async(source_ids, scorer, all_pairs, write_batch))
+
+
+# --- proces główny ---
+
+def load_checkpoint(path: Path, scorer_version: str) -> set[int]:
+    """ID ukończonych sygnałów źródłowych; checkpoint innej wersji scorera jest ignorowany."""
+    if not path.exists():
+        return set()
+    data = json.loads(path.read_text())
+    if data.get("scorer_version") != scorer_version:
+        print(f"Checkpoint {path} is for {data.get('scorer_version')} - starting over")
+        return set()
+    return set(data.get("done", []))
+
+
+def save_checkpoint(path: Path, scorer_version: str, done: set[int]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"scorer_version": scorer_version, "done": sorted(done)}))
+    os.replace(tmp, path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute cached signal matches")
+    parser.add_argument("--scorer", choices=["openai", "heuristic"], help="Domyślnie MATCH_SCORER")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Liczba procesów")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="Globalny limit równoległych zapytań LLM")
+    parser.add_argument("--shard-size", type=int, default=50, help="Sygnałów źródłowych na shard")
+    parser.add_argument("--write-batch", type=int, default=500, help="Par na jeden zapis do bazy")
+    parser.add_argument("--all-pairs", action="store_true", help="Bez kaskady zawężania - LLM ocenia całą pulę")
+    parser.add_argument("--checkpoint", type=Path, default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="Zignoruj istniejący checkpoint")
+    args = parser.parse_args()
+
+    workers = max(1, min(args.workers, args.llm_concurrency))
+    per_worker = max(1, args.llm_concurrency // workers)
+    # Procesy potomne czytają limity z env przy imporcie config - ustaw przed ich startem
+    os.environ["LLM_BACKGROUND_CONCURRENCY"] = str(per_worker)
+    os.environ["LLM_MAX_CONCURRENCY"] = str(per_worker + 1)
+
+    from sqlmodel import Session, col, select
+
+    from config import settings
+    from models.signal import UserSignal
+    from services.db import create_db_and_tables, engine
+    from services.matching import get_scorer_version
+    from services.signal_features import sync_signal_features
+
+    scorer = args.scorer or settings.MATCH_SCORER
+    scorer_version = get_scorer_version(scorer)
+    create_db_and_tables()
+    with Session(engine) as session:
+        sync_signal_features(session)
+
+    done = set() if args.restart else load_checkpoint(args.checkpoint, scorer_version)
+    with Session(engine) as session:
+        source_ids = session.exec(
+            select(UserSignal.id).where(UserSignal.is_active == True).order_by(col(UserSignal.id))  # noqa: E712
+        ).all()
+    todo = [signal_id for signal_id in source_ids if signal_id not in done]
+    shards = [todo[i:i + args.shard_size] for i in range(0, len(todo), args.shard_size)]
+
+    print(f"Recomputing {len(todo)}/{len(source_ids)} signals ({scorer_version}) in {len(shards)} shards, "
+          f"{workers} workers x {per_worker} LLM slots")
+    started = time.perf_counter()
+    stored = 0
+    failed = 0
+    # spawn: każdy proces tworzy własny silnik DB i klienta LLM
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {
+            executor.submit(recompute_shard, shard, scorer, args.all_pairs, args.write_batch): shard
+            for shard in shards
+        }
+        for i, future in enumerate(as_completed(futures), 1):
+            shard = futures[future]
+            try:
+                stored += future.result()
+            except Exception as e:
+                failed += 1
+                print(f"  shard {shard[0]}..{shard[-1]} failed: {e}")
+                continue
+            done.update(shard)
+            save_checkpoint(args.checkpoint, scorer_version, done)
+            elapsed = time.perf_counter() - started
+            print(f"  [{i}/{len(shards)}] {len(done)}/{len(source_ids)} signals, {stored} pairs, {elapsed:.1f}s")
+
+    print(f"Done in {time.perf_counter() - started:.1f}s: {stored} pairs stored, {failed} shards failed")
+    if failed:
+        print("Re-run the same command to resume the failed shards.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
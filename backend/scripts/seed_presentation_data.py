@@ -2,10 +2,12 @@
 """Seed realistic presentation data for the demo database."""
 from __future__ import annotations
 
+import asyncio
 import sys
 from pathlib import Path
 from typing import Any
 
+from openai import OpenAIError
 from sqlmodel import Session, select
 
 # Ensure project root is on PYTHONPATH
@@ -16,6 +18,9 @@ from models.signal import SignalCategory, UserSignal
 from models.user import User
 from services.auth import get_password_hash
 from services.db import create_db_and_tables, engine
+from services.signal_features import normalize_details, sync_signal_features
+from services.embeddings import ensure_signal_embeddings, store_signal_embeddings
+from services.llm_gateway import Priority, close_client
 
 
 def seed_users(session: Session) -> dict[str, User]:
@@ -387,7 +392,7 @@ def seed_signals(session: Session, users: dict[str, User]) -> list[UserSignal]:
         signal = UserSignal(
             user_id=user.id,
             signal_category_id=signal_data["signal_category_id"],
-            details=signal_data["details"],
+            details=normalize_details(signal_data["details"]),
             is_active=True,
         )
         session.add(signal)
@@ -405,6 +410,27 @@ def seed_signals(session: Session, users: dict[str, User]) -> list[UserSignal]:
     return created_signals
 
 
+def seed_embeddings(session: Session) -> int:
+    """Compute missing signal embeddings in one batch (re-seeding is served from the embedding cache)."""
+    signals = list(session.exec(select(UserSignal).where(UserSignal.is_active == True)).all())  # noqa: E712
+    if not signals:
+        return 0
+
+    async def _compute() -> dict[int, list[float]]:
+        try:
+            return await ensure_signal_embeddings(session, signals, priority=Priority.BACKGROUND)
+        finally:
+            await close_client()
+
+    try:
+        embeddings = asyncio.run(_compute())
+        store_signal_embeddings(embeddings)
+    except (OpenAIError, ValueError) as e:
+        print(f"  ⚠️  Embeddings skipped ({e}) - they will be computed on first match")
+        return 0
+    return len(embeddings)
+
+
 def seed_messages(session: Session, users: dict[str, User]) -> list[Message]:
     """Insert curated conversations between demo users."""
     interactions = [
@@ -509,6 +535,11 @@ def main() -> None:
         print("📡 Seeding demo signals...")
         signals = seed_signals(session, users)
         print(f"Total signals created: {len(signals)}\n")
+        sync_signal_features(session)
+
+        print("🧭 Computing signal embeddings...")
+        embedded = seed_embeddings(session)
+        print(f"Total signals embedded: {embedded}\n")
 
         print("💬 Seeding conversation samples...")
         messages = seed_messages(session, users)
@@ -15,6 +15,7 @@ from models.signal import SignalCategory, UserSignal
 from models.user import User
 from services.auth import get_password_hash
 from services.db import create_db_and_tables, engine
+from services.signal_features import normalize_details, sync_signal_features
 
 
 def seed_test_users(session: Session) -> dict[str, User]:
@@ -551,7 +552,7 @@ def seed_test_signals(session: Session, users: dict[str, User]) -> list[UserSign
         new_signal = UserSignal(
             user_id=user.id,
             signal_category_id=signal_data["signal_category_id"],
-            details=signal_data["details"],
+            details=normalize_details(signal_data["details"]),
             is_active=True,
         )
         session.add(new_signal)
@@ -586,6 +587,7 @@ def main():
         print("📡 Seeding test signals...")
         signals = seed_test_signals(session, users)
         print(f"  Total new signals: {len(signals)}\n")
+        sync_signal_features(session)
     
     print("✨ Database seeding completed!\n")
     print_test_instructions()
@@ -9,6 +9,10 @@ from models.signal import (  # noqa: F401 - needed for SQLModel.metadata
 )
 from models.user import User  # noqa: F401 - needed for SQLModel.metadata
 from models.message import Message  # noqa: F401 - needed for SQLModel.metadata
+from models.match import SignalMatch  # noqa: F401 - needed for SQLModel.metadata
+from models.llm_call import LLMCall  # noqa: F401 - needed for SQLModel.metadata
+from models.signal_features import SignalFeatures  # noqa: F401 - needed for SQLModel.metadata
+from models.signal_embedding import SignalEmbedding  # noqa: F401 - needed for SQLModel.metadata
 
 # Database URL from env via config
 DATABASE_URL = settings.DATABASE_URL
@@ -57,11 +61,21 @@ def get_session() -> Generator[Session, None, None]:
         yield session
 
 
+def release_connection(session: Session) -> None:
+    """
+    End the session's transaction and return its connection to the pool
+    before a long await (e.g. LLM calls). Loaded objects stay readable
+    (detached); the next query checks out a fresh connection.
+    """
+    session.close()
+
+
 __all__ = [
     "engine",
     "DATABASE_URL",
     "create_db_and_tables",
     "get_engine",
     "get_session",
+    "release_connection",
     "seed_signal_categories",
 ]
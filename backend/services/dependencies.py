@@ -1,13 +1,15 @@
 from typing import Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlmodel import Session, select
 
+from config import settings
 from models.user import User
 from schemas.user import TokenData
 from services.auth import decode_access_token
 from services.db import get_session
+from services.llm_ledger import llm_endpoint
 
 # Bearer token scheme
 security = HTTPBearer()
@@ -76,4 +78,31 @@ async def get_current_active_user(
     return current_user
 
 
-__all__ = ["get_current_user", "get_current_active_user", "security"]
+async def get_metrics_admin(
+    current_user: User = Depends(get_current_user),
+) -> User:
+    """
+    Dependency dla endpointów wewnętrznych (/metrics) - tylko użytkownicy
+    z e-mailem na liście METRICS_ADMIN_EMAILS.
+    """
+    admins = {email.strip().lower() for email in settings.METRICS_ADMIN_EMAILS.split(",") if email.strip()}
+    if not current_user.email or current_user.email.lower() not in admins:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return current_user
+
+
+async def tag_llm_endpoint(request: Request) -> None:
+    """
+    Dependency oznaczający zapytania LLM z tego żądania ścieżką endpointu
+    (szablon, np. /api/v1/signals/match/{signal_id}) w ledgerze llm_call.
+    
+    Musi być async - działa w tym samym kontekście co endpoint i jego zadania.
+    """
+    route = request.scope.get("route")
+    llm_endpoint.set(getattr(route, "path", None) or request.url.path)
+
+
+__all__ = ["get_current_user", "get_current_active_user", "get_metrics_admin", "tag_llm_endpoint", "security"]
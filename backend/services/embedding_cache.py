@@ -0,0 +1,141 @@
+"""
+Dyskowy cache embeddingów adresowany treścią.
+
+Kluczem jest SHA-256 z nazwy modelu i kanonicznej postaci tekstu, więc ten
+sam tekst (ponowny seed, przeliczenie, zapis niezmienionego profilu) nie
+wymaga zapytania do API - także po restarcie i w innym procesie.
+
+Plik `embeddings.bin` jest tylko dopisywany: każdy rekord to nagłówek
+(klucz, wymiar) i wektor float32. Indeks klucz -> offset jest trzymany
+w pamięci i doczytywany od ostatniej znanej pozycji, gdy plik urośnie
+(dopisy z innych procesów). Zapisy między procesami serializuje flock.
+Nowe rekordy trafiają za ostatni kompletny rekord (nie na koniec pliku),
+więc resztka po przerwanym zapisie jest nadpisywana i nie przesuwa
+kolejnych rekordów.
+"""
+import hashlib
+import os
+import re
+import struct
+import threading
+import unicodedata
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import numpy as np
+
+from config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows - blokada tylko w obrębie procesu
+    fcntl = None
+
+_HEADER = struct.Struct("<32sI")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def canonical_embedding_text(text: str) -> str:
+    """Postać tekstu wysyłana do modelu i haszowana: NFC, pojedyncze spacje, bez skrajnych białych znaków."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def embedding_cache_key(text: str, model: str) -> bytes:
+    """Klucz cache dla tekstu w postaci kanonicznej."""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Append-only plik embeddingów z indeksem w pamięci."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._data_path = os.path.join(path, "embeddings.bin")
+        self._lock = threading.Lock()
+        self._offsets: dict[bytes, tuple[int, int]] = {}  # klucz -> (offset wektora, wymiar)
+        self._scanned = 0
+
+    def _refresh(self) -> None:
+        """Dopisuje do indeksu rekordy dodane od ostatniego odczytu (przez ten lub inny proces)."""
+        if not os.path.exists(self._data_path):
+            return
+        size = os.path.getsize(self._data_path)
+        if size == self._scanned:
+            return
+        with open(self._data_path, "rb") as f:
+            f.seek(self._scanned)
+            offset = self._scanned
+            while offset + _HEADER.size <= size:
+                key, dim = _HEADER.unpack(f.read(_HEADER.size))
+                end = offset + _HEADER.size + dim * 4
+                if end > size:
+                    # Rekord w trakcie zapisu - doczytamy go następnym razem
+                    break
+                self._offsets[key] = (offset + _HEADER.size, dim)
+                f.seek(end)
+                offset = end
+        self._scanned = offset
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, open(os.path.join(self.path, "lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._offsets)
+
+    def get_many(self, keys: list[bytes]) -> dict[bytes, list[float]]:
+        """Embeddingi obecne w cache (brakujących kluczy nie ma w wyniku)."""
+        with self._lock:
+            self._refresh()
+            found = [(key, self._offsets[key]) for key in keys if key in self._offsets]
+            if not found:
+                return {}
+            result = {}
+            with open(self._data_path, "rb") as f:
+                for key, (offset, dim) in found:
+                    f.seek(offset)
+                    result[key] = np.frombuffer(f.read(dim * 4), dtype="<f4").tolist()
+            return result
+
+    def put_many(self, embeddings: dict[bytes, list[float]]) -> None:
+        """Dopisuje embeddingi jednym zapisem; klucze już obecne są pomijane."""
+        with self._write_lock():
+            self._refresh()
+            chunks = []
+            for key, embedding in embeddings.items():
+                if key in self._offsets:
+                    continue
+                vector = np.asarray(embedding, dtype="<f4")
+                chunks.append(_HEADER.pack(key, vector.shape[0]) + vector.tobytes())
+            if not chunks:
+                return
+            # Pod blokadą nikt inny nie pisze - niepełny rekord na końcu to resztka po awarii
+            with open(self._data_path, "r+b" if os.path.exists(self._data_path) else "wb") as f:
+                f.seek(self._scanned)
+                f.write(b"".join(chunks))
+                f.truncate()
+            self._refresh()
+
+
+# Cache współdzielony w procesie; None = wyłączony (EMBEDDING_CACHE_PATH puste)
+embedding_cache: Optional[EmbeddingCache] = (
+    EmbeddingCache(settings.EMBEDDING_CACHE_PATH) if settings.EMBEDDING_CACHE_PATH else None
+)
+
+
+__all__ = [
+    "canonical_embedding_text",
+    "embedding_cache_key",
+    "EmbeddingCache",
+    "embedding_cache",
+]
@@ -0,0 +1,225 @@
+"""
+Embeddingi sygnałów i prefiltr wektorowy (cosine top-k) przed scoringiem LLM.
+
+Źródłem prawdy jest tabela signal_embedding; prefiltr szuka w magazynie memmap
+(`services.vector_store`), do którego embeddingi trafiają przy pierwszym użyciu -
+z bazy czytane są tylko wektory sygnałów jeszcze w nim nieobecnych.
+Brakujące embeddingi są liczone jednym zapytaniem wsadowym, a teksty widziane
+już wcześniej biorą je z dyskowego cache (`services.embedding_cache`).
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+import numpy as np
+from openai import OpenAIError
+from sqlmodel import Session, col, select
+
+from config import settings
+from models.signal import UserSignal
+from models.signal_embedding import SignalEmbedding
+from services.llm_gateway import Priority
+from services.openai import get_embeddings
+from services.vector_store import embedding_store
+
+
+def signal_embedding_text(details: Any) -> str:
+    """Spłaszcza `details` do tekstu dla modelu embeddingów."""
+    if details is None:
+        return ""
+    if isinstance(details, dict):
+        parts = []
+        for key, value in details.items():
+            if isinstance(value, (list, tuple)):
+                value = ", ".join(str(v) for v in value)
+            parts.append(f"{key}: {value}")
+        return "\n".join(parts)
+    if isinstance(details, (list, tuple)):
+        return ", ".join(str(v) for v in details)
+    return str(details)
+
+
+async def compute_signal_embeddings(
+    details_list: list[Any],
+    priority: Priority = Priority.INTERACTIVE,
+) -> list[Optional[list[float]]]:
+    """Liczy embeddingi dla listy `details` (jedno zapytanie wsadowe); None gdy nie ma czego embedować."""
+    texts = [signal_embedding_text(details) for details in details_list]
+    non_empty = [i for i, text in enumerate(texts) if text.strip()]
+    result: list[Optional[list[float]]] = [None] * len(texts)
+    if non_empty:
+        embeddings = await get_embeddings([texts[i] for i in non_empty], priority=priority)
+        for i, embedding in zip(non_empty, embeddings):
+            result[i] = embedding
+    return result
+
+
+def load_signal_embeddings(session: Session, signal_ids: Iterable[int]) -> dict[int, list[float]]:
+    """Zapisane embeddingi sygnałów (ID -> wektor); sygnałów bez embeddingu nie ma w wyniku."""
+    signal_ids = list(signal_ids)
+    if not signal_ids:
+        return {}
+    with Session(session.get_bind()) as read_session:
+        rows = read_session.exec(
+            select(SignalEmbedding.signal_id, SignalEmbedding.embedding)
+            .where(col(SignalEmbedding.signal_id).in_(signal_ids))
+        ).all()
+    return {signal_id: embedding for signal_id, embedding in rows}
+
+
+def _upsert_statement(session: Session, rows: list[dict]) -> Any:
+    """INSERT ... ON CONFLICT (signal_id) DO UPDATE - równoległe liczenie tego samego sygnału nie koliduje."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert not supported for dialect: {dialect}")
+    statement = insert(SignalEmbedding).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=["signal_id"],
+        set_={
+            "model": statement.excluded.model,
+            "embedding": statement.excluded.embedding,
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+
+
+async def ensure_signal_embeddings(
+    session: Session,
+    signals: list[UserSignal],
+    priority: Priority = Priority.INTERACTIVE,
+) -> dict[int, list[float]]:
+    """
+    Embeddingi sygnałów - zapisane z tabeli signal_embedding, brakujące
+    (np. sygnały sprzed wprowadzenia prefiltra) liczone i zapisywane.
+
+    Najpierw liczy wszystkie brakujące embeddingi (jednym zapytaniem wsadowym,
+    z cache dla znanych tekstów), potem zapisuje je w krótkiej sesji -
+    połączenie nie jest trzymane w trakcie zapytań do API.
+
+    Returns:
+        {signal_id: wektor} - bez sygnałów, dla których nie ma czego embedować
+    """
+    # Zapytania do bazy w wątku - funkcja działa na pętli zdarzeń obok innych żądań
+    embeddings = await asyncio.to_thread(
+        load_signal_embeddings, session, [sig.id for sig in signals if sig.id is not None]
+    )
+    pending = [sig for sig in signals if sig.id is not None and sig.id not in embeddings]
+    if not pending:
+        return embeddings
+    computed: dict[int, list[float]] = {}
+    vectors = await compute_signal_embeddings([sig.details for sig in pending], priority=priority)
+    for sig, embedding in zip(pending, vectors):
+        if embedding is not None:
+            computed[sig.id] = embedding
+    if not computed:
+        return embeddings
+
+    await asyncio.to_thread(_save_signal_embeddings, session, computed)
+    embeddings.update(computed)
+    return embeddings
+
+
+def _save_signal_embeddings(session: Session, embeddings: dict[int, list[float]]) -> None:
+    now = datetime.utcnow()
+    rows = [
+        {
+            "signal_id": signal_id,
+            "model": settings.OPENAI_EMBEDDING_MODEL,
+            "embedding": embedding,
+            "updated_at": now,
+        }
+        for signal_id, embedding in embeddings.items()
+    ]
+    with Session(session.get_bind()) as write_session:
+        write_session.exec(_upsert_statement(write_session, rows))
+        write_session.commit()
+
+
+def store_signal_embeddings(embeddings: dict[int, list[float]]) -> None:
+    """Dopisuje do magazynu memmap embeddingi sygnałów, których jeszcze tam nie ma."""
+    if embedding_store is None:
+        return
+    for signal_id, embedding in embeddings.items():
+        if signal_id not in embedding_store:
+            embedding_store.append(signal_id, embedding)
+
+
+def cosine_top_k(query: list[float], vectors: list[list[float]], k: int) -> list[int]:
+    """
+    Zwraca indeksy k wektorów najbardziej podobnych (cosine) do `query`,
+    posortowane malejąco po podobieństwie.
+    """
+    if not vectors or k <= 0:
+        return []
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    q = np.asarray(query, dtype=np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(q)
+    norms[norms == 0] = 1.0
+    scores = (matrix @ q) / norms
+
+    k = min(k, len(vectors))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])].tolist()
+
+
+async def prefilter_by_embedding(
+    session: Session,
+    source_signal: UserSignal,
+    target_signals: list[UserSignal],
+    top_n: int,
+    priority: Priority = Priority.INTERACTIVE,
+) -> list[UserSignal]:
+    """
+    Zawęża pulę kandydatów do `top_n` najbliższych sygnałów w przestrzeni embeddingów.
+
+    Gdy pula jest mniejsza niż `top_n` (lub top_n <= 0), zwraca ją bez zmian.
+    """
+    if top_n <= 0 or len(target_signals) <= top_n:
+        return target_signals
+
+    signals = [source_signal, *target_signals]
+    try:
+        if embedding_store is not None:
+            # Wektory z magazynu - z bazy (lub API) tylko dla sygnałów jeszcze w nim nieobecnych
+            pending = [sig for sig in signals if sig.id not in embedding_store]
+            try:
+                embeddings = await ensure_signal_embeddings(session, pending, priority=priority)
+                await asyncio.to_thread(store_signal_embeddings, embeddings)
+            except ValueError as e:
+                # Np. zmiana modelu embeddingów (inny wymiar) - do czasu przebudowy magazynu liczymy w pamięci
+                print(f"[Embeddings] Vector store unavailable: {e}")
+            else:
+                query = embedding_store.get(source_signal.id)
+                if query is None:
+                    return target_signals
+                # Sygnały bez details nie mają embeddingu - nie mają też czego dopasować
+                targets = {sig.id: sig for sig in target_signals}
+                top_ids = embedding_store.top_k(query, targets, top_n)
+                return [targets[signal_id] for signal_id in top_ids]
+        embeddings = await ensure_signal_embeddings(session, signals, priority=priority)
+    except OpenAIError:
+        # Bez embeddingów nie da się zawęzić puli - scoring dostaje całość
+        return target_signals
+    if source_signal.id not in embeddings:
+        return target_signals
+
+    with_embedding = [sig for sig in target_signals if sig.id in embeddings]
+    top = cosine_top_k(embeddings[source_signal.id], [embeddings[sig.id] for sig in with_embedding], top_n)
+    return [with_embedding[i] for i in top]
+
+
+__all__ = [
+    "signal_embedding_text",
+    "compute_signal_embeddings",
+    "load_signal_embeddings",
+    "ensure_signal_embeddings",
+    "store_signal_embeddings",
+    "cosine_top_k",
+    "prefilter_by_embedding",
+]
@@ -0,0 +1,355 @@
+"""
+Lokalny, deterministyczny scorer dopasowania sygnałów (bez sieci).
+
+Ocenia parę sygnałów na podstawie ustrukturyzowanych pól `details`:
+- skills vs needed_skills
+- focus_areas / categories
+- investment_stage vs stage
+- budget_min/max (ticket_size) vs funding_min/max (funding_needed)
+- hourly_rate vs funding_max
+
+`score_features` ocenia jedną parę; `FeatureMatrix` + `score_feature_matrix`
+liczą ten sam wynik dla całej puli naraz (kolumny numpy zamiast pętli po
+słownikach) - z tego korzysta kaskada i scorer heurystyczny na puli.
+"""
+import re
+from functools import lru_cache
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+# Zmiana wag/logiki wymaga podbicia wersji (unieważnia cache signal_match)
+HEURISTIC_SCORER_VERSION = "heuristic:v1"
+
+# Wagi składowych; liczone są tylko składowe, dla których obie strony mają dane
+WEIGHTS = {
+    "skills": 0.4,
+    "focus": 0.25,
+    "money": 0.15,
+    "stage": 0.1,
+    "rate": 0.1,
+}
+
+# Cechy będące zbiorami terminów i przedziałami (min, max)
+SET_FEATURES = ("skills", "needed_skills", "focus", "investment_stage", "stage")
+RANGE_FEATURES = ("budget", "funding", "hourly_rate")
+
+# Liczba godzin pracy freelancera, przy której budżet pomysłu uznajemy za w pełni wystarczający
+RATE_FULL_HOURS = 500
+
+_NUMBER_RE = re.compile(r"(\d+(?:[.,]\d+)?)([kKmM](?![a-zA-Z]))?")
+_MULTIPLIERS = {"k": 1_000, "m": 1_000_000}
+
+
+_NON_TERM_RE = re.compile(r"[^0-9a-ząćęłńóśźż]")
+
+
+@lru_cache(maxsize=4096)
+def _normalize_str(value: str) -> str:
+    return _NON_TERM_RE.sub("", value.lower())
+
+
+def normalize_term(value: Any) -> str:
+    """'Node.js' -> 'nodejs', 'UI/UX' -> 'uiux'."""
+    return _normalize_str(str(value))
+
+
+def _term_set(*values: Any) -> set[str]:
+    terms: set[str] = set()
+    for value in values:
+        if value is None:
+            continue
+        items = value if isinstance(value, (list, tuple, set)) else [value]
+        for item in items:
+            term = normalize_term(item)
+            if term:
+                terms.add(term)
+    return terms
+
+
+def _parse_range(value: Any) -> Optional[tuple[float, float]]:
+    """Parsuje 100, '100-150 PLN', '25k-100k EUR', '1.2M EUR' do (min, max)."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return (float(value), float(value))
+    return _parse_range_str(str(value))
+
+
+@lru_cache(maxsize=4096)
+def _parse_range_str(value: str) -> Optional[tuple[float, float]]:
+    numbers = [
+        float(num.replace(",", ".")) * _MULTIPLIERS.get(suffix.lower(), 1)
+        for num, suffix in _NUMBER_RE.findall(value)
+    ]
+    if not numbers:
+        return None
+    return (min(numbers), max(numbers))
+
+
+def _pair_range(details: dict, low_key: str, high_key: str, text_key: str) -> Optional[tuple[float, float]]:
+    low = _parse_range(details.get(low_key))
+    high = _parse_range(details.get(high_key))
+    if low or high:
+        lo = (low or high)[0]
+        hi = (high or low)[1]
+        return (min(lo, hi), max(lo, hi))
+    return _parse_range(details.get(text_key))
+
+
+def extract_features(details: Any) -> dict:
+    """Wyciąga z `details` cechy używane przez scorer."""
+    if not isinstance(details, dict):
+        return {}
+    return {
+        "skills": _term_set(details.get("skills")),
+        "needed_skills": _term_set(details.get("needed_skills")),
+        "focus": _term_set(details.get("focus_areas"), details.get("categories")),
+        "investment_stage": _term_set(details.get("investment_stage")),
+        "stage": _term_set(details.get("stage")),
+        "budget": _pair_range(details, "budget_min", "budget_max", "ticket_size"),
+        "funding": _pair_range(details, "funding_min", "funding_max", "funding_needed"),
+        "hourly_rate": _parse_range(details.get("hourly_rate")),
+    }
+
+
+def _coverage(offered: set[str], needed: set[str]) -> float:
+    return len(offered & needed) / len(needed)
+
+
+def _jaccard(a: set[str], b: set[str]) -> float:
+    return len(a & b) / len(a | b)
+
+
+def _range_overlap(a: tuple[float, float], b: tuple[float, float]) -> float:
+    """Część węższego przedziału pokryta przez drugi (1.0 dla pokrywających się punktów)."""
+    overlap = min(a[1], b[1]) - max(a[0], b[0])
+    if overlap < 0:
+        return 0.0
+    width = min(a[1] - a[0], b[1] - b[0])
+    return 1.0 if width == 0 else min(1.0, overlap / width)
+
+
+def _stage_match(wanted: set[str], stage: set[str]) -> float:
+    # Dopasowanie podciągów: 'seed' pasuje do 'lateseed'
+    return 1.0 if any(w in s or s in w for w in wanted for s in stage) else 0.0
+
+
+def _one_way(a: dict, b: dict, components: dict[str, float]) -> None:
+    """Składowe, w których `a` oferuje coś, czego potrzebuje `b`."""
+    if a.get("skills") and b.get("needed_skills"):
+        components["skills"] = max(components.get("skills", 0.0), _coverage(a["skills"], b["needed_skills"]))
+    if a.get("investment_stage") and b.get("stage"):
+        components["stage"] = _stage_match(a["investment_stage"], b["stage"])
+    if a.get("budget") and b.get("funding"):
+        components["money"] = _range_overlap(a["budget"], b["funding"])
+    if a.get("hourly_rate") and b.get("funding"):
+        rate = a["hourly_rate"][0]
+        hours = b["funding"][1] / rate if rate > 0 else RATE_FULL_HOURS
+        components["rate"] = min(1.0, hours / RATE_FULL_HOURS)
+
+
+def score_features(source: dict, target: dict) -> float:
+    """Zwraca wynik dopasowania 0-100 dla dwóch zestawów cech."""
+    components: dict[str, float] = {}
+    _one_way(source, target, components)
+    _one_way(target, source, components)
+
+    if "skills" not in components and source.get("skills") and target.get("skills"):
+        components["skills"] = _jaccard(source["skills"], target["skills"])
+    if source.get("focus") and target.get("focus"):
+        components["focus"] = _jaccard(source["focus"], target["focus"])
+
+    if not components:
+        return 0.0
+    # Suma w stałej kolejności WEIGHTS - ten sam wynik co `score_feature_matrix`
+    total_weight = sum(WEIGHTS[name] for name in WEIGHTS if name in components)
+    score = sum(WEIGHTS[name] * components[name] for name in WEIGHTS if name in components) / total_weight
+    return round(score * 100, 1)
+
+
+class FeatureMatrix:
+    """
+    Cechy wielu sygnałów w kolumnach: zbiory terminów jako CSR (indptr, ID
+    terminów ze wspólnego słownika), przedziały jako tablice min/max z NaN
+    dla braku danych.
+    """
+
+    def __init__(self, features: list[dict]) -> None:
+        self.size = len(features)
+        self._vocabulary: dict[str, int] = {}
+        self._terms = {name: self._term_column(features, name) for name in SET_FEATURES}
+        self._ranges = {name: self._range_column(features, name) for name in RANGE_FEATURES}
+
+    def _term_column(self, features: list[dict], name: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        indptr = np.zeros(self.size + 1, dtype=np.int64)
+        indices: list[int] = []
+        for i, row in enumerate(features):
+            for term in row.get(name) or ():
+                indices.append(self._vocabulary.setdefault(term, len(self._vocabulary)))
+            indptr[i + 1] = len(indices)
+        return indptr, np.asarray(indices, dtype=np.int64), np.diff(indptr)
+
+    def _range_column(self, features: list[dict], name: str) -> tuple[np.ndarray, np.ndarray]:
+        low = np.full(self.size, np.nan)
+        high = np.full(self.size, np.nan)
+        for i, row in enumerate(features):
+            value = row.get(name)
+            if value:
+                low[i], high[i] = value
+        return low, high
+
+    def sizes(self, name: str) -> np.ndarray:
+        """Liczność zbioru `name` w każdym wierszu."""
+        return self._terms[name][2]
+
+    def range(self, name: str) -> tuple[np.ndarray, np.ndarray]:
+        """(min, max) przedziału `name` w każdym wierszu; NaN = brak danych."""
+        return self._ranges[name]
+
+    def _count_where(self, name: str, term_ids: Iterable[int]) -> np.ndarray:
+        indptr, indices, _ = self._terms[name]
+        hits = np.isin(indices, np.fromiter(term_ids, dtype=np.int64))
+        cumulative = np.concatenate(([0], np.cumsum(hits)))
+        return cumulative[indptr[1:]] - cumulative[indptr[:-1]]
+
+    def intersection(self, name: str, terms: set[str]) -> np.ndarray:
+        """|zbiór `name` ∩ `terms`| w każdym wierszu."""
+        return self._count_where(name, (self._vocabulary[t] for t in terms if t in self._vocabulary))
+
+    def any_substring(self, name: str, terms: set[str]) -> np.ndarray:
+        """Czy któryś termin zbioru `name` jest podciągiem terminu z `terms` lub odwrotnie (jak `_stage_match`)."""
+        matching = (
+            term_id for term, term_id in self._vocabulary.items()
+            if any(w in term or term in w for w in terms)
+        )
+        return self._count_where(name, matching) > 0
+
+
+def _range_overlap_many(
+    a: tuple[float, float], low: np.ndarray, high: np.ndarray,
+) -> np.ndarray:
+    """`_range_overlap` przedziału `a` z każdym przedziałem (low, high)."""
+    overlap = np.minimum(a[1], high) - np.maximum(a[0], low)
+    width = np.minimum(a[1] - a[0], high - low)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covered = np.where(width == 0, 1.0, np.minimum(1.0, overlap / width))
+    return np.where(overlap < 0, 0.0, covered)
+
+
+def complementary_mask(source: dict, matrix: FeatureMatrix) -> np.ndarray:
+    """
+    Wiersze, które uzupełniają źródło bez wspólnych terminów - niezerowa
+    składowa etapu, kwoty (budżet vs finansowanie) albo stawki (finansowanie
+    starcza choć na godzinę pracy), w którąkolwiek stronę.
+    """
+    mask = np.zeros(matrix.size, dtype=bool)
+    if source.get("investment_stage"):
+        mask |= matrix.any_substring("stage", source["investment_stage"])
+    if source.get("stage"):
+        mask |= matrix.any_substring("investment_stage", source["stage"])
+    funding_low, funding_high = matrix.range("funding")
+    with np.errstate(invalid="ignore"):
+        if source.get("budget"):
+            mask |= ~np.isnan(funding_low) & (_range_overlap_many(source["budget"], funding_low, funding_high) > 0)
+        if source.get("hourly_rate"):
+            mask |= funding_high >= source["hourly_rate"][0]
+        if source.get("funding"):
+            budget_low, budget_high = matrix.range("budget")
+            mask |= ~np.isnan(budget_low) & (_range_overlap_many(source["funding"], budget_low, budget_high) > 0)
+            rate_low, _ = matrix.range("hourly_rate")
+            mask |= rate_low <= source["funding"][1]
+    return mask
+
+
+def score_feature_matrix(source: dict, matrix: FeatureMatrix) -> np.ndarray:
+    """`score_features(source, target)` dla każdego wiersza `matrix` naraz (wyniki 0-100)."""
+    values = {name: np.zeros(matrix.size) for name in WEIGHTS}
+    present = {name: np.zeros(matrix.size, dtype=bool) for name in WEIGHTS}
+
+    def put(name: str, mask: np.ndarray, value: Any) -> None:
+        values[name] = np.where(mask, value, values[name])
+        present[name] |= mask
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Źródło oferuje to, czego potrzebuje cel (`_one_way(source, target)`)
+        if source.get("skills"):
+            needed = matrix.sizes("needed_skills")
+            put("skills", needed > 0, matrix.intersection("needed_skills", source["skills"]) / needed)
+        if source.get("investment_stage"):
+            put("stage", matrix.sizes("stage") > 0,
+                matrix.any_substring("stage", source["investment_stage"]).astype(float))
+        funding_low, funding_high = matrix.range("funding")
+        if source.get("budget"):
+            put("money", ~np.isnan(funding_low), _range_overlap_many(source["budget"], funding_low, funding_high))
+        if source.get("hourly_rate"):
+            rate = source["hourly_rate"][0]
+            hours = funding_high / rate if rate > 0 else np.full(matrix.size, float(RATE_FULL_HOURS))
+            put("rate", ~np.isnan(funding_low), np.minimum(1.0, hours / RATE_FULL_HOURS))
+
+        # Cel oferuje to, czego potrzebuje źródło (`_one_way(target, source)`)
+        if source.get("needed_skills"):
+            coverage = matrix.intersection("skills", source["needed_skills"]) / len(source["needed_skills"])
+            put("skills", matrix.sizes("skills") > 0, np.maximum(values["skills"], coverage))
+        if source.get("stage"):
+            put("stage", matrix.sizes("investment_stage") > 0,
+                matrix.any_substring("investment_stage", source["stage"]).astype(float))
+        if source.get("funding"):
+            budget_low, budget_high = matrix.range("budget")
+            put("money", ~np.isnan(budget_low), _range_overlap_many(source["funding"], budget_low, budget_high))
+            rate_low, _ = matrix.range("hourly_rate")
+            hours = np.where(rate_low > 0, source["funding"][1] / rate_low, float(RATE_FULL_HOURS))
+            put("rate", ~np.isnan(rate_low), np.minimum(1.0, hours / RATE_FULL_HOURS))
+
+        if source.get("skills"):
+            sizes = matrix.sizes("skills")
+            common = matrix.intersection("skills", source["skills"])
+            put("skills", ~present["skills"] & (sizes > 0), common / (len(source["skills"]) + sizes - common))
+        if source.get("focus"):
+            sizes = matrix.sizes("focus")
+            common = matrix.intersection("focus", source["focus"])
+            put("focus", sizes > 0, common / (len(source["focus"]) + sizes - common))
+
+        total_weight = np.zeros(matrix.size)
+        weighted = np.zeros(matrix.size)
+        for name, weight in WEIGHTS.items():
+            total_weight += np.where(present[name], weight, 0.0)
+            weighted += np.where(present[name], weight * values[name], 0.0)
+        scaled = np.where(total_weight > 0, weighted / total_weight, 0.0) * 100
+    # np.round (przez x * 10) różni się od round() tylko tuż przy połówce - tam liczy round()
+    rounded = np.round(scaled, 1)
+    tenths = scaled * 10
+    for i in np.flatnonzero(np.abs(tenths - np.floor(tenths) - 0.5) < 1e-6):
+        rounded[i] = round(float(scaled[i]), 1)
+    return rounded
+
+
+def calculate_heuristic_matches(
+    source_signal_id: int,
+    source_details: Any,
+    target_signals: list[dict],  # [{"id": int, "details": Any}, ...]
+) -> list[dict]:
+    """
+    Heurystyczny odpowiednik `calculate_bulk_signal_matches` - ten sam kontrakt.
+
+    Returns:
+        list[dict]: [{"signal_id": int, "accurate": float, "details": None}, ...]
+    """
+    matrix = FeatureMatrix([extract_features(sig["details"]) for sig in target_signals])
+    scores = score_feature_matrix(extract_features(source_details), matrix)
+    return [
+        {"signal_id": sig["id"], "accurate": float(score), "details": None}
+        for sig, score in zip(target_signals, scores)
+    ]
+
+
+__all__ = [
+    "HEURISTIC_SCORER_VERSION",
+    "normalize_term",
+    "extract_features",
+    "score_features",
+    "FeatureMatrix",
+    "score_feature_matrix",
+    "complementary_mask",
+    "calculate_heuristic_matches",
+]
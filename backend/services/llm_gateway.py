@@ -0,0 +1,133 @@
+"""
+Asynchroniczna bramka do OpenAI - jeden klient (AsyncOpenAI) ze wspólną pulą
+połączeń keep-alive i globalnym limitem równoległych zapytań z priorytetami.
+
+Zapytania interaktywne (np. matchowanie z radaru) są obsługiwane przed
+zadaniami w tle (przeliczanie dopasowań), a zadania w tle nigdy nie zajmują
+wszystkich slotów.
+"""
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from config import settings
+
+
+class Priority(IntEnum):
+    """Klasy priorytetu - niższa wartość = obsługiwane wcześniej."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class PrioritySemaphore:
+    """Semafor, który przy zwolnieniu slotu budzi oczekującego o najwyższym priorytecie."""
+
+    def __init__(self, value: int) -> None:
+        self._value = value
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE) -> None:
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Slot mógł zostać przekazany tuż przed anulowaniem - oddaj go dalej
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._value += 1
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.INTERACTIVE) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+_client: Optional[AsyncOpenAI] = None
+_semaphore = PrioritySemaphore(settings.LLM_MAX_CONCURRENCY)
+# Zadania w tle mogą zająć co najwyżej część slotów - reszta czeka na ruch interaktywny
+_background_semaphore = asyncio.Semaphore(
+    max(1, min(settings.LLM_BACKGROUND_CONCURRENCY, settings.LLM_MAX_CONCURRENCY - 1))
+)
+
+
+def get_client() -> AsyncOpenAI:
+    """Zwraca współdzielonego klienta AsyncOpenAI (tworzony przy pierwszym użyciu)."""
+    global _client
+    if _client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_SECONDS,
+            ),
+            timeout=httpx.Timeout(settings.LLM_REQUEST_TIMEOUT_SECONDS, connect=5.0),
+        )
+        _client = AsyncOpenAI(
+            api_key=settings.OPENAI_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            http_client=http_client,
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Zamyka pulę połączeń (wywoływane przy wyłączaniu aplikacji)."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+@asynccontextmanager
+async def _llm_slot(priority: Priority) -> AsyncIterator[None]:
+    if priority == Priority.BACKGROUND:
+        async with _background_semaphore, _semaphore.slot(priority):
+            yield
+    else:
+        async with _semaphore.slot(priority):
+            yield
+
+
+async def chat_completion(priority: Priority = Priority.INTERACTIVE, **kwargs: Any) -> Any:
+    """`chat.completions.create` w ramach globalnego limitu równoległości."""
+    async with _llm_slot(priority):
+        return await get_client().chat.completions.create(**kwargs)
+
+
+async def create_embeddings(priority: Priority = Priority.INTERACTIVE, **kwargs: Any) -> Any:
+    """`embeddings.create` w ramach globalnego limitu równoległości."""
+    async with _llm_slot(priority):
+        return await get_client().embeddings.create(**kwargs)
+
+
+__all__ = [
+    "Priority",
+    "PrioritySemaphore",
+    "get_client",
+    "close_client",
+    "chat_completion",
+    "create_embeddings",
+]
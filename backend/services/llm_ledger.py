@@ -0,0 +1,240 @@
+"""
+Ledger zapytań do OpenAI (tabela llm_call) i jego podsumowanie.
+
+Każde zapytanie (scoring paczki kandydatów, embedding) jest rejestrowane
+z endpointem, sygnałem źródłowym, liczbą kandydatów, tokenami z
+`response.usage`, czasem i wynikiem parsowania. Rekordy są buforowane
+w pamięci i zapisywane wsadowo (LLM_LEDGER_FLUSH_SIZE rekordów albo
+LLM_LEDGER_FLUSH_SECONDS od najstarszego niezapisanego), a wiersze starsze
+niż LLM_LEDGER_RETENTION_DAYS są usuwane.
+
+Endpoint ustawia `llm_endpoint` (ContextVar) - dziedziczą go zadania
+asyncio tworzone w trakcie żądania, więc nie trzeba go przekazywać w dół.
+"""
+import asyncio
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, col, delete, select
+
+from config import settings
+from models.llm_call import LLMCall
+from services.db import engine
+
+# Skąd pochodzi zapytanie: ścieżka endpointu albo nazwa zadania ("materialize", "recompute")
+llm_endpoint: ContextVar[str] = ContextVar("llm_endpoint", default="unknown")
+
+# Cennik USD za 1M tokenów (prompt, prompt z cache, completion)
+MODEL_PRICES_USD_PER_1M = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "text-embedding-3-small": (0.02, 0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.13, 0.0),
+}
+
+_PRUNE_INTERVAL_SECONDS = 3600
+
+_buffer: list[dict] = []
+_buffer_since: Optional[float] = None
+_last_prune = 0.0
+# Rekordy mogą przychodzić z wątków (np. skrypty) - bufor chroni blokada
+_lock = threading.Lock()
+
+
+def record_llm_call(
+    *,
+    operation: str,
+    model: str,
+    started: float,
+    source_signal_id: Optional[int] = None,
+    candidates: int = 0,
+    usage: Any = None,
+    finish_reason: Optional[str] = None,
+    parse_ok: bool = True,
+    missing_results: int = 0,
+    error: Optional[BaseException] = None,
+) -> None:
+    """
+    Rejestruje jedno zapytanie do OpenAI.
+
+    Args:
+        started: `time.perf_counter()` sprzed wysłania zapytania
+        usage: `response.usage` (None, gdy zapytanie się nie powiodło)
+        error: wyjątek API, jeśli zapytanie się nie powiodło
+    """
+    global _buffer_since
+    if not settings.LLM_LEDGER_ENABLED:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    entry = {
+        "created_at": datetime.utcnow(),
+        "endpoint": llm_endpoint.get()[:100],
+        "operation": operation,
+        "model": model,
+        "source_signal_id": source_signal_id,
+        "candidates": candidates,
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "cached_tokens": getattr(details, "cached_tokens", None),
+        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        "finish_reason": finish_reason,
+        "parse_ok": parse_ok,
+        "missing_results": missing_results,
+        "error": f"{type(error).__name__}: {error}"[:200] if error is not None else None,
+    }
+    with _lock:
+        _buffer.append(entry)
+        if _buffer_since is None:
+            _buffer_since = time.monotonic()
+        should_flush = (
+            len(_buffer) >= settings.LLM_LEDGER_FLUSH_SIZE
+            or time.monotonic() - _buffer_since >= settings.LLM_LEDGER_FLUSH_SECONDS
+        )
+    if should_flush:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            flush_llm_ledger()
+        else:
+            # Wywołanie z pętli zdarzeń (klient OpenAI) - zapis do bazy w wątku
+            loop.run_in_executor(None, flush_llm_ledger)
+
+
+def flush_llm_ledger() -> int:
+    """Zapisuje zbuforowane rekordy; błąd zapisu nie przerywa matchowania (rekordy przepadają)."""
+    global _buffer_since, _last_prune
+    with _lock:
+        entries = list(_buffer)
+        _buffer.clear()
+        _buffer_since = None
+        prune = (
+            settings.LLM_LEDGER_RETENTION_DAYS > 0
+            and time.monotonic() - _last_prune >= _PRUNE_INTERVAL_SECONDS
+        )
+        if prune:
+            _last_prune = time.monotonic()
+    if not entries and not prune:
+        return 0
+
+    try:
+        with Session(engine) as session:
+            session.add_all([LLMCall(**entry) for entry in entries])
+            if prune:
+                cutoff = datetime.utcnow() - timedelta(days=settings.LLM_LEDGER_RETENTION_DAYS)
+                session.exec(delete(LLMCall).where(col(LLMCall.created_at) < cutoff))
+            session.commit()
+    except SQLAlchemyError as e:
+        print(f"[LLM ledger] Failed to write {len(entries)} records: {e}")
+        return 0
+    return len(entries)
+
+
+def _cost_usd(model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> Optional[float]:
+    prices = MODEL_PRICES_USD_PER_1M.get(model)
+    if prices is None:
+        return None
+    prompt_price, cached_price, completion_price = prices
+    cost = (
+        (prompt_tokens - cached_tokens) * prompt_price
+        + cached_tokens * cached_price
+        + completion_tokens * completion_price
+    )
+    return round(cost / 1_000_000, 6)
+
+
+def _ratio(part: int, whole: int) -> Optional[float]:
+    return round(part / whole, 3) if whole else None
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Percentyl metodą najbliższej rangi (`pct` w procentach)."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize_llm_calls(session: Session, since: datetime) -> dict:
+    """
+    Podsumowanie ledgera od `since` pogrupowane po (endpoint, operacja, model):
+    liczba zapytań i kandydatów, tokeny (z udziałem tokenów z cache promptów), koszt, opóźnienia (avg/p95/max),
+    błędy API, odpowiedzi nieparsowalne i ucięte (finish_reason == "length")
+    oraz kandydaci bez wyniku.
+    """
+    flush_llm_ledger()
+
+    group = (LLMCall.endpoint, LLMCall.operation, LLMCall.model)
+    rows = session.exec(
+        select(
+            *group,
+            func.count(),
+            func.sum(LLMCall.candidates),
+            func.sum(LLMCall.prompt_tokens),
+            func.sum(LLMCall.completion_tokens),
+            func.sum(LLMCall.cached_tokens),
+            func.avg(LLMCall.latency_ms),
+            func.max(LLMCall.latency_ms),
+            func.sum(case((col(LLMCall.error).is_not(None), 1), else_=0)),
+            func.sum(case((LLMCall.parse_ok == False, 1), else_=0)),  # noqa: E712
+            func.sum(case((LLMCall.finish_reason == "length", 1), else_=0)),
+            func.sum(LLMCall.missing_results),
+        )
+        .where(col(LLMCall.created_at) >= since)
+        .group_by(*group)
+    ).all()
+
+    latencies: dict[tuple[str, str, str], list[float]] = {}
+    for endpoint, operation, model, latency_ms in session.exec(
+        select(*group, LLMCall.latency_ms).where(col(LLMCall.created_at) >= since)
+    ).all():
+        latencies.setdefault((endpoint, operation, model), []).append(latency_ms)
+
+    groups = []
+    for (endpoint, operation, model, calls, candidates, prompt_tokens, completion_tokens, cached_tokens,
+         avg_ms, max_ms, errors, parse_failures, truncated, missing) in rows:
+        prompt_tokens = int(prompt_tokens or 0)
+        completion_tokens = int(completion_tokens or 0)
+        cached_tokens = int(cached_tokens or 0)
+        groups.append({
+            "endpoint": endpoint,
+            "operation": operation,
+            "model": model,
+            "calls": calls,
+            "candidates": int(candidates or 0),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+            "cached_ratio": _ratio(cached_tokens, prompt_tokens),
+            "cost_usd": _cost_usd(model, prompt_tokens, cached_tokens, completion_tokens),
+            "avg_latency_ms": round(float(avg_ms or 0), 1),
+            "p95_latency_ms": percentile(latencies[(endpoint, operation, model)], 95),
+            "max_latency_ms": float(max_ms or 0),
+            "errors": int(errors or 0),
+            "parse_failures": int(parse_failures or 0),
+            "truncated": int(truncated or 0),
+            "missing_results": int(missing or 0),
+        })
+    groups.sort(key=lambda g: (-g["calls"], g["endpoint"]))
+
+    return {
+        "since": since,
+        "total_calls": sum(g["calls"] for g in groups),
+        "total_cost_usd": round(sum(g["cost_usd"] or 0 for g in groups), 6),
+        "total_cached_ratio": _ratio(
+            sum(g["cached_tokens"] for g in groups), sum(g["prompt_tokens"] for g in groups)
+        ),
+        "groups": groups,
+    }
+
+
+__all__ = [
+    "llm_endpoint",
+    "MODEL_PRICES_USD_PER_1M",
+    "record_llm_call",
+    "flush_llm_ledger",
+    "percentile",
+    "summarize_llm_calls",
+]
@@ -0,0 +1,317 @@
+"""
+Cache wyników matchowania sygnałów (tabela signal_match).
+
+Wyniki są przechowywane per nieuporządkowana para (min_id, max_id) -
+dopasowanie A->B i B->A to ten sam wiersz.
+
+Odczyty i zapisy idą przez krótkie, osobne sesje (z tego samego silnika co
+przekazana `session`) - połączenie wraca do puli od razu, a nie dopiero po
+zakończeniu żądania, które w międzyczasie czeka na LLM.
+"""
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import case
+from sqlmodel import Session, and_, col, delete, or_, select
+
+from models.match import SignalMatch
+
+
+def details_hash(details: Any) -> str:
+    """Zwraca sha256 z kanonicznej postaci JSON `details`."""
+    canonical = json.dumps(details, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def pair_key(signal_id: int, other_id: int) -> tuple[int, int]:
+    """Klucz nieuporządkowanej pary sygnałów: (min_id, max_id)."""
+    return (signal_id, other_id) if signal_id < other_id else (other_id, signal_id)
+
+
+def _pair_condition(source_signal_id: int, target_ids: list[int]) -> Optional[Any]:
+    """Warunek SQL na pary (źródło, cel) niezależnie od kierunku; None gdy brak celów."""
+    higher = [t for t in target_ids if t > source_signal_id]
+    lower = [t for t in target_ids if t < source_signal_id]
+    conditions = []
+    if higher:
+        conditions.append(and_(
+            SignalMatch.signal_low_id == source_signal_id,
+            col(SignalMatch.signal_high_id).in_(higher),
+        ))
+    if lower:
+        conditions.append(and_(
+            SignalMatch.signal_high_id == source_signal_id,
+            col(SignalMatch.signal_low_id).in_(lower),
+        ))
+    return or_(*conditions) if conditions else None
+
+
+def _other_id(source_signal_id: int) -> Any:
+    """Wyrażenie SQL: ID drugiej strony pary (celu) widziane od strony źródła."""
+    return case(
+        (SignalMatch.signal_low_id == source_signal_id, SignalMatch.signal_high_id),
+        else_=SignalMatch.signal_low_id,
+    )
+
+
+def _orient(
+    source_signal_id: int,
+    low_id: int,
+    high_id: int,
+    low_hash: str,
+    high_hash: str,
+) -> tuple[int, str, str]:
+    """(target_id, hash źródła, hash celu) dla pary widzianej od strony źródła."""
+    if low_id == source_signal_id:
+        return high_id, low_hash, high_hash
+    return low_id, high_hash, low_hash
+
+
+def _pair_rows(
+    session: Session,
+    source_signal_id: int,
+    target_ids: list[int],
+    scorer_version: str,
+) -> list[SignalMatch]:
+    """Wiersze cache dla par (źródło, cel) niezależnie od kierunku."""
+    condition = _pair_condition(source_signal_id, target_ids)
+    if condition is None:
+        return []
+
+    return list(session.exec(
+        select(SignalMatch).where(
+            SignalMatch.scorer_version == scorer_version,
+            condition,
+        )
+    ).all())
+
+
+def get_cached_scores(
+    session: Session,
+    source_signal_id: int,
+    source_hash: str,
+    target_hashes: dict[int, str],
+    scorer_version: str,
+) -> dict[int, float]:
+    """
+    Zwraca aktualne wyniki z cache dla podanych sygnałów docelowych.
+
+    Args:
+        target_hashes: {target_signal_id: hash details}
+
+    Returns:
+        {target_signal_id: accurate} - tylko pary, których hashe się zgadzają
+    """
+    if not target_hashes:
+        return {}
+
+    with Session(session.get_bind()) as read_session:
+        rows = _pair_rows(read_session, source_signal_id, list(target_hashes), scorer_version)
+
+    scores: dict[int, float] = {}
+    for row in rows:
+        target_id, own_hash, other_hash = _orient(
+            source_signal_id, row.signal_low_id, row.signal_high_id, row.low_hash, row.high_hash
+        )
+        if own_hash == source_hash and other_hash == target_hashes.get(target_id):
+            scores[target_id] = row.accurate
+    return scores
+
+
+def get_uncached_target_ids(
+    session: Session,
+    source_signal_id: int,
+    source_hash: str,
+    target_hashes: dict[int, str],
+    scorer_version: str,
+) -> set[int]:
+    """
+    ID sygnałów docelowych bez aktualnego wyniku w cache (brak wiersza
+    lub zmienione `details`). Pobiera tylko ID i hashe, bez wyników.
+    """
+    condition = _pair_condition(source_signal_id, list(target_hashes))
+    if condition is None:
+        return set(target_hashes)
+
+    with Session(session.get_bind()) as read_session:
+        rows = read_session.exec(
+            select(
+                SignalMatch.signal_low_id,
+                SignalMatch.signal_high_id,
+                SignalMatch.low_hash,
+                SignalMatch.high_hash,
+            ).where(
+                SignalMatch.scorer_version == scorer_version,
+                condition,
+            )
+        ).all()
+
+    uncached = set(target_hashes)
+    for row in rows:
+        target_id, own_hash, other_hash = _orient(source_signal_id, *row)
+        if own_hash == source_hash and other_hash == target_hashes.get(target_id):
+            uncached.discard(target_id)
+    return uncached
+
+
+def get_cached_page(
+    session: Session,
+    source_signal_id: int,
+    target_ids: list[int],
+    scorer_version: str,
+    min_accurate: float = 0,
+    after: Optional[tuple[float, int]] = None,
+    limit: Optional[int] = None,
+) -> list[tuple[int, float]]:
+    """
+    Strona wyników z cache posortowana po (accurate malejąco, signal_id rosnąco).
+
+    Filtr `min_accurate`, kursor i limit wykonuje baza. Nie sprawdza hashy -
+    wywołujący upewnia się wcześniej, że wszystkie pary są aktualne
+    (`get_uncached_target_ids`).
+
+    Args:
+        after: (accurate, signal_id) ostatniego wyniku poprzedniej strony
+
+    Returns:
+        [(target_signal_id, accurate), ...]
+    """
+    condition = _pair_condition(source_signal_id, target_ids)
+    if condition is None:
+        return []
+
+    other_id = _other_id(source_signal_id)
+    query = select(other_id, SignalMatch.accurate).where(
+        SignalMatch.scorer_version == scorer_version,
+        condition,
+        SignalMatch.accurate >= min_accurate,
+    )
+    if after is not None:
+        after_accurate, after_id = after
+        query = query.where(or_(
+            SignalMatch.accurate < after_accurate,
+            and_(SignalMatch.accurate == after_accurate, other_id > after_id),
+        ))
+    query = query.order_by(col(SignalMatch.accurate).desc(), other_id)
+    if limit is not None:
+        query = query.limit(limit)
+
+    with Session(session.get_bind()) as read_session:
+        return [(target_id, accurate) for target_id, accurate in read_session.exec(query).all()]
+
+
+def store_scores(
+    session: Session,
+    source_signal_id: int,
+    source_hash: str,
+    scores: dict[int, float],
+    target_hashes: dict[int, str],
+    scorer_version: str,
+) -> None:
+    """
+    Zapisuje (upsert) wyniki dopasowania do cache.
+
+    Zapis idzie przez osobną sesję, więc commit nie unieważnia obiektów
+    załadowanych w sesji żądania (brak dodatkowych SELECT-ów po zapisie).
+
+    Args:
+        scores: {target_signal_id: accurate}
+        target_hashes: {target_signal_id: hash details}
+    """
+    store_scores_bulk(session, [(source_signal_id, source_hash, scores, target_hashes)], scorer_version)
+
+
+def store_scores_bulk(
+    session: Session,
+    entries: list[tuple[int, str, dict[int, float], dict[int, str]]],
+    scorer_version: str,
+) -> int:
+    """
+    Zapisuje (upsert) wyniki wielu sygnałów źródłowych naraz - jedno
+    INSERT ... ON CONFLICT i jeden commit (np. przeliczanie wsadowe).
+
+    Args:
+        entries: [(source_signal_id, source_hash, {target_id: accurate}, {target_id: hash}), ...]
+
+    Returns:
+        Liczba zapisanych par (para oceniona z obu stron liczy się raz)
+    """
+    pairs: dict[tuple[int, int], tuple[float, str, str]] = {}
+    for source_signal_id, source_hash, scores, target_hashes in entries:
+        for target_id, accurate in scores.items():
+            if target_id not in target_hashes:
+                continue
+            low_id, high_id = pair_key(source_signal_id, target_id)
+            hashes = {source_signal_id: source_hash, target_id: target_hashes[target_id]}
+            pairs[(low_id, high_id)] = (accurate, hashes[low_id], hashes[high_id])
+    if not pairs:
+        return 0
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "signal_low_id": low_id,
+            "signal_high_id": high_id,
+            "scorer_version": scorer_version,
+            "low_hash": low_hash,
+            "high_hash": high_hash,
+            "accurate": accurate,
+            "created_at": now,
+        }
+        for (low_id, high_id), (accurate, low_hash, high_hash) in pairs.items()
+    ]
+    with Session(session.get_bind()) as write_session:
+        write_session.exec(_upsert_statement(write_session, rows))
+        write_session.commit()
+    return len(pairs)
+
+
+def _upsert_statement(session: Session, rows: list[dict]) -> Any:
+    """
+    INSERT ... ON CONFLICT (para, wersja) DO UPDATE - jedno zapytanie zamiast
+    SELECT + INSERT/UPDATE, bez wyścigu przy równoległych zapisach tej samej pary.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert not supported for dialect: {dialect}")
+    statement = insert(SignalMatch).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=["signal_low_id", "signal_high_id", "scorer_version"],
+        set_={
+            "low_hash": statement.excluded.low_hash,
+            "high_hash": statement.excluded.high_hash,
+            "accurate": statement.excluded.accurate,
+            "created_at": statement.excluded.created_at,
+        },
+    )
+
+
+def delete_signal_scores(session: Session, signal_id: int) -> None:
+    """Usuwa z cache wszystkie pary, w których występuje dany sygnał."""
+    session.exec(
+        delete(SignalMatch).where(
+            or_(
+                SignalMatch.signal_low_id == signal_id,
+                SignalMatch.signal_high_id == signal_id,
+            )
+        )
+    )
+    session.commit()
+
+
+__all__ = [
+    "details_hash",
+    "pair_key",
+    "get_cached_scores",
+    "get_uncached_target_ids",
+    "get_cached_page",
+    "store_scores",
+    "store_scores_bulk",
+    "delete_signal_scores",
+]
@@ -0,0 +1,196 @@
+"""
+Kaskada zawężania puli kandydatów przed scoringiem LLM:
+filtr strukturalny -> heurystyka -> podobieństwo embeddingów -> LLM (top N).
+
+Każdy etap ma własny limit kandydatów i budżet czasu. Etap embeddingów,
+który nie zmieści się w budżecie, przepuszcza kandydatów w dotychczasowej
+kolejności (przyciętych do swojego limitu), więc koszt i czas etapu LLM
+zależą tylko od limitów, a nie od wielkości puli kategorii. Heurystyka
+ocenia całą pulę naraz na kolumnach cech - przekroczenie jej budżetu
+jest tylko odnotowywane w statystykach. Budżetem etapu LLM jest deadline
+żądania (MATCH_DEADLINE_MS).
+
+`sync_stage_survivors` i `embedding_stage_selects` odtwarzają decyzję
+kaskady bez zapytań do API - materializacja w tle sprawdza nimi, czy
+kaskada istniejącego sygnału wybrałaby nowy sygnał.
+"""
+import asyncio
+import time
+
+import numpy as np
+from sqlmodel import Session
+
+from config import settings
+from models.signal import UserSignal
+from services.embeddings import cosine_top_k, prefilter_by_embedding
+from services.llm_gateway import Priority
+from services.signal_pool import signal_pool
+
+STAGES = ("filter", "heuristic", "embedding")
+
+# Zagregowane statystyki etapów od startu procesu
+_cascade_stats: dict[str, dict[str, float]] = {
+    stage: {"runs": 0, "candidates_in": 0, "candidates_out": 0, "total_ms": 0.0, "timeouts": 0}
+    for stage in STAGES
+}
+
+
+def _enabled_stages() -> list[str]:
+    stages = [s.strip() for s in settings.MATCH_CASCADE_STAGES.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown cascade stages: {', '.join(sorted(unknown))}")
+    return [s for s in STAGES if s in stages]
+
+
+def _filter_stage(source_signal: UserSignal, targets: list[UserSignal]) -> list[UserSignal]:
+    """Kandydaci z treścią do dopasowania; przy nadmiarze najnowsi (największe ID)."""
+    targets = [sig for sig in targets if sig.id is not None and sig.details]
+    cap = settings.MATCH_CASCADE_FILTER_MAX
+    if 0 < cap < len(targets):
+        targets = sorted(targets, key=lambda sig: sig.id, reverse=True)[:cap]
+    return targets
+
+
+def _heuristic_stage(
+    source_signal: UserSignal,
+    targets: list[UserSignal],
+    deadline: float,
+) -> tuple[list[UserSignal], bool]:
+    """
+    Top-N kandydatów według lokalnej heurystyki - cała pula oceniana naraz
+    na kolumnach cech puli sygnałów. Po przekroczeniu budżetu (zgłaszane
+    jako timeout) wynik i tak jest pełnym rankingiem.
+    """
+    scores = signal_pool.heuristic_scores(signal_pool.features(source_signal), targets)
+    ids = np.fromiter((sig.id for sig in targets), dtype=np.int64, count=len(targets))
+    order = np.lexsort((ids, -scores))
+    cap = settings.MATCH_CASCADE_HEURISTIC_TOP_N
+    if cap > 0:
+        order = order[:cap]
+    return [targets[i] for i in order], time.perf_counter() > deadline
+
+
+async def _embedding_stage(
+    session: Session,
+    source_signal: UserSignal,
+    targets: list[UserSignal],
+    priority: Priority,
+) -> tuple[list[UserSignal], bool]:
+    """Top-N najbliższych embeddingów (MATCH_VECTOR_TOP_N) w budżecie czasu."""
+    top_n = settings.MATCH_VECTOR_TOP_N
+    budget_ms = settings.MATCH_CASCADE_EMBEDDING_BUDGET_MS
+    task = asyncio.ensure_future(prefilter_by_embedding(session, source_signal, targets, top_n, priority=priority))
+    try:
+        # shield: po przekroczeniu budżetu embeddingi dalej się liczą i trafią do bazy
+        return await asyncio.wait_for(asyncio.shield(task), budget_ms / 1000 if budget_ms > 0 else None), False
+    except asyncio.TimeoutError:
+        return (targets[:top_n] if top_n > 0 else targets), True
+
+
+def _record(reports: list[dict], stage: str, candidates_in: int, candidates_out: int,
+            started: float, timed_out: bool = False) -> None:
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    reports.append({
+        "stage": stage,
+        "candidates_in": candidates_in,
+        "candidates_out": candidates_out,
+        "elapsed_ms": round(elapsed_ms, 1),
+        "timed_out": timed_out,
+    })
+    stats = _cascade_stats[stage]
+    stats["runs"] += 1
+    stats["candidates_in"] += candidates_in
+    stats["candidates_out"] += candidates_out
+    stats["total_ms"] += elapsed_ms
+    stats["timeouts"] += int(timed_out)
+
+
+async def run_cascade(
+    session: Session,
+    source_signal: UserSignal,
+    target_signals: list[UserSignal],
+    priority: Priority = Priority.INTERACTIVE,
+) -> tuple[list[UserSignal], list[dict]]:
+    """
+    Przepuszcza pulę kandydatów przez włączone etapy (MATCH_CASCADE_STAGES).
+
+    Returns:
+        (kandydaci dla LLM, raport etapów:
+         [{"stage", "candidates_in", "candidates_out", "elapsed_ms", "timed_out"}, ...])
+    """
+    reports: list[dict] = []
+    targets = target_signals
+    for stage in _enabled_stages():
+        started = time.perf_counter()
+        candidates_in = len(targets)
+        timed_out = False
+        if stage == "filter":
+            targets = _filter_stage(source_signal, targets)
+        elif stage == "heuristic":
+            deadline = started + settings.MATCH_CASCADE_HEURISTIC_BUDGET_MS / 1000
+            targets, timed_out = _heuristic_stage(source_signal, targets, deadline)
+        elif stage == "embedding":
+            targets, timed_out = await _embedding_stage(session, source_signal, targets, priority)
+        _record(reports, stage, candidates_in, len(targets), started, timed_out)
+
+    if reports:
+        summary = " -> ".join(
+            f"{r['stage']} {r['candidates_out']} ({r['elapsed_ms']} ms{', timeout' if r['timed_out'] else ''})"
+            for r in reports
+        )
+        print(f"[Matching] Cascade for signal {source_signal.id}: {len(target_signals)} -> {summary}")
+    return targets, reports
+
+
+def sync_stage_survivors(source_signal: UserSignal, targets: list[UserSignal]) -> list[UserSignal]:
+    """Kandydaci po włączonych etapach filter i heuristic - bez budżetu czasu i statystyk etapów."""
+    stages = _enabled_stages()
+    if "filter" in stages:
+        targets = _filter_stage(source_signal, targets)
+    if "heuristic" in stages:
+        targets, _ = _heuristic_stage(source_signal, targets, float("inf"))
+    return targets
+
+
+def embedding_stage_selects(
+    source_id: int,
+    target_id: int,
+    candidate_ids: list[int],
+    embeddings: dict[int, list[float]],
+) -> bool:
+    """
+    Czy etap embeddingów źródła przepuściłby `target_id` spośród `candidate_ids`,
+    licząc na gotowych wektorach. Gdy któregoś brakuje, wynik jest nieznany
+    (żądanie policzyłoby brakujące) - wtedy True.
+    """
+    top_n = settings.MATCH_VECTOR_TOP_N
+    if "embedding" not in _enabled_stages() or top_n <= 0 or len(candidate_ids) <= top_n:
+        return True
+    if source_id not in embeddings or any(signal_id not in embeddings for signal_id in candidate_ids):
+        return True
+    top = cosine_top_k(embeddings[source_id], [embeddings[signal_id] for signal_id in candidate_ids], top_n)
+    return target_id in {candidate_ids[i] for i in top}
+
+
+def get_cascade_stats() -> dict[str, dict[str, float]]:
+    """Statystyki etapów od startu procesu (z czasem i przeżywalnością średnią na uruchomienie)."""
+    result = {}
+    for stage, stats in _cascade_stats.items():
+        runs = stats["runs"] or 1
+        result[stage] = {
+            **stats,
+            "avg_ms": round(stats["total_ms"] / runs, 1),
+            "survival_rate": round(stats["candidates_out"] / stats["candidates_in"], 3)
+            if stats["candidates_in"] else None,
+        }
+    return result
+
+
+__all__ = [
+    "STAGES",
+    "run_cascade",
+    "sync_stage_survivors",
+    "embedding_stage_selects",
+    "get_cascade_stats",
+]
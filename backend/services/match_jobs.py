@@ -0,0 +1,133 @@
+"""
+Zadania w tle materializujące dopasowania sygnałów w tabeli signal_match.
+
+Uruchamiane po zapisie sygnału (FastAPI BackgroundTasks), dzięki czemu
+endpointy matchowania czytają gotowe wyniki zamiast czekać na LLM.
+"""
+import asyncio
+from typing import Optional
+
+from openai import OpenAIError
+from sqlmodel import Session
+
+from config import settings
+from models.signal import UserSignal
+from services.db import engine, release_connection
+from services.embeddings import ensure_signal_embeddings, load_signal_embeddings, store_signal_embeddings
+from services.llm_gateway import Priority
+from services.llm_ledger import llm_endpoint
+from services.match_cache import delete_signal_scores, details_hash, get_uncached_target_ids
+from services.match_cascade import embedding_stage_selects, sync_stage_survivors
+from services.matching import get_scorer_version, load_relevant_pool, score_signal_matches
+from services.openai import get_matching_category_ids
+from services.signal_pool import signal_pool
+from services.vector_store import embedding_store
+
+
+async def materialize_signal_matches(signal_id: int) -> None:
+    """
+    Liczy dopasowania nowego sygnału w obie strony:
+    - nowy -> istniejące: kandydaci wybrani kaskadą nowego sygnału
+    - istniejące -> nowy: sygnały, których własna kaskada wybrałaby nowy
+      (`_reverse_counterparts`), a kaskada nowego je odcięła
+
+    Wyniki w signal_match są symetryczne, więc kierunek odwrotny to jedno
+    wsadowe zapytanie z nowym sygnałem jako źródłem, a nie osobne zapytanie
+    na każdy istniejący sygnał.
+    """
+    llm_endpoint.set("materialize")
+    with Session(engine) as session:
+        loaded = await asyncio.to_thread(_load_signal_pool, session, signal_id)
+        if loaded is None:
+            return
+        signal, pool = loaded
+
+        try:
+            embeddings = await ensure_signal_embeddings(session, [signal], priority=Priority.BACKGROUND)
+            await asyncio.to_thread(store_signal_embeddings, embeddings)
+        except (OpenAIError, ValueError) as e:
+            print(f"[Match jobs] Embedding for signal {signal_id} failed: {e}")
+
+        if not pool:
+            return
+
+        try:
+            await score_signal_matches(session, signal, pool, priority=Priority.BACKGROUND)
+            counterparts = await asyncio.to_thread(_reverse_counterparts, session, signal, pool)
+            if counterparts:
+                print(f"[Match jobs] Signal {signal_id}: scoring {len(counterparts)} reverse counterparts")
+                await score_signal_matches(
+                    session, signal, counterparts, priority=Priority.BACKGROUND, cascade=False
+                )
+        except OpenAIError as e:
+            # Brakujące pary zostaną policzone przy najbliższym żądaniu matchowania
+            print(f"[Match jobs] Scoring for signal {signal_id} failed: {e}")
+
+
+def _load_signal_pool(session: Session, signal_id: int) -> Optional[tuple[UserSignal, list[UserSignal]]]:
+    """Sygnał i jego pula kandydatów; None, gdy sygnału nie ma lub jest nieaktywny."""
+    signal = session.get(UserSignal, signal_id)
+    if signal is None or not signal.is_active:
+        return None
+
+    pool = load_relevant_pool(session, signal, signal.user_id)
+
+    # Dalej sesja służy tylko jako źródło silnika - nie trzymamy połączenia w trakcie LLM
+    release_connection(session)
+    return signal, pool
+
+
+def _reverse_counterparts(session: Session, signal: UserSignal, pool: list[UserSignal]) -> list[UserSignal]:
+    """
+    Sygnały z puli bez wyniku pary z nowym sygnałem, których kaskada
+    (filtr i heurystyka na ich własnej puli, embeddingi z zapisanych
+    wektorów) wybrałaby nowy sygnał - inaczej ich żądanie matchowania
+    czekałoby na LLM.
+    """
+    if settings.MATCH_SCORER == "heuristic":
+        # Scorer heurystyczny ocenia całą pulę bez kaskady - wszystkie pary już są
+        return []
+    uncached = get_uncached_target_ids(
+        session, signal.id, details_hash(signal.details),
+        {sig.id: signal_pool.details_hash(sig) for sig in pool},
+        get_scorer_version(settings.MATCH_SCORER),
+    )
+    selected: dict[int, tuple[UserSignal, list[int]]] = {}
+    for other in pool:
+        if other.id not in uncached:
+            continue
+        # Tylko sygnały szukające kategorii nowego sygnału
+        if signal.signal_category_id not in get_matching_category_ids(other.signal_category_id):
+            continue
+        survivors = [sig.id for sig in sync_stage_survivors(other, load_relevant_pool(session, other, other.user_id))]
+        if signal.id in survivors:
+            selected[other.id] = (other, survivors)
+    if not selected:
+        release_connection(session)
+        return []
+
+    vector_ids = set(selected).union(*(survivors for _, survivors in selected.values()))
+    embeddings = load_signal_embeddings(session, list(vector_ids))
+    release_connection(session)
+    return [
+        other for other, survivors in selected.values()
+        if embedding_stage_selects(other.id, signal.id, survivors, embeddings)
+    ]
+
+
+def _delete_signal_scores(signal_id: int) -> None:
+    with Session(engine) as session:
+        delete_signal_scores(session, signal_id)
+
+
+async def purge_signal_matches(signal_id: int) -> None:
+    """Usuwa zmaterializowane dopasowania i embedding (tombstone) dezaktywowanego sygnału."""
+    await asyncio.to_thread(_delete_signal_scores, signal_id)
+    if embedding_store is not None:
+        embedding_store.tombstone(signal_id)
+
+
+__all__ = [
+    "materialize_signal_matches",
+    "purge_signal_matches",
+]
@@ -0,0 +1,652 @@
+"""
+Matchowanie sygnałów: wybór scorera, cache wyników (signal_match) i stronicowanie.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+
+import numpy as np
+from openai import RateLimitError
+from sqlmodel import Session, col, select
+
+from config import settings
+from models.signal import UserSignal
+from models.signal_features import SignalFeatures
+from models.user import User
+from schemas.signal import SignalMatchFilters
+from services.heuristic import HEURISTIC_SCORER_VERSION, FeatureMatrix, complementary_mask, normalize_term
+from services.llm_gateway import Priority
+from services.match_cascade import run_cascade
+from services.match_cache import (
+    details_hash,
+    get_cached_page,
+    get_cached_scores,
+    get_uncached_target_ids,
+    store_scores,
+)
+from services.openai import get_matching_category_ids, iter_bulk_signal_matches
+from services.signal_features import features_from_json, range_conditions
+from services.signal_pool import signal_pool
+from services.singleflight import SingleFlight
+from services.term_index import signal_terms, term_index
+
+
+# Dostępne scorery - oba mają kontrakt `calculate_bulk_signal_matches`
+SCORERS = ("openai", "heuristic")
+
+# Pozycja w rankingu: (accurate, signal_id)
+Position = tuple[float, int]
+
+# Zdekodowany kursor: (pozycja keyset lub None, pary wydane już za tą pozycją)
+PageCursor = tuple[Optional[Position], tuple[Position, ...]]
+
+# Najwięcej par wydanych za pozycją w kursorze - po tylu strona jest liczona
+# z pełnego rankingu (pozycja się przesuwa), więc kursor nie rośnie bez końca
+MAX_CURSOR_SEEN = 200
+
+# Trwające obliczenia stron dopasowań (patrz `page_signal_matches`)
+_page_flights: SingleFlight[tuple[list[dict], Optional[str]]] = SingleFlight()
+
+
+def _skill_filter_ids(session: Session, filters: SignalMatchFilters) -> Optional[set[int]]:
+    """ID sygnałów z wszystkimi wymaganymi umiejętnościami (indeks terminów); None = brak filtra."""
+    skills = [term for term in (normalize_term(skill) for skill in filters.skills) if term]
+    if not skills:
+        return None
+    term_index.sync(session)
+    return term_index.filter_ids(skills)
+
+
+def _range_bounds(filters: SignalMatchFilters) -> dict[str, tuple[Optional[float], Optional[float]]]:
+    """
+    Filtry kwot jako granice przedziałów signal_features (wartości w JSON są
+    tekstem, np. "25k-100k EUR") - tylko podane.
+    """
+    bounds = {
+        "money": (filters.budget_min, filters.budget_max),
+        "hourly_rate": (filters.hourly_rate_min, filters.hourly_rate_max),
+    }
+    return {name: bound for name, bound in bounds.items() if bound != (None, None)}
+
+
+def _user_filter_conditions(filters: SignalMatchFilters) -> list[Any]:
+    """Warunki na profilu autora sygnału (User)."""
+    conditions = []
+    if filters.location:
+        conditions.append(col(User.location).icontains(filters.location, autoescape=True))
+    if filters.min_experience_years is not None:
+        conditions.append(col(User.experience_years) >= filters.min_experience_years)
+    if filters.max_experience_years is not None:
+        conditions.append(col(User.experience_years) <= filters.max_experience_years)
+    return conditions
+
+
+def _apply_user_filters(query: Any, filters: SignalMatchFilters) -> Any:
+    """Filtry na profilu autora sygnału (User) - JOIN tylko, gdy są potrzebne."""
+    conditions = _user_filter_conditions(filters)
+    if not conditions:
+        return query
+    return query.join(User, col(User.id) == col(UserSignal.user_id)).where(*conditions)
+
+
+def load_candidate_pool(
+    session: Session,
+    category_ids: list[int] | tuple[int, ...],
+    exclude_user_id: int,
+    candidate_ids: Optional[Iterable[int]] = None,
+    filters: Optional[SignalMatchFilters] = None,
+) -> list[UserSignal]:
+    """
+    Aktywne sygnały z podanych kategorii z pominięciem sygnałów danego użytkownika.
+
+    Przy włączonej puli w pamięci (MATCH_SIGNAL_POOL) sygnały pochodzą z
+    `signal_pool`, a baza odpowiada tylko na filtry profilu autora (same ID).
+    Filtry kwot to warunki na kolumnach puli albo JOIN z signal_features.
+
+    Args:
+        candidate_ids: zawęża pulę do tych ID (None = cała pula kategorii)
+        filters: filtry kandydatów - zamieniane na warunki zapytania (albo
+            zbiór ID), więc odrzuceni kandydaci nie trafiają do scoringu
+    """
+    if not category_ids:
+        return []
+    query = select(UserSignal).where(
+        col(UserSignal.signal_category_id).in_(list(category_ids)),
+        UserSignal.user_id != exclude_user_id,
+        UserSignal.is_active == True  # noqa: E712
+    )
+    ranges = _range_bounds(filters) if filters is not None else {}
+    if filters is not None:
+        if not settings.MATCH_SIGNAL_POOL:
+            query = _apply_user_filters(query, filters)
+            if ranges:
+                query = query.join(
+                    SignalFeatures, col(SignalFeatures.signal_id) == col(UserSignal.id)
+                ).where(*range_conditions(ranges))
+        elif _user_filter_conditions(filters):
+            # Pula w pamięci nie zna profili autorów - z bazy tylko ID spełniających filtry
+            user_ids = set(session.exec(_apply_user_filters(query.with_only_columns(col(UserSignal.id)), filters)).all())
+            candidate_ids = user_ids if candidate_ids is None else user_ids.intersection(candidate_ids)
+        skill_ids = _skill_filter_ids(session, filters)
+        if skill_ids is not None:
+            candidate_ids = skill_ids if candidate_ids is None else skill_ids.intersection(candidate_ids)
+    if candidate_ids is not None:
+        candidate_ids = list(candidate_ids)
+        if not candidate_ids:
+            return []
+    if settings.MATCH_SIGNAL_POOL:
+        signal_pool.sync(session)
+        return signal_pool.candidates(category_ids, exclude_user_id, candidate_ids, ranges)
+    if candidate_ids is not None:
+        query = query.where(col(UserSignal.id).in_(candidate_ids))
+    return list(session.exec(query).all())
+
+
+def _complementary_ids(
+    session: Session,
+    source: dict[str, Any],
+    category_ids: list[int],
+    exclude_user_id: int,
+) -> set[int]:
+    """ID kandydatów uzupełniających źródło (`complementary_mask`) - z puli albo z cech w signal_features."""
+    if settings.MATCH_SIGNAL_POOL:
+        signal_pool.sync(session)
+        return signal_pool.complementary_ids(source, category_ids, exclude_user_id)
+    rows = session.exec(
+        select(UserSignal.id, SignalFeatures.features)
+        .join(SignalFeatures, col(SignalFeatures.signal_id) == col(UserSignal.id))
+        .where(
+            col(UserSignal.signal_category_id).in_(category_ids),
+            UserSignal.user_id != exclude_user_id,
+            UserSignal.is_active == True  # noqa: E712
+        )
+    ).all()
+    mask = complementary_mask(source, FeatureMatrix([features_from_json(features) for _, features in rows]))
+    return {rows[i][0] for i in np.flatnonzero(mask)}
+
+
+def relevant_candidate_ids(
+    session: Session,
+    source_signal: UserSignal,
+    exclude_user_id: int,
+) -> Optional[set[int]]:
+    """
+    ID kandydatów z pasujących kategorii, które mają z sygnałem źródłowym
+    wspólny termin (indeks `term_index`) albo go uzupełniają bez wspólnych
+    słów - zgodny etap, kwota lub stawka (np. inwestor seed z ticketem
+    25k-100k i pomysł szukający 50k). None, gdy indeks jest wyłączony
+    (MATCH_TERM_INDEX) albo źródło nie ma terminów - wtedy cała pula kategorii.
+    """
+    if not settings.MATCH_TERM_INDEX:
+        return None
+    terms = signal_terms(source_signal.details)
+    if not terms:
+        return None
+    category_ids = get_matching_category_ids(source_signal.signal_category_id)
+    term_index.sync(session)
+    ids = term_index.candidate_ids(terms, category_ids, exclude_user_id)
+    return ids | _complementary_ids(session, signal_pool.features(source_signal), category_ids, exclude_user_id)
+
+
+def load_relevant_pool(
+    session: Session,
+    source_signal: UserSignal,
+    exclude_user_id: int,
+    filters: Optional[SignalMatchFilters] = None,
+) -> list[UserSignal]:
+    """Pula kandydatów sygnału: pasujące kategorie zawężone do wspólnych terminów i filtrów."""
+    return load_candidate_pool(
+        session,
+        get_matching_category_ids(source_signal.signal_category_id),
+        exclude_user_id,
+        candidate_ids=relevant_candidate_ids(session, source_signal, exclude_user_id),
+        filters=filters,
+    )
+
+
+def get_scorer_version(scorer: str) -> str:
+    """Wersja scorera zapisywana w cache signal_match."""
+    if scorer == "heuristic":
+        return HEURISTIC_SCORER_VERSION
+    return settings.MATCH_SCORER_VERSION
+
+
+def encode_cursor(cursor: PageCursor) -> str:
+    """
+    Kursor strony wyników. Sama pozycja (accurate, signal_id) ostatniego
+    dopasowania, gdy strona pochodziła z pełnego rankingu; po stronie
+    przybliżonej (top-k, termin) także pary już wydane - patrz `_next_cursor`.
+    """
+    after, seen = cursor
+    payload: Any = list(after) if after is not None and not seen else {
+        "after": None if after is None else list(after),
+        "seen": [list(position) for position in seen],
+    }
+    raw = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_position(value: Any) -> Position:
+    accurate, signal_id = value
+    return float(accurate), int(signal_id)
+
+
+def decode_cursor(cursor: str) -> PageCursor:
+    """Odwrotność `encode_cursor`; ValueError dla niepoprawnego kursora."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if isinstance(payload, list):
+            return _decode_position(payload), ()
+        after = payload["after"]
+        return (
+            None if after is None else _decode_position(after),
+            tuple(_decode_position(position) for position in payload["seen"]),
+        )
+    except (ValueError, TypeError, KeyError, UnicodeEncodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _resolve_scorer(scorer: Optional[str]) -> str:
+    scorer = scorer or settings.MATCH_SCORER
+    if scorer not in SCORERS:
+        raise ValueError(f"Unknown scorer: {scorer}")
+    return scorer
+
+
+async def _candidate_pool(
+    session: Session,
+    source_signal: UserSignal,
+    target_signals: list[UserSignal],
+    scorer: str,
+    priority: Priority,
+) -> list[UserSignal]:
+    # Heurystyka jest tania - kaskada zawężania ma sens tylko przed LLM
+    if scorer == "heuristic":
+        return target_signals
+    survivors, _ = await run_cascade(session, source_signal, target_signals, priority=priority)
+    return survivors
+
+
+async def iter_signal_matches(
+    session: Session,
+    source_signal: UserSignal,
+    target_signals: list[UserSignal],
+    scorer: Optional[str] = None,
+    priority: Priority = Priority.INTERACTIVE,
+    cascade: bool = True,
+) -> AsyncIterator[list[dict]]:
+    """
+    Oblicza dopasowanie sygnału źródłowego do sygnałów docelowych,
+    zwracając wyniki paczkami, gdy tylko są gotowe.
+
+    Scorer wybierany jest przez MATCH_SCORER ("openai" lub "heuristic").
+    Dla OpenAI pula kandydatów jest najpierw zawężana kaskadą
+    (`services.match_cascade`: filtr -> heurystyka -> embeddingi; `cascade=False`
+    dla puli już wybranej), a po wyczerpaniu limitu API (RateLimitError)
+    pozostałe pary liczy heurystyka.
+
+    Pierwsza paczka to wyniki z cache; kolejne to pary nowe lub takie,
+    w których zmieniły się `details` którejkolwiek ze stron - każda
+    zapisywana do cache zaraz po ocenie.
+
+    Yields:
+        list[dict]: [{"signal_id": int, "accurate": float, "details": None}, ...]
+    """
+    if source_signal.id is None or not target_signals:
+        return
+
+    scorer = _resolve_scorer(scorer)
+    if cascade:
+        target_signals = await _candidate_pool(session, source_signal, target_signals, scorer, priority)
+    async with aclosing(_iter_scored(session, source_signal, target_signals, scorer, priority)) as batches:
+        async for matches in batches:
+            yield matches
+
+
+async def _iter_scored(
+    session: Session,
+    source_signal: UserSignal,
+    target_signals: list[UserSignal],
+    scorer: str,
+    priority: Priority,
+) -> AsyncIterator[list[dict]]:
+    """Cache + scoring brakujących par dla już zawężonej puli."""
+    scorer_version = get_scorer_version(scorer)
+    source_hash = details_hash(source_signal.details)
+    target_hashes = {sig.id: signal_pool.details_hash(sig) for sig in target_signals if sig.id is not None}
+
+    # Zapytania do bazy w wątku - nie blokują pętli zdarzeń w trakcie scoringu innych żądań
+    cached = await asyncio.to_thread(
+        get_cached_scores, session, source_signal.id, source_hash, target_hashes, scorer_version
+    )
+    if cached:
+        yield [
+            {"signal_id": sig_id, "accurate": accurate, "details": None}
+            for sig_id, accurate in cached.items()
+        ]
+
+    missing = {sig.id: sig for sig in target_signals if sig.id in target_hashes and sig.id not in cached}
+    if not missing:
+        return
+
+    if scorer == "heuristic":
+        # Cechy kandydatów z puli sygnałów - bez ponownego parsowania `details`
+        targets = list(missing.values())
+        scores = signal_pool.heuristic_scores(signal_pool.features(source_signal), targets)
+        matches = [
+            {"signal_id": sig.id, "accurate": float(score), "details": None}
+            for sig, score in zip(targets, scores)
+        ]
+        await asyncio.to_thread(
+            _store_batch, session, source_signal.id, source_hash, matches, target_hashes, scorer_version
+        )
+        yield matches
+        return
+
+    target_data = [{"id": sig.id, "details": sig.details} for sig in missing.values()]
+    try:
+        # aclosing: przerwanie iteracji (np. top-k) od razu anuluje niewysłane paczki
+        async with aclosing(iter_bulk_signal_matches(
+            source_signal.id, source_signal.details, target_data, priority=priority
+        )) as chunks:
+            async for matches in chunks:
+                await asyncio.to_thread(
+                    _store_batch, session, source_signal.id, source_hash, matches, target_hashes, scorer_version
+                )
+                for m in matches:
+                    missing.pop(m["signal_id"], None)
+                yield matches
+    except RateLimitError:
+        # Wyczerpana quota OpenAI - pozostałe pary liczy lokalny scorer zamiast błędu 500
+        async with aclosing(_iter_scored(
+            session, source_signal, list(missing.values()), "heuristic", priority
+        )) as fallback:
+            async for matches in fallback:
+                yield matches
+
+
+def _store_batch(
+    session: Session,
+    source_signal_id: int,
+    source_hash: str,
+    matches: list[dict],
+    target_hashes: dict[int, str],
+    scorer_version: str,
+) -> None:
+    # Wyniki awaryjne (błąd parsowania / brak odpowiedzi) nie trafiają do cache
+    fresh = {m["signal_id"]: m["accurate"] for m in matches if not m.get("fallback")}
+    store_scores(session, source_signal_id, source_hash, fresh, target_hashes, scorer_version)
+
+
+async def score_signal_matches(
+    session: Session,
+    source_signal: UserSignal,
+    target_signals: list[UserSignal],
+    scorer: Optional[str] = None,
+    priority: Priority = Priority.INTERACTIVE,
+    cascade: bool = True,
+) -> list[dict]:
+    """
+    Oblicza dopasowanie sygnału źródłowego do sygnałów docelowych
+    (wszystkie paczki z `iter_signal_matches` naraz).
+
+    Returns:
+        list[dict]: [{"signal_id": int, "accurate": float, "details": None}, ...]
+    """
+    results: list[dict] = []
+    async for matches in iter_signal_matches(session, source_signal, target_signals, scorer, priority, cascade):
+        results.extend(matches)
+    return results
+
+
+def _sort_key(match: dict) -> tuple[float, int]:
+    return (-match["accurate"], match["signal_id"])
+
+
+def _position_key(position: Position) -> tuple[float, int]:
+    return (-position[0], position[1])
+
+
+def _cursor_filter(cursor: Optional[PageCursor]) -> Callable[[dict], bool]:
+    """Predykat: czy dopasowanie należy do stron za kursorem (za pozycją i jeszcze niewydane)."""
+    if cursor is None:
+        return lambda match: True
+    after, seen = cursor
+    seen_ids = {signal_id for _, signal_id in seen}
+    return lambda match: (
+        match["signal_id"] not in seen_ids
+        and (after is None or _sort_key(match) > _position_key(after))
+    )
+
+
+def pool_version(source_signal: UserSignal, target_signals: list[UserSignal]) -> str:
+    """Wersja puli kandydatów: hash z `details` źródła oraz ID i `details` kandydatów."""
+    digest = hashlib.sha256(details_hash(source_signal.details).encode("ascii"))
+    for sig in sorted(target_signals, key=lambda s: s.id or 0):
+        digest.update(f"|{sig.id}:{signal_pool.details_hash(sig)}".encode("ascii"))
+    return digest.hexdigest()
+
+
+async def page_signal_matches(
+    session: Session,
+    source_signal: UserSignal,
+    target_signals: list[UserSignal],
+    min_accurate: float = 0,
+    limit: Optional[int] = None,
+    cursor: Optional[PageCursor] = None,
+    scorer: Optional[str] = None,
+    priority: Priority = Priority.INTERACTIVE,
+    deadline_ms: Optional[int] = None,
+) -> tuple[list[dict], Optional[str], bool]:
+    """
+    Strona dopasowań posortowana po (accurate malejąco, signal_id rosnąco).
+
+    Identyczne równoległe zapytania - ten sam sygnał, wersja puli
+    (`pool_version`), scorer i parametry strony - czekają na jedno
+    obliczenie zamiast uruchamiać osobny scoring LLM (np. radar otwarty
+    w dwóch kartach). Szczegóły w `_page_signal_matches`.
+
+    Po przekroczeniu `deadline_ms` (domyślnie MATCH_DEADLINE_MS, 0 = bez
+    limitu) zwracane są pary ocenione do tej pory (z cache), a scoring
+    pozostałych trwa dalej w tle na własnej sesji i uzupełnia cache.
+
+    Returns:
+        (dopasowania, kursor następnej strony lub None, czy wynik jest częściowy)
+    """
+    if source_signal.id is None or not target_signals:
+        return [], None, False
+
+    scorer = _resolve_scorer(scorer)
+    key = (
+        source_signal.id,
+        pool_version(source_signal, target_signals),
+        scorer,
+        min_accurate,
+        limit,
+        cursor,
+    )
+    bind = session.get_bind()
+    flight = _page_flights.do(key, lambda: _run_page(
+        bind, source_signal, target_signals, min_accurate, limit, cursor, scorer, priority
+    ))
+
+    deadline_ms = settings.MATCH_DEADLINE_MS if deadline_ms is None else deadline_ms
+    try:
+        # Po przekroczeniu terminu scoring nie jest przerywany (single-flight go osłania)
+        matches, next_cursor = await asyncio.wait_for(flight, deadline_ms / 1000 if deadline_ms > 0 else None)
+        return matches, next_cursor, False
+    except asyncio.TimeoutError:
+        print(f"[Matching] Deadline {deadline_ms} ms exceeded for signal {source_signal.id} - partial result")
+
+    matches, next_cursor = await asyncio.to_thread(
+        _partial_page, session, source_signal, target_signals, scorer, min_accurate, limit, cursor
+    )
+    return matches, next_cursor, True
+
+
+async def _run_page(
+    bind: Any,
+    source_signal: UserSignal,
+    target_signals: list[UserSignal],
+    min_accurate: float,
+    limit: Optional[int],
+    cursor: Optional[PageCursor],
+    scorer: str,
+    priority: Priority,
+) -> tuple[list[dict], Optional[str]]:
+    # Własna sesja - obliczenie może trwać dłużej niż żądanie, które je uruchomiło
+    with Session(bind) as session:
+        return await _page_signal_matches(
+            session, source_signal, target_signals, min_accurate, limit, cursor, scorer, priority
+        )
+
+
+def _partial_page(
+    session: Session,
+    source_signal: UserSignal,
+    target_signals: list[UserSignal],
+    scorer: str,
+    min_accurate: float,
+    limit: Optional[int],
+    cursor: Optional[PageCursor],
+) -> tuple[list[dict], Optional[str]]:
+    """Strona z par już ocenionych (cache) - wynik częściowy po przekroczeniu terminu."""
+    target_hashes = {sig.id: signal_pool.details_hash(sig) for sig in target_signals if sig.id is not None}
+    cached = get_cached_scores(
+        session, source_signal.id, details_hash(source_signal.details), target_hashes,
+        get_scorer_version(scorer),
+    )
+    matches = [
+        {"signal_id": sig_id, "accurate": accurate, "details": None}
+        for sig_id, accurate in cached.items()
+    ]
+    in_page = _cursor_filter(cursor)
+    matches = [m for m in matches if m["accurate"] >= min_accurate and in_page(m)]
+    matches.sort(key=_sort_key)
+    return _page(matches, limit, cursor, complete=False)
+
+
+async def _page_signal_matches(
+    session: Session,
+    source_signal: UserSignal,
+    target_signals: list[UserSignal],
+    min_accurate: float,
+    limit: Optional[int],
+    cursor: Optional[PageCursor],
+    scorer: str,
+    priority: Priority,
+) -> tuple[list[dict], Optional[str]]:
+    """
+    Gdy wszystkie pary z puli mają aktualny wynik w cache, filtr `min_accurate`,
+    sortowanie, kursor i limit wykonuje baza. W przeciwnym razie brakujące
+    pary są oceniane, a w trybie top-k (`limit`) scoring kończy się, gdy
+    znajdzie `limit` pewnych wyników (>= MATCH_TOPK_CONFIDENT_SCORE) -
+    wtedy strona jest przybliżona, a reszta par zostaje na kolejne zapytania.
+    Kursor takiej strony nie przesuwa pozycji keyset (nieocenione pary mogą
+    mieć wyższy wynik), tylko dopisuje wydane pary do pominięcia - do
+    MAX_CURSOR_SEEN par; gdy kolejna strona by go przekroczyła, scoring
+    nie kończy się wcześniej i pozycja się przesuwa.
+
+    Args:
+        cursor: zdekodowany kursor poprzedniej strony (`decode_cursor`)
+
+    Returns:
+        (dopasowania, kursor następnej strony lub None)
+    """
+    target_signals = await _candidate_pool(session, source_signal, target_signals, scorer, priority)
+
+    scorer_version = get_scorer_version(scorer)
+    source_hash = details_hash(source_signal.details)
+    target_hashes = {sig.id: signal_pool.details_hash(sig) for sig in target_signals if sig.id is not None}
+
+    uncached = await asyncio.to_thread(
+        get_uncached_target_ids, session, source_signal.id, source_hash, target_hashes, scorer_version
+    )
+    if not uncached:
+        after, seen = cursor or (None, ())
+        seen_ids = {signal_id for _, signal_id in seen}
+        rows = await asyncio.to_thread(
+            get_cached_page,
+            session, source_signal.id, [sig_id for sig_id in target_hashes if sig_id not in seen_ids],
+            scorer_version,
+            min_accurate=min_accurate,
+            after=after,
+            limit=None if limit is None else limit + 1,
+        )
+        matches = [{"signal_id": sig_id, "accurate": accurate, "details": None} for sig_id, accurate in rows]
+        return _page(matches, limit, cursor, complete=True)
+
+    confident = max(min_accurate, settings.MATCH_TOPK_CONFIDENT_SCORE)
+    can_stop = limit is not None and len(cursor[1] if cursor else ()) + limit <= MAX_CURSOR_SEEN
+    matches: list[dict] = []
+    stopped_early = False
+    in_page = _cursor_filter(cursor)
+    async with aclosing(_iter_scored(session, source_signal, target_signals, scorer, priority)) as batches:
+        async for batch in batches:
+            matches.extend(m for m in batch if m["accurate"] >= min_accurate and in_page(m))
+            if can_stop and sum(m["accurate"] >= confident for m in matches) >= limit:
+                stopped_early = True
+                break
+
+    matches.sort(key=_sort_key)
+    return _page(matches, limit, cursor, complete=not stopped_early)
+
+
+def _page(
+    matches: list[dict],
+    limit: Optional[int],
+    cursor: Optional[PageCursor],
+    complete: bool,
+) -> tuple[list[dict], Optional[str]]:
+    """
+    Przycina posortowane wyniki do `limit` i wyznacza kursor następnej strony.
+    `complete` - czy `matches` to pełny ranking pozostałych par (a nie tylko już ocenionych).
+    Strona przybliżona mieści się w limicie MAX_CURSOR_SEEN (po jego wyczerpaniu
+    jest pusta, a kursor bez zmian - kolejne zapytanie liczy pełny ranking).
+    """
+    if limit is None:
+        return matches, None
+    if not complete:
+        _, seen = cursor or (None, ())
+        limit = min(limit, MAX_CURSOR_SEEN - len(seen))
+        if limit <= 0:
+            return [], encode_cursor(cursor)
+    page = matches[:limit]
+    if not page or (complete and len(matches) <= limit):
+        return page, None
+    return page, encode_cursor(_next_cursor(page, cursor, complete))
+
+
+def _next_cursor(page: list[dict], cursor: Optional[PageCursor], complete: bool) -> PageCursor:
+    """
+    Po stronie z pełnego rankingu kursor przesuwa się na jej ostatnią parę
+    (zostają tylko wydane pary sortujące się za nią). Po stronie przybliżonej
+    pozycja zostaje, a wydane pary trafiają do pominięcia - później ocenione
+    pary z wyższym wynikiem nie zostaną zgubione.
+    """
+    after, seen = cursor or (None, ())
+    served = [(m["accurate"], m["signal_id"]) for m in page]
+    if not complete:
+        return after, seen + tuple(served)
+    after = served[-1]
+    return after, tuple(p for p in seen if _position_key(p) > _position_key(after))
+
+
+__all__ = [
+    "SCORERS",
+    "load_candidate_pool",
+    "relevant_candidate_ids",
+    "load_relevant_pool",
+    "get_scorer_version",
+    "PageCursor",
+    "MAX_CURSOR_SEEN",
+    "encode_cursor",
+    "pool_version",
+    "decode_cursor",
+    "iter_signal_matches",
+    "score_signal_matches",
+    "page_signal_matches",
+]
@@ -1,20 +1,54 @@
+import asyncio
 import json
-from typing import Any
-
-from openai import OpenAI
+import time
+from typing import Any, AsyncIterator, Optional
 
 from config import settings
-
-client = OpenAI(api_key=settings.OPENAI_KEY)
+from services.embedding_cache import canonical_embedding_text, embedding_cache, embedding_cache_key
+from services.llm_gateway import Priority, chat_completion, create_embeddings
+from services.llm_ledger import record_llm_call
+from services.prompt_encoding import count_tokens, encode_details
 
 
-def get_embedding(text):
+async def _embed_batch(texts: list[str], priority: Priority) -> list[list[float]]:
+    """Jedno zapytanie do API o embeddingi paczki tekstów (w kolejności `texts`)."""
     # Model 'text-embedding-3-small' jest najlepszy cena/jakość na hackathon
-    response = client.embeddings.create(
-        input=text,
-        model="gpt-4o-mini"
-    )
-    return response.data[0].embedding
+    model = settings.OPENAI_EMBEDDING_MODEL
+    started = time.perf_counter()
+    try:
+        response = await create_embeddings(priority=priority, input=texts, model=model)
+    except Exception as e:
+        record_llm_call(operation="embedding", model=model, started=started, candidates=len(texts), error=e)
+        raise
+    record_llm_call(operation="embedding", model=model, started=started,
+                    candidates=len(texts), usage=getattr(response, "usage", None))
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+async def get_embeddings(texts: list[str], priority: Priority = Priority.INTERACTIVE) -> list[list[float]]:
+    """
+    Embeddingi wielu tekstów - z dyskowego cache albo paczkami po
+    EMBEDDING_BATCH_SIZE tekstów w jednym zapytaniu. Teksty są sprowadzane do
+    postaci kanonicznej, więc różnice w białych znakach nie kosztują zapytania.
+    """
+    model = settings.OPENAI_EMBEDDING_MODEL
+    canonical = [canonical_embedding_text(text) for text in texts]
+    keys = [embedding_cache_key(text, model) for text in canonical]
+    # Odczyt pliku (i flock przy zapisie) w wątku - nie blokuje pętli zdarzeń
+    found = await asyncio.to_thread(embedding_cache.get_many, keys) if embedding_cache is not None else {}
+
+    missing = {key: text for key, text in zip(keys, canonical) if key not in found}
+    batch_size = max(1, settings.EMBEDDING_BATCH_SIZE)
+    items = list(missing.items())
+    for i in range(0, len(items), batch_size):
+        batch = items[i:i + batch_size]
+        embeddings = await _embed_batch([text for _, text in batch], priority)
+        computed = {key: embedding for (key, _), embedding in zip(batch, embeddings)}
+        if embedding_cache is not None:
+            await asyncio.to_thread(embedding_cache.put_many, computed)
+        found.update(computed)
+    print(f"[LLM] Embeddings: {len(texts)} texts, {len(set(keys)) - len(missing)} cached, {len(missing)} computed")
+    return [found[key] for key in keys]
 
 
 # Mapowanie jakie sygnały do siebie pasują
@@ -33,11 +67,12 @@ def get_matching_category_ids(signal_category_id: int) -> list[int]:
     return SIGNAL_MATCHING.get(signal_category_id, [])
 
 
-def calculate_signal_match(
+async def calculate_signal_match(
     source_signal_id: int,
     source_details: Any,
     target_signal_id: int,
     target_details: Any,
+    priority: Priority = Priority.INTERACTIVE,
 ) -> dict:
     """
     Oblicza współczynnik dopasowania między dwoma sygnałami używając OpenAI.
@@ -52,10 +87,10 @@ Oceń dopasowanie między dwoma sygnałami w skali 0-100, gdzie:
 - 100 = idealne dopasowanie
 
 SYGNAŁ ŹRÓDŁOWY (ID: {source_signal_id}):
-{json.dumps(source_details, ensure_ascii=False, indent=2) if source_details else "Brak szczegółów"}
+{encode_details(source_details)}
 
 SYGNAŁ DOCELOWY (ID: {target_signal_id}):
-{json.dumps(target_details, ensure_ascii=False, indent=2) if target_details else "Brak szczegółów"}
+{encode_details(target_details)}
 
 Oceń na podstawie:
 - Zgodności umiejętności/wymagań
@@ -65,7 +100,8 @@ Oceń na podstawie:
 Odpowiedz TYLKO w formacie JSON. Pole "accurate" zwracaj jako liczbę z dokładnością co najmniej do jednego miejsca po przecinku (np. 87.3, 64.8), unikaj wartości zaokrąglonych do pełnych dziesiątek:
 {{"signal_id": {target_signal_id}, "accurate": <liczba 0-100 z miejscami po przecinku>}}"""
 
-    response = client.chat.completions.create(
+    response = await chat_completion(
+        priority=priority,
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": "Odpowiadasz tylko w formacie JSON. Nie dodawaj żadnego tekstu przed ani po JSON."},
@@ -105,92 +141,372 @@ Odpowiedz TYLKO w formacie JSON. Pole "accurate" zwracaj jako liczbę z dokładn
         }
 
 
-def calculate_bulk_signal_matches(
+# Stałe instrukcje scoringu paczki - wspólny początek wszystkich zapytań (cache promptów
+# OpenAI działa na identycznych prefiksach), dlatego nic zmiennego tu nie wstawiamy
+_MATCH_SYSTEM_PROMPT = """Jesteś ekspertem od matchowania ludzi w ekosystemie startupowym.
+Odpowiadasz tylko w formacie JSON. Nie dodawaj żadnego tekstu przed ani po JSON.
+
+Dostajesz sygnał źródłowy, a potem listę sygnałów docelowych. Oceń dopasowanie
+sygnału źródłowego do każdego z sygnałów docelowych w skali 0-100.
+
+Oceń każdy sygnał na podstawie:
+- Zgodności umiejętności/wymagań
+- Komplementarności ofert
+- Potencjału współpracy
+
+Odpowiedz TYLKO w formacie JSON (obiekt z tablicą "results"). Każde pole "accurate" musi mieć co najmniej jedno miejsce po przecinku (np. 82.4, 71.9) i nie powinno być zaokrąglane do pełnych dziesiątek, jeśli nie jest to konieczne:
+{"results": [{"signal_id": <id>, "accurate": <liczba 0-100 z miejscami po przecinku>}, ...]}"""
+
+# Structured Outputs - model może zwrócić tylko JSON zgodny ze schematem
+_MATCH_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "match_scores",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "results": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "signal_id": {"type": "integer"},
+                            "accurate": {"type": "number"},
+                        },
+                        "required": ["signal_id", "accurate"],
+                        "additionalProperties": False,
+                    },
+                },
+            },
+            "required": ["results"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+# Ile razy paczka jest ponawiana tylko dla sygnałów bez wyniku (np. ucięta odpowiedź)
+_MISSING_RESCORE_ATTEMPTS = 1
+
+# Przybliżona liczba tokenów stałej części promptu (instrukcje + format odpowiedzi)
+_PROMPT_OVERHEAD_TOKENS = 250
+
+
+# Statystyki do adaptacyjnego doboru wielkości paczek - aktualizowane
+# po każdej odpowiedzi na podstawie response.usage (średnia wykładnicza)
+_batch_stats = {
+    "prompt_token_correction": 1.0,   # usage.prompt_tokens / tokeny policzone lokalnie
+    "completion_tokens_per_target": 16.0,  # ile tokenów odpowiedzi zajmuje jeden wynik
+}
+_STATS_ALPHA = 0.3
+
+
+def _format_signal(label: str, details: Any) -> str:
+    return f"{label}: {encode_details(details)}"
+
+
+def _update_batch_stats(prompt_tokens: int, targets: int, usage: Any, truncated: bool) -> None:
+    """Aktualizuje statystyki tokenów na podstawie zmierzonego `response.usage`."""
+    if usage is not None and prompt_tokens > 0:
+        ratio = usage.prompt_tokens / prompt_tokens
+        _batch_stats["prompt_token_correction"] += _STATS_ALPHA * (ratio - _batch_stats["prompt_token_correction"])
+    if truncated:
+        # Odpowiedź ucięta - następne paczki muszą być mniejsze
+        _batch_stats["completion_tokens_per_target"] *= 2
+    elif usage is not None and targets > 0:
+        per_target = usage.completion_tokens / targets
+        _batch_stats["completion_tokens_per_target"] += _STATS_ALPHA * (
+            per_target - _batch_stats["completion_tokens_per_target"]
+        )
+
+
+def _chunk_targets(base_tokens: int, target_tokens: list[int]) -> list[list[int]]:
+    """
+    Dzieli sygnały docelowe na paczki mieszczące się w budżecie tokenów
+    promptu (LLM_PROMPT_TOKEN_BUDGET) i odpowiedzi (LLM_MAX_COMPLETION_TOKENS).
+
+    Args:
+        base_tokens: tokeny stałej części promptu (instrukcje + sygnał źródłowy)
+        target_tokens: tokeny kolejnych sygnałów docelowych
+
+    Returns:
+        list[list[int]]: indeksy `target_tokens` w kolejnych paczkach
+    """
+    correction = _batch_stats["prompt_token_correction"]
+    completion_per_target = _batch_stats["completion_tokens_per_target"]
+
+    # Zapas 50% na odpowiedź - lepiej mniejsza paczka niż ucięty JSON
+    max_by_completion = int(settings.LLM_MAX_COMPLETION_TOKENS / (completion_per_target * 1.5))
+    max_targets = max(1, min(settings.LLM_MAX_BATCH_SIZE, max_by_completion))
+    prompt_budget = settings.LLM_PROMPT_TOKEN_BUDGET - base_tokens * correction
+
+    chunks: list[list[int]] = []
+    current: list[int] = []
+    current_tokens = 0.0
+    for i, count in enumerate(target_tokens):
+        tokens = count * correction
+        if current and (len(current) >= max_targets or current_tokens + tokens > prompt_budget):
+            chunks.append(current)
+            current, current_tokens = [], 0.0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _completion_budget(targets: int) -> int:
+    completion_per_target = _batch_stats["completion_tokens_per_target"]
+    return min(settings.LLM_MAX_COMPLETION_TOKENS, int(targets * completion_per_target * 1.5) + 32)
+
+
+async def _score_chunk(
     source_signal_id: int,
-    source_details: Any,
-    target_signals: list[dict],  # [{"id": int, "details": Any}, ...]
+    source_text: str,
+    signal_ids: list[int],
+    target_texts: list[str],
+    priority: Priority,
+    rescore_attempts: int = _MISSING_RESCORE_ATTEMPTS,
 ) -> list[dict]:
     """
-    Oblicza współczynniki dopasowania dla wielu sygnałów naraz.
+    Jedno zapytanie do OpenAI dla paczki sygnałów docelowych.
+
+    Układ wiadomości: stałe instrukcje (system) -> sygnał źródłowy -> paczka
+    celów. Wszystkie paczki tego samego źródła (i kolejne zapytania o nie)
+    zaczynają się identycznym prefiksem, który OpenAI może wziąć z cache promptów.
+
+    Z uciętej albo niepełnej odpowiedzi zachowywane są wszystkie kompletne
+    wyniki, a o brakujące sygnały pytamy ponownie (`rescore_attempts` razy) -
+    tylko o nie, zamiast powtarzać całą paczkę.
+    """
+    targets_text = "\n\n".join(target_texts)
+    messages = [
+        {"role": "system", "content": _MATCH_SYSTEM_PROMPT},
+        {"role": "user", "content": source_text},
+        {"role": "user", "content": f"SYGNAŁY DOCELOWE:\n{targets_text}\n\nZwróć wyniki dla wszystkich sygnałów: {signal_ids}"},
+    ]
+
+    model = "gpt-4o-mini"
+    prompt_tokens = sum(count_tokens(m["content"]) for m in messages)
+    started = time.perf_counter()
+    try:
+        response = await chat_completion(
+            priority=priority,
+            model=model,
+            messages=messages,
+            temperature=0.3,
+            max_tokens=_completion_budget(len(signal_ids)),
+            response_format=_MATCH_RESPONSE_FORMAT,
+            # Kieruje zapytania o to samo źródło do tego samego cache prefiksów
+            prompt_cache_key=f"match:{source_signal_id}",
+        )
+    except Exception as e:
+        record_llm_call(operation="match_chunk", model=model, started=started,
+                        source_signal_id=source_signal_id, candidates=len(signal_ids), error=e)
+        raise
     
+    choice = response.choices[0]
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    print(
+        f"[LLM] Match chunk for signal {source_signal_id}: {len(signal_ids)} targets, "
+        f"prompt ~{prompt_tokens} tokens (usage: {usage.prompt_tokens if usage else '?'}, "
+        f"cached: {getattr(details, 'cached_tokens', None) or 0})"
+    )
+    _update_batch_stats(
+        prompt_tokens=prompt_tokens,
+        targets=len(signal_ids),
+        usage=usage,
+        truncated=choice.finish_reason == "length",
+    )
+
+    by_id, complete = _parse_chunk_results(choice.message.content, signal_ids)
+    missing = [sig_id for sig_id in signal_ids if sig_id not in by_id]
+    record_llm_call(
+        operation="match_chunk",
+        model=model,
+        started=started,
+        source_signal_id=source_signal_id,
+        candidates=len(signal_ids),
+        usage=usage,
+        finish_reason=choice.finish_reason,
+        parse_ok=complete,
+        missing_results=len(missing),
+    )
+
+    if missing and rescore_attempts > 0:
+        print(f"[LLM] Match chunk for signal {source_signal_id}: re-scoring {len(missing)} missing targets")
+        text_of = dict(zip(signal_ids, target_texts))
+        for result in await _score_chunk(
+            source_signal_id,
+            source_text,
+            missing,
+            [text_of[sig_id] for sig_id in missing],
+            priority,
+            rescore_attempts - 1,
+        ):
+            by_id[result["signal_id"]] = result
+
+    # Tylko sygnały z tej paczki, w jej kolejności; brakujące oznacz jako awaryjne
+    return [by_id.get(sig_id) or _fallback_matches([sig_id])[0] for sig_id in signal_ids]
+
+
+def _iter_json_objects(text: str) -> tuple[list[Any], bool]:
+    """
+    Kolejne kompletne obiekty z tablicy JSON (także uciętej w połowie).
+
     Returns:
-        list[dict]: [{"signal_id": int, "accurate": float, "details": dict}, ...]
+        (obiekty, czy tablica była kompletna)
     """
-    if not target_signals:
-        return []
-    
-    # Przygotuj listę sygnałów do oceny
-    targets_text = "\n\n".join([
-        f"SYGNAŁ ID {sig['id']}:\n{json.dumps(sig['details'], ensure_ascii=False, indent=2) if sig['details'] else 'Brak szczegółów'}"
-        for sig in target_signals
-    ])
-    
-    signal_ids = [sig['id'] for sig in target_signals]
-    
-    prompt = f"""Jesteś ekspertem od matchowania ludzi w ekosystemie startupowym.
+    start = text.find("[")
+    if start < 0:
+        return [], False
+    decoder = json.JSONDecoder()
+    items: list[Any] = []
+    pos = start + 1
+    while True:
+        while pos < len(text) and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(text):
+            return items, False
+        if text[pos] == "]":
+            return items, True
+        try:
+            item, pos = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            # Ucięty ostatni obiekt - zostają wcześniejsze
+            return items, False
+        items.append(item)
 
-Oceń dopasowanie sygnału źródłowego do każdego z sygnałów docelowych w skali 0-100.
 
-SYGNAŁ ŹRÓDŁOWY (ID: {source_signal_id}):
-{json.dumps(source_details, ensure_ascii=False, indent=2) if source_details else "Brak szczegółów"}
+def _parse_chunk_results(content: Optional[str], signal_ids: list[int]) -> tuple[dict[int, dict], bool]:
+    """
+    Wyniki z odpowiedzi modelu po signal_id - tylko dla sygnałów z paczki i z
+    poprawną liczbą w "accurate" (przyciętą do 0-100).
 
-SYGNAŁY DOCELOWE:
-{targets_text}
+    Odpowiedź jest czytana przyrostowo, więc z uciętej tablicy zostają
+    wszystkie kompletne obiekty. Akceptuje też format sprzed Structured Outputs
+    (sama tablica, ewentualnie w bloku markdown).
 
-Oceń każdy sygnał na podstawie:
-- Zgodności umiejętności/wymagań
-- Komplementarności ofert
-- Potencjału współpracy
+    Returns:
+        (wyniki po signal_id, czy odpowiedź była kompletnym JSON-em)
+    """
+    if content is None:
+        return {}, False
+    items, complete = _iter_json_objects(content)
+    if not items and not complete:
+        # Pojedynczy obiekt zamiast tablicy
+        try:
+            single = json.loads(content.strip().strip("`").removeprefix("json"))
+        except json.JSONDecodeError:
+            single = None
+        if isinstance(single, dict) and "signal_id" in single:
+            items, complete = [single], True
 
-Odpowiedz TYLKO w formacie JSON (tablica). Każde pole "accurate" musi mieć co najmniej jedno miejsce po przecinku (np. 82.4, 71.9) i nie powinno być zaokrąglane do pełnych dziesiątek, jeśli nie jest to konieczne:
-[{{"signal_id": <id>, "accurate": <liczba 0-100 z miejscami po przecinku>}}, ...]
+    wanted = set(signal_ids)
+    by_id: dict[int, dict] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            signal_id = int(item.get("signal_id"))
+            accurate = float(item.get("accurate"))
+        except (TypeError, ValueError):
+            continue
+        if signal_id not in wanted or accurate != accurate:  # NaN
+            continue
+        by_id[signal_id] = {
+            "signal_id": signal_id,
+            "accurate": min(100.0, max(0.0, accurate)),
+            "details": item.get("details", None),
+        }
+    return by_id, complete
 
-Zwróć wyniki dla wszystkich sygnałów: {signal_ids}"""
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "Odpowiadasz tylko w formacie JSON. Nie dodawaj żadnego tekstu przed ani po JSON."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.3,
-        max_tokens=500
+async def iter_bulk_signal_matches(
+    source_signal_id: int,
+    source_details: Any,
+    target_signals: list[dict],  # [{"id": int, "details": Any}, ...]
+    priority: Priority = Priority.INTERACTIVE,
+) -> AsyncIterator[list[dict]]:
+    """
+    Jak `calculate_bulk_signal_matches`, ale zwraca wyniki paczka po paczce,
+    w kolejności ukończenia zapytań (do streamowania wyników).
+
+    Yields:
+        list[dict]: wyniki jednej paczki [{"signal_id": int, "accurate": float, ...}, ...]
+    """
+    if not target_signals:
+        return
+
+    source_text = _format_signal(f"SYGNAŁ ŹRÓDŁOWY (ID: {source_signal_id})", source_details)
+    target_texts = [_format_signal(f"SYGNAŁ ID {sig['id']}", sig["details"]) for sig in target_signals]
+    signal_ids = [sig["id"] for sig in target_signals]
+
+    chunks = _chunk_targets(
+        count_tokens(source_text) + _PROMPT_OVERHEAD_TOKENS,
+        [count_tokens(text) for text in target_texts],
     )
+    tasks = [
+        asyncio.ensure_future(_score_chunk(
+            source_signal_id,
+            source_text,
+            [signal_ids[i] for i in chunk],
+            [target_texts[i] for i in chunk],
+            priority,
+        ))
+        for chunk in chunks
+    ]
+    try:
+        for next_chunk in asyncio.as_completed(tasks):
+            yield await next_chunk
+    finally:
+        # Konsument przestał czytać (np. rozłączony klient) - nie marnuj tokenów
+        for task in tasks:
+            task.cancel()
+
+
+async def calculate_bulk_signal_matches(
+    source_signal_id: int,
+    source_details: Any,
+    target_signals: list[dict],  # [{"id": int, "details": Any}, ...]
+    priority: Priority = Priority.INTERACTIVE,
+) -> list[dict]:
+    """
+    Oblicza współczynniki dopasowania dla wielu sygnałów naraz.
+
+    Sygnały docelowe są dzielone na paczki mieszczące się w budżecie tokenów,
+    oceniane równolegle (globalny limit LLM_MAX_CONCURRENCY w llm_gateway)
+    i scalane z powrotem w kolejności wejściowej.
     
-    content = response.choices[0].message.content
-    if content is None:
-        return [{"signal_id": sig_id, "accurate": 0.0, "details": None} for sig_id in signal_ids]
-    result_text = content.strip()
+    Returns:
+        list[dict]: [{"signal_id": int, "accurate": float, "details": dict}, ...]
+    """
+    if not target_signals:
+        return []
     
-    try:
-        # Usuń markdown code block jeśli istnieje
-        if result_text.startswith("```"):
-            result_text = result_text.split("```")[1]
-            if result_text.startswith("json"):
-                result_text = result_text[4:]
-        results = json.loads(result_text)
-        
-        # Upewnij się że mamy listę
-        if isinstance(results, dict):
-            results = [results]
-            
-        return [
-            {
-                "signal_id": r.get("signal_id"),
-                "accurate": float(r.get("accurate", 0)),
-                "details": r.get("details", None)
-            }
-            for r in results
-        ]
-    except (json.JSONDecodeError, ValueError):
-        # Fallback - zwróć 0 dla wszystkich
-        return [{"signal_id": sig_id, "accurate": 0.0, "details": None} for sig_id in signal_ids]
+    by_id: dict[int, dict] = {}
+    async for results in iter_bulk_signal_matches(source_signal_id, source_details, target_signals, priority):
+        for result in results:
+            by_id[result["signal_id"]] = result
+
+    # Scal w kolejności wejściowej
+    return [by_id[sig["id"]] for sig in target_signals]
+
+
+def _fallback_matches(signal_ids: list[int]) -> list[dict]:
+    """Wyniki awaryjne (accurate=0) - oznaczone flagą, żeby nie trafiły do cache."""
+    return [
+        {"signal_id": sig_id, "accurate": 0.0, "details": None, "fallback": True}
+        for sig_id in signal_ids
+    ]
 
 
 __all__ = [
-    "get_embedding",
+    "get_embeddings",
     "calculate_signal_match",
     "calculate_bulk_signal_matches",
+    "iter_bulk_signal_matches",
     "get_matching_category_ids",
     "SIGNAL_MATCHING",
 ]
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+Kompaktowa, kanoniczna serializacja `details` do promptów LLM i liczenie tokenów.
+
+Zamiast `json.dumps(..., indent=2)` (dużo tokenów samych białych znaków):
+- pomijane są pola bez znaczenia dla matchowania (linki, kontakt, typ)
+  oraz puste wartości,
+- klucze są sortowane, a JSON nie zawiera zbędnych spacji,
+- długie teksty są przycinane do LLM_TEXT_FIELD_MAX_CHARS znaków.
+
+Tokeny liczone są przez `tiktoken`, jeśli jest zainstalowany (opcjonalna
+zależność); w przeciwnym razie przybliżeniem ~4 znaki na token.
+"""
+import json
+from functools import lru_cache
+from typing import Any, Optional
+
+from config import settings
+
+try:
+    import tiktoken
+except ImportError:  # opcjonalna zależność
+    tiktoken = None
+
+
+# Pola zapisywane przez frontend/seedy, które nie wpływają na dopasowanie
+DROPPED_KEYS = frozenset({
+    "type",
+    "linkedin_url",
+    "website",
+    "email",
+    "phone",
+    "avatar",
+    "avatar_url",
+    "image",
+    "image_url",
+    "logo",
+    "url",
+    "created_at",
+    "updated_at",
+})
+
+_TRUNCATION_MARK = "…"
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """Przycina tekst do `max_chars` znaków, najlepiej na granicy słowa."""
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    space = cut.rfind(" ")
+    if space > max_chars // 2:
+        cut = cut[:space]
+    return cut.rstrip(" ,.;:-") + _TRUNCATION_MARK
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or (isinstance(value, (list, tuple, dict)) and not value)
+
+
+def compact_details(details: Any, max_text_chars: Optional[int] = None) -> Any:
+    """Zwraca `details` bez zbędnych pól i pustych wartości, z przyciętymi tekstami."""
+    if max_text_chars is None:
+        max_text_chars = settings.LLM_TEXT_FIELD_MAX_CHARS
+    if isinstance(details, dict):
+        compacted = {}
+        for key, value in details.items():
+            if str(key).lower() in DROPPED_KEYS:
+                continue
+            value = compact_details(value, max_text_chars)
+            if not _is_empty(value):
+                compacted[key] = value
+        return compacted
+    if isinstance(details, (list, tuple)):
+        return [
+            item for item in (compact_details(v, max_text_chars) for v in details)
+            if not _is_empty(item)
+        ]
+    if isinstance(details, str):
+        return _truncate(details.strip(), max_text_chars)
+    return details
+
+
+def encode_details(details: Any, max_text_chars: Optional[int] = None) -> str:
+    """Kanoniczny, kompaktowy JSON `details` do promptu ('Brak szczegółów' gdy pusto)."""
+    compacted = compact_details(details, max_text_chars)
+    if _is_empty(compacted):
+        return "Brak szczegółów"
+    return json.dumps(compacted, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str) -> Any:
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        # Nieznany model albo brak pliku BPE (np. bez sieci) - przybliżenie
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Liczba tokenów tekstu (dokładna z tiktoken, inaczej ~4 znaki na token)."""
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+__all__ = [
+    "DROPPED_KEYS",
+    "compact_details",
+    "encode_details",
+    "count_tokens",
+]
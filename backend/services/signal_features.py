@@ -0,0 +1,161 @@
+"""
+Normalizacja `details` przy zapisie sygnału i cechy w tabeli signal_features.
+
+`details` to JSON z frontu - suma pól inwestora, freelancera i pomysłu.
+Przy dodaniu sygnału payload jest sprowadzany do postaci kanonicznej, a hash
+treści, umiejętności, etap i przedziały kwot trafiają do tabeli pobocznej
+z indeksami. Pula kandydatów, filtry i cache dopasowań czytają te wartości
+zamiast parsować JSON przy każdym żądaniu.
+
+Sygnały zapisane z pominięciem API (seedy, starsze wiersze) uzupełnia
+`sync_signal_features` - przy starcie aplikacji i na końcu seedów.
+"""
+import re
+import unicodedata
+from typing import Any, Optional
+
+from sqlmodel import Session, col, select
+
+from models.signal import UserSignal
+from models.signal_features import SignalFeatures
+from services.heuristic import extract_features
+from services.match_cache import details_hash
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Cechy heurystyki będące przedziałami (reszta to zbiory terminów)
+_RANGE_FEATURES = ("budget", "funding", "hourly_rate")
+
+# Przedziały filtrowane w puli kandydatów: nazwa -> kolumny (min, max) signal_features
+RANGE_COLUMNS = {
+    "money": (SignalFeatures.money_min, SignalFeatures.money_max),
+    "hourly_rate": (SignalFeatures.hourly_rate_min, SignalFeatures.hourly_rate_max),
+}
+
+_SYNC_BATCH = 500
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def normalize_details(details: Any) -> Any:
+    """
+    Kanoniczna postać `details`: teksty w NFC bez zbędnych białych znaków,
+    bez pustych pól i powtórzeń na listach (kolejność pól i elementów zostaje).
+    """
+    if isinstance(details, str):
+        return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", details)).strip()
+    if isinstance(details, dict):
+        normalized = {}
+        for key, value in details.items():
+            value = normalize_details(value)
+            if not _is_empty(value):
+                normalized[normalize_details(key) if isinstance(key, str) else key] = value
+        return normalized
+    if isinstance(details, (list, tuple)):
+        items = []
+        for item in details:
+            item = normalize_details(item)
+            if not _is_empty(item) and item not in items:
+                items.append(item)
+        return items
+    return details
+
+
+def _serialize_features(features: dict) -> dict:
+    return {
+        name: (list(value) if name in _RANGE_FEATURES else sorted(value)) if value is not None else None
+        for name, value in features.items()
+    }
+
+
+def features_from_json(data: Optional[dict]) -> dict:
+    """Cechy heurystyki (jak `extract_features`) z kolumny `features`."""
+    if not data:
+        return {}
+    return {
+        name: (tuple(value) if name in _RANGE_FEATURES else set(value)) if value is not None else None
+        for name, value in data.items()
+    }
+
+
+def features_from_row(row: SignalFeatures) -> dict:
+    """Cechy heurystyki (jak `extract_features`) z zapisanego wiersza."""
+    return features_from_json(row.features)
+
+
+def signal_ranges(features: dict) -> dict[str, Optional[tuple[float, float]]]:
+    """Przedziały z `RANGE_COLUMNS` dla cech sygnału: kwota (budżet/ticket albo finansowanie) i stawka."""
+    return {
+        "money": features.get("budget") or features.get("funding"),
+        "hourly_rate": features.get("hourly_rate"),
+    }
+
+
+def build_signal_features(signal_id: int, details: Any) -> SignalFeatures:
+    """Wiersz signal_features dla `details` (już znormalizowanych - hash liczony z nich bez zmian)."""
+    features = extract_features(details)
+    ranges = signal_ranges(features)
+    money, hourly_rate = ranges["money"], ranges["hourly_rate"]
+    return SignalFeatures(
+        signal_id=signal_id,
+        details_hash=details_hash(details),
+        skills=sorted(features.get("skills", set()) | features.get("needed_skills", set())),
+        stage=sorted(features.get("stage", set()) | features.get("investment_stage", set())),
+        money_min=money[0] if money else None,
+        money_max=money[1] if money else None,
+        hourly_rate_min=hourly_rate[0] if hourly_rate else None,
+        hourly_rate_max=hourly_rate[1] if hourly_rate else None,
+        features=_serialize_features(features),
+    )
+
+
+def sync_signal_features(session: Session) -> int:
+    """Uzupełnia cechy sygnałów, które ich nie mają (zapisanych z pominięciem `add_signal`)."""
+    created = 0
+    while True:
+        rows = session.exec(
+            select(UserSignal.id, UserSignal.details)
+            .outerjoin(SignalFeatures, col(SignalFeatures.signal_id) == col(UserSignal.id))
+            .where(col(SignalFeatures.signal_id).is_(None))
+            .order_by(col(UserSignal.id))
+            .limit(_SYNC_BATCH)
+        ).all()
+        if not rows:
+            break
+        session.add_all([build_signal_features(signal_id, details) for signal_id, details in rows])
+        session.commit()
+        created += len(rows)
+    if created:
+        print(f"[Signals] Extracted features for {created} signals")
+    return created
+
+
+def range_conditions(bounds: dict[str, tuple[Optional[float], Optional[float]]]) -> list[Any]:
+    """
+    Warunki na indeksowanych kolumnach signal_features: przedział `name`
+    nachodzi na granice (min, max) z `bounds` (nazwy jak w `RANGE_COLUMNS`).
+    Granica None = bez ograniczenia; sygnał bez danej kwoty nie spełnia filtra na niej.
+    """
+    conditions = []
+    for name, (low, high) in bounds.items():
+        low_column, high_column = RANGE_COLUMNS[name]
+        conditions.append(col(high_column).is_not(None))
+        if low is not None:
+            conditions.append(col(high_column) >= low)
+        if high is not None:
+            conditions.append(col(low_column) <= high)
+    return conditions
+
+
+__all__ = [
+    "normalize_details",
+    "build_signal_features",
+    "features_from_json",
+    "features_from_row",
+    "sync_signal_features",
+    "RANGE_COLUMNS",
+    "signal_ranges",
+    "range_conditions",
+]
@@ -0,0 +1,268 @@
+"""
+Pula aktywnych sygnałów w pamięci procesu, pogrupowana po kategorii.
+
+Zamiast `select(UserSignal)` z pełnym `details` przy każdym żądaniu
+matchowania, kandydaci są wybierani z kolumnowych tablic kategorii
+(ID, właściciele) - odczyt z pamięci. Dla każdego sygnału trzymany jest
+też hash `details` i cechy heurystyki - z tabeli signal_features, a dla
+sygnałów jeszcze bez niej liczone raz przy wczytaniu. Z user_signal
+wczytywane są tylko kolumny potrzebne do matchowania (`_POOL_COLUMNS`),
+a wektory embeddingów prefiltr czyta z magazynu memmap, nie z puli.
+
+Odświeżanie jest przyrostowe: watermark (największe wczytane ID) dociąga
+sygnały dodane także w innych procesach, a co MATCH_SIGNAL_POOL_RECONCILE_SECONDS
+lista aktywnych ID (samo ID, bez `details`) usuwa sygnały dezaktywowane
+gdzie indziej i dociąga aktywne, których w puli brak - zapisy zatwierdzone
+poza kolejnością ID (niższe ID po wyższym) watermark pomija. W tym procesie
+usunięcie działa od razu (`remove`).
+"""
+import threading
+import time
+from typing import Any, Iterable, Optional
+
+import numpy as np
+from sqlalchemy.orm import load_only
+from sqlmodel import Session, col, select
+
+from config import settings
+from models.signal import UserSignal
+from models.signal_features import SignalFeatures
+from services.heuristic import (
+    FeatureMatrix,
+    complementary_mask,
+    extract_features,
+    score_feature_matrix,
+    score_features,
+)
+from services.match_cache import details_hash
+from services.signal_features import features_from_row, signal_ranges
+
+
+# Kolumny user_signal trzymane w puli: ID, właściciel i kategoria do wyboru
+# kandydatów oraz `details` - treść dla scoringu LLM i odpowiedzi endpointów
+_POOL_COLUMNS = (UserSignal.id, UserSignal.user_id, UserSignal.signal_category_id, UserSignal.details)
+
+
+def _pool_query() -> Any:
+    """Aktywne sygnały z cechami (tylko kolumny puli)."""
+    return (
+        select(UserSignal, SignalFeatures)
+        .outerjoin(SignalFeatures, col(SignalFeatures.signal_id) == col(UserSignal.id))
+        .options(
+            load_only(*_POOL_COLUMNS),
+            load_only(SignalFeatures.details_hash, SignalFeatures.features),
+        )
+        .where(UserSignal.is_active == True)  # noqa: E712
+    )
+
+
+class _CategoryColumns:
+    """Kolumny jednej kategorii (posortowane po ID), przebudowywane po zmianie."""
+
+    def __init__(self, signals: list[UserSignal], features: dict[int, dict[str, Any]]) -> None:
+        self.signals = sorted(signals, key=lambda sig: sig.id)
+        self.ids = np.fromiter((sig.id for sig in self.signals), dtype=np.int64, count=len(self.signals))
+        self.user_ids = np.fromiter((sig.user_id for sig in self.signals), dtype=np.int64, count=len(self.signals))
+        self._features = features
+        self._matrix: Optional[FeatureMatrix] = None
+        self._ranges: Optional[dict[str, tuple[np.ndarray, np.ndarray]]] = None
+
+    @property
+    def matrix(self) -> FeatureMatrix:
+        """Cechy heurystyki w kolumnach (budowane przy pierwszym użyciu)."""
+        if self._matrix is None:
+            self._matrix = FeatureMatrix([self._features[sig.id] for sig in self.signals])
+        return self._matrix
+
+    @property
+    def ranges(self) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        """Przedziały `signal_ranges` w kolumnach (min, max); NaN = brak danych."""
+        if self._ranges is None:
+            rows = [signal_ranges(self._features[sig.id]) for sig in self.signals]
+            self._ranges = {}
+            for name in ("money", "hourly_rate"):
+                bounds = np.array([row[name] or (np.nan, np.nan) for row in rows], dtype=np.float64).reshape(-1, 2)
+                self._ranges[name] = (bounds[:, 0], bounds[:, 1])
+        return self._ranges
+
+
+class SignalPool:
+    """Aktywne sygnały po kategorii + hash `details` i cechy każdego z nich."""
+
+    def __init__(self) -> None:
+        self._by_category: dict[int, dict[int, UserSignal]] = {}
+        self._columns: dict[int, _CategoryColumns] = {}
+        self._category_of: dict[int, int] = {}
+        self._hashes: dict[int, str] = {}
+        self._features: dict[int, dict[str, Any]] = {}
+        self._watermark = 0
+        self._last_reconcile = 0.0
+        # remove_signal jest synchroniczny (threadpool) - chroni struktury przed równoległą zmianą
+        self._lock = threading.Lock()
+
+    def _add_locked(self, signal: UserSignal, features: Optional[SignalFeatures]) -> None:
+        self._remove_locked(signal.id)
+        self._by_category.setdefault(signal.signal_category_id, {})[signal.id] = signal
+        self._category_of[signal.id] = signal.signal_category_id
+        if features is not None:
+            self._hashes[signal.id] = features.details_hash
+            self._features[signal.id] = features_from_row(features)
+        else:
+            self._hashes[signal.id] = details_hash(signal.details)
+            self._features[signal.id] = extract_features(signal.details)
+        self._columns.pop(signal.signal_category_id, None)
+
+    def _remove_locked(self, signal_id: int) -> None:
+        category_id = self._category_of.pop(signal_id, None)
+        if category_id is None:
+            return
+        self._by_category[category_id].pop(signal_id, None)
+        self._hashes.pop(signal_id, None)
+        self._features.pop(signal_id, None)
+        self._columns.pop(category_id, None)
+
+    def remove(self, signal_id: int) -> None:
+        with self._lock:
+            self._remove_locked(signal_id)
+
+    def sync(self, session: Session) -> None:
+        """
+        Dociąga sygnały o ID powyżej watermarku (pierwsze wywołanie = pełne
+        wczytanie), a okresowo usuwa sygnały dezaktywowane w innych procesach
+        i dociąga aktywne, które watermark pominął.
+        """
+        # Własna sesja - obiekty puli są współdzielone między żądaniami i nie mogą
+        # należeć do sesji żądania (po jej zamknięciu zostają odłączone z danymi)
+        with Session(session.get_bind()) as read_session:
+            rows = list(read_session.exec(
+                _pool_query().where(col(UserSignal.id) > self._watermark).order_by(col(UserSignal.id))
+            ).all())
+            reconcile = time.monotonic() - self._last_reconcile >= settings.MATCH_SIGNAL_POOL_RECONCILE_SECONDS
+            active_ids = (
+                set(read_session.exec(select(UserSignal.id).where(UserSignal.is_active == True)).all())  # noqa: E712
+                if reconcile and self._watermark else None
+            )
+            if active_ids is not None:
+                # Transakcja z niższym ID zatwierdzona po wczytaniu wyższego - watermark już ją minął
+                with self._lock:
+                    missing = active_ids - self._category_of.keys() - {signal.id for signal, _ in rows}
+                if missing:
+                    rows.extend(read_session.exec(_pool_query().where(col(UserSignal.id).in_(missing))).all())
+
+        with self._lock:
+            for signal, features in rows:
+                self._add_locked(signal, features)
+            if rows:
+                self._watermark = max(self._watermark, max(signal.id for signal, _ in rows))
+            if reconcile:
+                self._last_reconcile = time.monotonic()
+            if active_ids is not None:
+                for signal_id in set(self._category_of) - active_ids:
+                    self._remove_locked(signal_id)
+
+    def _columns_locked(self, category_id: int) -> _CategoryColumns:
+        columns = self._columns.get(category_id)
+        if columns is None:
+            columns = _CategoryColumns(list(self._by_category.get(category_id, {}).values()), self._features)
+            self._columns[category_id] = columns
+        return columns
+
+    def candidates(
+        self,
+        category_ids: Iterable[int],
+        exclude_user_id: int,
+        candidate_ids: Optional[Iterable[int]] = None,
+        ranges: Optional[dict[str, tuple[Optional[float], Optional[float]]]] = None,
+    ) -> list[UserSignal]:
+        """
+        Aktywne sygnały z kategorii (bez sygnałów danego użytkownika), opcjonalnie
+        tylko o podanych ID i o przedziałach nachodzących na `ranges` - te same
+        warunki co `range_conditions`, liczone na kolumnach puli.
+        """
+        allowed = None if candidate_ids is None else np.fromiter(candidate_ids, dtype=np.int64)
+        result: list[UserSignal] = []
+        with self._lock:
+            for category_id in category_ids:
+                columns = self._columns_locked(category_id)
+                mask = columns.user_ids != exclude_user_id
+                for name, (low, high) in (ranges or {}).items():
+                    range_low, range_high = columns.ranges[name]
+                    mask &= ~np.isnan(range_high)
+                    if low is not None:
+                        mask &= range_high >= low
+                    if high is not None:
+                        mask &= range_low <= high
+                if allowed is not None:
+                    mask &= np.isin(columns.ids, allowed)
+                result.extend(columns.signals[i] for i in np.flatnonzero(mask))
+        return result
+
+    def complementary_ids(
+        self,
+        source: dict[str, Any],
+        category_ids: Iterable[int],
+        exclude_user_id: int,
+    ) -> set[int]:
+        """ID sygnałów z kategorii (bez sygnałów danego użytkownika) uzupełniających źródło (`complementary_mask`)."""
+        result: set[int] = set()
+        with self._lock:
+            for category_id in category_ids:
+                columns = self._columns_locked(category_id)
+                mask = complementary_mask(source, columns.matrix) & (columns.user_ids != exclude_user_id)
+                result.update(columns.ids[mask].tolist())
+        return result
+
+    def details_hash(self, signal: UserSignal) -> str:
+        """Hash `details` sygnału - z puli, jeśli to jej obiekt, inaczej liczony."""
+        with self._lock:
+            if self._pooled_locked(signal):
+                return self._hashes[signal.id]
+        return details_hash(signal.details)
+
+    def features(self, signal: UserSignal) -> dict[str, Any]:
+        """Cechy heurystyki sygnału - z puli, jeśli to jej obiekt, inaczej liczone."""
+        with self._lock:
+            if self._pooled_locked(signal):
+                return self._features[signal.id]
+        return extract_features(signal.details)
+
+    def heuristic_scores(self, source: dict[str, Any], signals: list[UserSignal]) -> np.ndarray:
+        """
+        Wyniki heurystyki (`score_features`) źródła o cechach `source` dla
+        `signals` - dla sygnałów z puli liczone naraz na kolumnach kategorii,
+        dla pozostałych para po parze.
+        """
+        scores = np.empty(len(signals))
+        rest: list[int] = []
+        with self._lock:
+            by_category: dict[int, tuple[list[int], list[int]]] = {}
+            for position, sig in enumerate(signals):
+                signal_id = sig.id
+                category_id = self._category_of.get(signal_id)
+                if category_id is not None and self._by_category[category_id].get(signal_id) is sig:
+                    positions, ids = by_category.setdefault(category_id, ([], []))
+                    positions.append(position)
+                    ids.append(signal_id)
+                else:
+                    rest.append(position)
+            for category_id, (positions, ids) in by_category.items():
+                columns = self._columns_locked(category_id)
+                rows = np.searchsorted(columns.ids, ids)
+                scores[positions] = score_feature_matrix(source, columns.matrix)[rows]
+        for position in rest:
+            scores[position] = score_features(source, extract_features(signals[position].details))
+        return scores
+
+    def _pooled_locked(self, signal: UserSignal) -> bool:
+        category_id = self._category_of.get(signal.id)
+        return category_id is not None and self._by_category[category_id].get(signal.id) is signal
+
+
+# Pula współdzielona w procesie
+signal_pool = SignalPool()
+
+
+__all__ = [
+    "SignalPool",
+    "signal_pool",
+]
@@ -0,0 +1,40 @@
+"""
+Single-flight - łączenie identycznych, równoległych obliczeń w jedno.
+
+Pierwsze wywołanie dla danego klucza uruchamia obliczenie, kolejne (do
+jego zakończenia) czekają na ten sam wynik lub wyjątek. Po zakończeniu
+klucz jest zapominany - to nie jest cache. Anulowanie czekającego (np.
+przez `asyncio.wait_for`) nie przerywa obliczenia - trwa dalej dla
+pozostałych i do końca.
+"""
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Współdzieli wynik trwającego obliczenia między wywołaniami z tym samym kluczem."""
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Task[T]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Czeka na trwające obliczenie dla klucza albo uruchamia nowe."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # shield: anulowanie jednego z czekających nie przerywa obliczenia pozostałym
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task[T]) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Odczyt wyjątku - bez ostrzeżenia, gdy wszyscy czekający zostali anulowani
+        if not task.cancelled():
+            task.exception()
+
+
+__all__ = ["SingleFlight"]
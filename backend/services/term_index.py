@@ -0,0 +1,175 @@
+"""
+Odwrócony indeks terminów sygnałów (umiejętności, obszary, czego szukają)
+do generowania kandydatów przed scoringiem.
+
+Filtr kandydatów na umiejętności zamieniany jest na warunek `id IN (...)`
+(kwoty filtruje baza - kolumny tabeli signal_features).
+
+Indeks żyje w pamięci procesu: przy pierwszym użyciu wczytuje aktywne
+sygnały z bazy, potem jest aktualizowany przy dodaniu/usunięciu sygnału.
+Watermark (największe wczytane ID) pozwala dociągnąć sygnały dodane
+z innego procesu (seedy, inne workery). Co MATCH_SIGNAL_POOL_RECONCILE_SECONDS
+lista aktywnych ID dociąga sygnały zatwierdzone poza kolejnością ID (niższe
+ID po wyższym - watermark je pomija) i usuwa dezaktywowane w innym procesie;
+do tego czasu te ostatnie odfiltrowuje zapytanie o pulę (`is_active`).
+"""
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Iterable
+
+from sqlmodel import Session, col, select
+
+from config import settings
+from models.signal import UserSignal
+from services.heuristic import normalize_term
+
+# Pola `details`, z których budowane są terminy (tech_stack / tech_requirements
+# to odpowiedniki needed_skills w danych z seedów)
+INDEXED_FIELDS = (
+    "skills",
+    "needed_skills",
+    "focus_areas",
+    "categories",
+    "looking_for",
+    "tech_stack",
+    "tech_requirements",
+)
+
+_WORD_SPLIT_RE = re.compile(r"[\s/,;|()+&-]+")
+_MIN_TERM_LENGTH = 2
+_STOP_WORDS = frozenset({
+    "and", "or", "the", "for", "with", "of",
+    "dla", "do", "na", "lub", "oraz", "kto", "który", "się", "jak", "ze", "od",
+})
+
+
+def _item_terms(item: Any) -> set[str]:
+    """Terminy jednej wartości: całość ('AI/ML' -> 'aiml') i pojedyncze słowa ('ai', 'ml')."""
+    text = str(item)
+    terms = {normalize_term(text)}
+    terms.update(normalize_term(word) for word in _WORD_SPLIT_RE.split(text))
+    return {t for t in terms if len(t) >= _MIN_TERM_LENGTH and t not in _STOP_WORDS}
+
+
+def _value_terms(value: Any) -> set[str]:
+    if value is None or isinstance(value, bool):
+        return set()
+    if isinstance(value, dict):
+        return set().union(*(_value_terms(v) for v in value.values()))
+    if isinstance(value, (list, tuple, set)):
+        return set().union(*(_value_terms(v) for v in value))
+    return _item_terms(value)
+
+
+def signal_terms(details: Any) -> frozenset[str]:
+    """Znormalizowane terminy sygnału; dla `details` niebędących obiektem - z całej treści."""
+    if isinstance(details, dict):
+        return frozenset(set().union(*(_value_terms(details.get(field)) for field in INDEXED_FIELDS)))
+    return frozenset(_value_terms(details))
+
+
+class TermIndex:
+    """Termin -> ID aktywnych sygnałów; do tego kategoria i właściciel każdego sygnału."""
+
+    def __init__(self) -> None:
+        self._postings: dict[str, set[int]] = defaultdict(set)
+        self._signals: dict[int, tuple[int, int, frozenset[str]]] = {}  # id -> (kategoria, user_id, terminy)
+        self._watermark = 0
+        self._last_reconcile = 0.0
+        # remove_signal jest synchroniczny (threadpool) - chroni struktury przed równoległą zmianą
+        self._lock = threading.Lock()
+
+    def add(self, signal_id: int, signal_category_id: int, user_id: int, details: Any) -> None:
+        terms = signal_terms(details)
+        with self._lock:
+            self._remove_locked(signal_id)
+            self._signals[signal_id] = (signal_category_id, user_id, terms)
+            for term in terms:
+                self._postings[term].add(signal_id)
+
+    def remove(self, signal_id: int) -> None:
+        with self._lock:
+            self._remove_locked(signal_id)
+
+    def _remove_locked(self, signal_id: int) -> None:
+        entry = self._signals.pop(signal_id, None)
+        if entry is None:
+            return
+        for term in entry[2]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.discard(signal_id)
+                if not postings:
+                    del self._postings[term]
+
+    def sync(self, session: Session) -> None:
+        """
+        Dociąga sygnały o ID powyżej watermarku (pierwsze wywołanie = pełne
+        wczytanie), a okresowo także aktywne sygnały, które watermark pominął,
+        i usuwa dezaktywowane w innych procesach.
+        """
+        query = select(
+            UserSignal.id, UserSignal.signal_category_id, UserSignal.user_id,
+            UserSignal.details, UserSignal.is_active,
+        )
+        rows = list(session.exec(
+            query.where(col(UserSignal.id) > self._watermark).order_by(col(UserSignal.id))
+        ).all())
+        reconcile = time.monotonic() - self._last_reconcile >= settings.MATCH_SIGNAL_POOL_RECONCILE_SECONDS
+        inactive: set[int] = set()
+        if reconcile and self._watermark:
+            active_ids = set(session.exec(select(UserSignal.id).where(UserSignal.is_active == True)).all())  # noqa: E712
+            with self._lock:
+                indexed = set(self._signals)
+            missing = active_ids - indexed - {row[0] for row in rows}
+            if missing:
+                rows.extend(session.exec(query.where(col(UserSignal.id).in_(missing))).all())
+            inactive = indexed - active_ids
+
+        for signal_id, signal_category_id, user_id, details, is_active in rows:
+            if is_active:
+                self.add(signal_id, signal_category_id, user_id, details)
+        for signal_id in inactive:
+            self.remove(signal_id)
+        with self._lock:
+            if rows:
+                self._watermark = max(self._watermark, max(row[0] for row in rows))
+            if reconcile:
+                self._last_reconcile = time.monotonic()
+
+    def candidate_ids(
+        self,
+        terms: Iterable[str],
+        category_ids: Iterable[int],
+        exclude_user_id: int,
+    ) -> set[int]:
+        """ID sygnałów z podanych kategorii (nie danego użytkownika), które mają wspólny termin."""
+        categories = set(category_ids)
+        with self._lock:
+            ids = set().union(*(self._postings.get(term, ()) for term in terms))
+            return {
+                signal_id for signal_id in ids
+                if self._signals[signal_id][0] in categories and self._signals[signal_id][1] != exclude_user_id
+            }
+
+    def filter_ids(self, required_terms: Iterable[str] = ()) -> set[int]:
+        """ID sygnałów, które mają wszystkie `required_terms` (bez terminów - wszystkie sygnały)."""
+        with self._lock:
+            required = list(required_terms)
+            if required:
+                return set.intersection(*(set(self._postings.get(term, ())) for term in required))
+            return set(self._signals)
+
+
+# Indeks współdzielony w procesie
+term_index = TermIndex()
+
+
+__all__ = [
+    "INDEXED_FIELDS",
+    "signal_terms",
+    "TermIndex",
+    "term_index",
+]
@@ -0,0 +1,221 @@
+"""
+Magazyn embeddingów sygnałów w pliku mapowanym w pamięci (np.memmap).
+
+Wektory są normalizowane (cosine = iloczyn skalarny) i kwantyzowane do
+float16 albo int8 (ze skalą na wiersz), zapisane ciągiem w `vectors.bin`.
+`rows.bin` trzyma dla każdego wiersza ID sygnału, skalę i flagę aktywności.
+
+Pliki są tylko dopisywane - workery uvicorna mapują je współdzielenie
+i po zmianie rozmiaru mapują ponownie. Liczbę wierszy wyznacza `rows.bin`:
+wiersz N zawsze zapisywany jest na pozycji N obu plików (nie na końcu),
+więc wektor lub wiersz urwany przez awarię zostaje nadpisany przy kolejnym
+zapisie i nie przesuwa kolejnych wpisów. Usunięcie sygnału to tombstone
+(flaga w `rows.bin`), a nowy embedding tego samego sygnału to tombstone
+starego wiersza + nowy wiersz. Zapisy między procesami serializuje flock.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows - blokada tylko w obrębie procesu
+    fcntl = None
+
+DTYPES = {"float16": np.float16, "int8": np.int8}
+
+_ROW_DTYPE = np.dtype([("id", "<i8"), ("scale", "<f4"), ("alive", "u1")])
+
+
+def _write_at(path: str, offset: int, data: bytes) -> None:
+    """Zapisuje `data` od pozycji `offset` i obcina plik za nimi."""
+    with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+        f.seek(offset)
+        f.write(data)
+        f.truncate()
+
+
+class VectorStore:
+    """Embeddingi w memmapie: ID sygnału -> wiersz, wyszukiwanie top-k po cosine."""
+
+    def __init__(self, path: str, dtype: str = "float16") -> None:
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        self.path = path
+        self.dtype = dtype
+        self._vectors_path = os.path.join(path, "vectors.bin")
+        self._rows_path = os.path.join(path, "rows.bin")
+        self._meta_path = os.path.join(path, "meta.json")
+        self._lock = threading.Lock()
+        self._dim: Optional[int] = None
+        self._count = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._rows: Optional[np.ndarray] = None
+        self._row_of: dict[int, int] = {}
+
+    # --- mapowanie plików ---
+
+    def _load_meta(self) -> bool:
+        if self._dim is not None:
+            return True
+        if not os.path.exists(self._meta_path):
+            return False
+        with open(self._meta_path) as f:
+            meta = json.load(f)
+        if meta["dtype"] != self.dtype:
+            raise ValueError(f"Store at {self.path} holds {meta['dtype']} vectors, not {self.dtype}")
+        self._dim = int(meta["dim"])
+        return True
+
+    def _refresh(self) -> None:
+        """Mapuje ponownie pliki, jeśli inny proces (lub ten) dopisał wiersze."""
+        if not self._load_meta() or not os.path.exists(self._rows_path):
+            return
+        # Tylko pełne wiersze, które mają też pełny wektor (urwany zapis jest pomijany)
+        count = min(
+            os.path.getsize(self._rows_path) // _ROW_DTYPE.itemsize,
+            os.path.getsize(self._vectors_path) // (self._dim * np.dtype(DTYPES[self.dtype]).itemsize)
+            if os.path.exists(self._vectors_path) else 0,
+        )
+        if count == self._count:
+            return
+        rows = np.memmap(self._rows_path, dtype=_ROW_DTYPE, mode="r", shape=(count,))
+        vectors = np.memmap(
+            self._vectors_path, dtype=DTYPES[self.dtype], mode="r", shape=(count, self._dim)
+        )
+        for row in range(self._count, count):
+            self._row_of[int(rows["id"][row])] = row
+        self._rows, self._vectors, self._count = rows, vectors, count
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, open(os.path.join(self.path, "lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # --- kwantyzacja ---
+
+    def _quantize(self, vector: np.ndarray) -> tuple[np.ndarray, float]:
+        norm = float(np.linalg.norm(vector))
+        unit = vector / norm if norm else vector
+        if self.dtype == "float16":
+            return unit.astype(np.float16), 1.0
+        peak = float(np.abs(unit).max()) if unit.size else 0.0
+        scale = peak / 127 if peak else 1.0
+        return np.round(unit / scale).astype(np.int8), scale
+
+    def _dequantize(self, rows: np.ndarray) -> np.ndarray:
+        matrix = self._vectors[rows].astype(np.float32)
+        if self.dtype == "int8":
+            matrix *= self._rows["scale"][rows][:, None]
+        return matrix
+
+    # --- zapis ---
+
+    def _tombstone_locked(self, signal_id: int) -> None:
+        row = self._row_of.get(signal_id)
+        if row is None or not self._rows["alive"][row]:
+            return
+        rows = np.memmap(self._rows_path, dtype=_ROW_DTYPE, mode="r+", shape=(self._count,))
+        rows["alive"][row] = 0
+        rows.flush()
+        del rows
+
+    def append(self, signal_id: int, embedding: Iterable[float]) -> None:
+        """Dopisuje embedding sygnału (poprzedni wiersz tego sygnału dostaje tombstone)."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._write_lock():
+            self._refresh()
+            if self._dim is None:
+                with open(self._meta_path, "w") as f:
+                    json.dump({"dim": int(vector.shape[0]), "dtype": self.dtype}, f)
+                self._dim = int(vector.shape[0])
+            if vector.shape != (self._dim,):
+                raise ValueError(f"Embedding has {vector.shape[0]} dimensions, store expects {self._dim}")
+
+            self._tombstone_locked(signal_id)
+            quantized, scale = self._quantize(vector)
+            # Najpierw wektor, potem wiersz - czytelnik widzi tylko kompletne wpisy.
+            # Pozycje z liczby wierszy, nie z końca pliku: resztki po przerwanym
+            # zapisie są nadpisywane zamiast przesuwać wektory względem wierszy.
+            _write_at(self._vectors_path, self._count * quantized.nbytes, quantized.tobytes())
+            _write_at(
+                self._rows_path, self._count * _ROW_DTYPE.itemsize,
+                np.array([(signal_id, scale, 1)], dtype=_ROW_DTYPE).tobytes(),
+            )
+            self._refresh()
+
+    def tombstone(self, signal_id: int) -> None:
+        """Oznacza embedding sygnału jako usunięty (miejsce odzyska dopiero przebudowa)."""
+        if not os.path.exists(self._rows_path):
+            return
+        with self._write_lock():
+            self._refresh()
+            self._tombstone_locked(signal_id)
+
+    # --- odczyt ---
+
+    def _live_row(self, signal_id: int) -> Optional[int]:
+        row = self._row_of.get(signal_id)
+        if row is None or not self._rows["alive"][row]:
+            return None
+        return row
+
+    def __contains__(self, signal_id: int) -> bool:
+        with self._lock:
+            self._refresh()
+            return self._live_row(signal_id) is not None
+
+    def get(self, signal_id: int) -> Optional[np.ndarray]:
+        """Znormalizowany embedding sygnału (float32) albo None."""
+        with self._lock:
+            self._refresh()
+            row = self._live_row(signal_id)
+            return None if row is None else self._dequantize(np.array([row]))[0]
+
+    def top_k(self, query: Iterable[float], signal_ids: Iterable[int], k: int) -> list[int]:
+        """
+        ID k sygnałów spośród `signal_ids` najbliższych (cosine) do `query`,
+        malejąco po podobieństwie. Sygnały bez embeddingu w magazynie są pomijane.
+        """
+        with self._lock:
+            self._refresh()
+            pairs = [(sid, self._live_row(sid)) for sid in signal_ids]
+            pairs = [(sid, row) for sid, row in pairs if row is not None]
+            if not pairs or k <= 0:
+                return []
+            q = np.asarray(query, dtype=np.float32)
+            norm = float(np.linalg.norm(q))
+            if norm:
+                q = q / norm
+            scores = self._dequantize(np.array([row for _, row in pairs])) @ q
+
+        k = min(k, len(pairs))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [pairs[i][0] for i in top[np.argsort(-scores[top])]]
+
+
+# Magazyn współdzielony w procesie; None = wyłączony (EMBEDDING_STORE_PATH puste)
+embedding_store: Optional[VectorStore] = (
+    VectorStore(settings.EMBEDDING_STORE_PATH, settings.EMBEDDING_STORE_DTYPE)
+    if settings.EMBEDDING_STORE_PATH else None
+)
+
+
+__all__ = [
+    "DTYPES",
+    "VectorStore",
+    "embedding_store",
+]
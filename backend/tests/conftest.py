@@ -0,0 +1,79 @@
+"""
+Wspólne fixture testów backendu.
+
+Testy działają bez sieci i bez Postgresa: baza to plik SQLite w katalogu
+tymczasowym, a klient OpenAI rozmawia z `scripts/openai_stub.py` (tryb
+synth) przez transport ASGI - bez uruchamiania serwera.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+# Konfiguracja czytana przy imporcie `config` - musi być ustawiona przed importem aplikacji
+_TMP_DIR = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/test.db"
+os.environ["OPENAI_KEY"] = "test"
+os.environ["EMBEDDING_CACHE_PATH"] = ""
+os.environ["EMBEDDING_STORE_PATH"] = ""
+os.environ["LLM_LEDGER_ENABLED"] = "false"
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / "scripts"))
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from openai import AsyncOpenAI  # noqa: E402
+from sqlmodel import Session  # noqa: E402
+
+import main  # noqa: E402
+from openai_stub import create_app  # noqa: E402
+from services import llm_gateway  # noqa: E402
+from services.db import engine  # noqa: E402
+
+
+def _stub_args() -> argparse.Namespace:
+    return argparse.Namespace(
+        mode="synth", recordings=None, strict=False, upstream="", latency="0", error_rate=0.0, seed=0,
+    )
+
+
+@pytest.fixture(scope="session")
+def openai_stub():
+    """Aplikacja stuba OpenAI (statystyki zapytań pod GET /stats)."""
+    return create_app(_stub_args())
+
+
+@pytest.fixture(scope="session")
+def client(openai_stub):
+    """Klient API z bazą SQLite i klientem OpenAI wpiętym w stub."""
+    with TestClient(main.app) as test_client:
+        llm_gateway._client = AsyncOpenAI(
+            api_key="test",
+            base_url="http://openai-stub/v1",
+            http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=openai_stub)),
+        )
+        yield test_client
+
+
+@pytest.fixture
+def session(client):
+    """Sesja bazy testowej (tabele tworzy start aplikacji w `client`)."""
+    with Session(engine) as db_session:
+        yield db_session
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Fabryka nagłówków autoryzacji dla nowych użytkowników."""
+    def create_user() -> dict[str, str]:
+        name = f"user-{uuid.uuid4().hex[:12]}"
+        email = f"{name}@example.com"
+        client.post("/api/v1/auth/register", json={"username": name, "email": email, "password": "12345678"})
+        token = client.post("/api/v1/auth/login", json={"email": email, "password": "12345678"}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+    return create_user
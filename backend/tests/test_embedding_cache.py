@@ -0,0 +1,45 @@
+"""Dyskowy cache embeddingów - klucze kanoniczne i odporność na przerwany zapis."""
+import os
+
+from services.embedding_cache import EmbeddingCache, canonical_embedding_text, embedding_cache_key
+
+
+def _key(text: str) -> bytes:
+    return embedding_cache_key(canonical_embedding_text(text), "test-model")
+
+
+def test_canonical_text_shares_key():
+    assert _key("  Python   developer\n") == _key("Python developer")
+    assert _key("Python developer") != embedding_cache_key("Python developer", "other-model")
+
+
+def test_round_trip_across_instances(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.put_many({_key("a"): [1.0, 2.0], _key("b"): [3.0, 4.0, 5.0]})
+    cache.put_many({_key("a"): [9.0, 9.0]})  # już obecny - pomijany
+
+    other = EmbeddingCache(str(tmp_path))
+    assert len(other) == 2
+    assert other.get_many([_key("a"), _key("b"), _key("c")]) == {
+        _key("a"): [1.0, 2.0],
+        _key("b"): [3.0, 4.0, 5.0],
+    }
+
+
+def test_torn_record_does_not_shift_later_records(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.put_many({_key("a"): [1.0, 2.0]})
+    # Zapis przerwany w połowie nagłówka kolejnego rekordu
+    with open(os.path.join(str(tmp_path), "embeddings.bin"), "ab") as f:
+        f.write(_key("torn")[:20])
+
+    reopened = EmbeddingCache(str(tmp_path))
+    reopened.put_many({_key("b"): [3.0, 4.0]})
+    reopened.put_many({_key("c"): [5.0, 6.0]})
+
+    fresh = EmbeddingCache(str(tmp_path))
+    assert fresh.get_many([_key("a"), _key("b"), _key("c"), _key("torn")]) == {
+        _key("a"): [1.0, 2.0],
+        _key("b"): [3.0, 4.0],
+        _key("c"): [5.0, 6.0],
+    }
@@ -0,0 +1,67 @@
+"""Scorer heurystyczny - wyniki pary i zgodność wersji kolumnowej z wersją para po parze."""
+import numpy as np
+import pytest
+
+from services.heuristic import (
+    FeatureMatrix,
+    calculate_heuristic_matches,
+    complementary_mask,
+    extract_features,
+    score_feature_matrix,
+    score_features,
+)
+
+FREELANCER = {"skills": ["Python", "React"], "hourly_rate": 100, "categories": ["fintech"]}
+IDEA = {"needed_skills": ["python"], "funding_min": 1000, "funding_max": 5000, "categories": ["fintech"], "stage": "seed"}
+INVESTOR = {"investment_stage": ["seed", "series a"], "budget_min": 2000, "budget_max": 10000, "focus_areas": ["fintech"]}
+
+TARGETS = [
+    IDEA,
+    INVESTOR,
+    FREELANCER,
+    {"needed_skills": ["go", "python"], "funding_needed": "10k-50k", "categories": ["health"]},
+    {"skills": ["react"], "hourly_rate": "80-120"},
+    {"stage": "late seed", "funding_min": 20000, "funding_max": 30000},
+    {"budget_min": 0, "budget_max": 0},
+    {},
+    "not a dict",
+]
+
+
+def test_score_pair():
+    # skills 1.0 (0.4), focus 1.0 (0.25), stawka: 5000 / 100 = 50 z 500 h (0.1 * 0.1)
+    assert score_features(extract_features(FREELANCER), extract_features(IDEA)) == 88.0
+
+
+def test_score_is_symmetric():
+    a, b = extract_features(INVESTOR), extract_features(IDEA)
+    assert score_features(a, b) == score_features(b, a)
+
+
+def test_score_without_common_data():
+    assert score_features(extract_features(FREELANCER), extract_features({})) == 0.0
+
+
+@pytest.mark.parametrize("source", TARGETS)
+def test_matrix_matches_pairwise(source):
+    features = [extract_features(details) for details in TARGETS]
+    expected = [score_features(extract_features(source), target) for target in features]
+    scores = score_feature_matrix(extract_features(source), FeatureMatrix(features))
+    assert scores.tolist() == expected
+
+
+def test_calculate_heuristic_matches():
+    results = calculate_heuristic_matches(1, FREELANCER, [{"id": 2, "details": IDEA}, {"id": 3, "details": {}}])
+    assert results == [
+        {"signal_id": 2, "accurate": 88.0, "details": None},
+        {"signal_id": 3, "accurate": 0.0, "details": None},
+    ]
+
+
+def test_complementary_mask():
+    features = [extract_features(details) for details in TARGETS]
+    mask = complementary_mask(extract_features(INVESTOR), FeatureMatrix(features))
+    assert isinstance(mask, np.ndarray) and mask.dtype == bool
+    # Pomysł na etapie seed i w przedziale budżetu inwestora
+    assert mask[0]
+    assert not mask[7]
@@ -0,0 +1,103 @@
+"""Cache wyników dopasowania per nieuporządkowana para sygnałów."""
+import itertools
+
+import pytest
+from sqlmodel import select
+
+from models.match import SignalMatch
+from services.match_cache import (
+    delete_signal_scores,
+    details_hash,
+    get_cached_scores,
+    get_uncached_target_ids,
+    pair_key,
+    store_scores,
+)
+from services.matching import _store_batch
+
+VERSION = "test:v1"
+
+# Kolejne ID sygnałów dla testów (SQLite nie wymusza kluczy obcych)
+_ids = itertools.count(100_000, 10)
+
+
+@pytest.fixture
+def ids():
+    base = next(_ids)
+    return base, base + 1, base + 2
+
+
+def test_details_hash_ignores_key_order():
+    assert details_hash({"a": 1, "b": [1, 2]}) == details_hash({"b": [1, 2], "a": 1})
+    assert details_hash({"a": 1}) != details_hash({"a": 2})
+
+
+def test_pair_key():
+    assert pair_key(5, 3) == pair_key(3, 5) == (3, 5)
+
+
+def test_round_trip_both_directions(session, ids):
+    low, high, _ = ids
+    store_scores(session, high, "h-high", {low: 71.5}, {low: "h-low"}, VERSION)
+
+    rows = session.exec(select(SignalMatch).where(SignalMatch.signal_low_id == low)).all()
+    assert [(r.signal_low_id, r.signal_high_id, r.low_hash, r.high_hash) for r in rows] == [
+        (low, high, "h-low", "h-high")
+    ]
+    assert get_cached_scores(session, high, "h-high", {low: "h-low"}, VERSION) == {low: 71.5}
+    assert get_cached_scores(session, low, "h-low", {high: "h-high"}, VERSION) == {high: 71.5}
+    assert get_uncached_target_ids(session, low, "h-low", {high: "h-high"}, VERSION) == set()
+
+
+def test_rescoring_updates_pair(session, ids):
+    low, high, _ = ids
+    store_scores(session, low, "h-low", {high: 40.0}, {high: "h-high"}, VERSION)
+    store_scores(session, high, "h-high", {low: 60.0}, {low: "h-low"}, VERSION)
+    assert get_cached_scores(session, low, "h-low", {high: "h-high"}, VERSION) == {high: 60.0}
+
+
+@pytest.mark.parametrize("changed", ["source", "target"])
+def test_miss_after_details_change(session, ids, changed):
+    low, high, _ = ids
+    store_scores(session, low, "h-low", {high: 80.0}, {high: "h-high"}, VERSION)
+    source_hash = "h-low-2" if changed == "source" else "h-low"
+    target_hash = "h-high-2" if changed == "target" else "h-high"
+
+    assert get_cached_scores(session, low, source_hash, {high: target_hash}, VERSION) == {}
+    assert get_uncached_target_ids(session, low, source_hash, {high: target_hash}, VERSION) == {high}
+    # Od drugiej strony pary też
+    assert get_cached_scores(session, high, target_hash, {low: source_hash}, VERSION) == {}
+
+
+def test_scorer_versions_are_separate(session, ids):
+    low, high, _ = ids
+    store_scores(session, low, "h-low", {high: 80.0}, {high: "h-high"}, VERSION)
+    store_scores(session, low, "h-low", {high: 20.0}, {high: "h-high"}, "test:v2")
+
+    assert get_cached_scores(session, low, "h-low", {high: "h-high"}, VERSION) == {high: 80.0}
+    assert get_cached_scores(session, low, "h-low", {high: "h-high"}, "test:v2") == {high: 20.0}
+    assert get_uncached_target_ids(session, low, "h-low", {high: "h-high"}, "test:v3") == {high}
+
+
+def test_fallback_results_are_not_stored(session, ids):
+    source, scored, failed = ids
+    matches = [
+        {"signal_id": scored, "accurate": 55.0, "details": None},
+        {"signal_id": failed, "accurate": 0.0, "details": None, "fallback": True},
+    ]
+    target_hashes = {scored: "h-scored", failed: "h-failed"}
+    _store_batch(session, source, "h-source", matches, target_hashes, VERSION)
+
+    assert get_cached_scores(session, source, "h-source", target_hashes, VERSION) == {scored: 55.0}
+    assert get_uncached_target_ids(session, source, "h-source", target_hashes, VERSION) == {failed}
+
+
+def test_delete_signal_scores(session, ids):
+    first, second, third = ids
+    store_scores(session, second, "h2", {first: 10.0, third: 30.0}, {first: "h1", third: "h3"}, VERSION)
+    store_scores(session, first, "h1", {third: 13.0}, {third: "h3"}, VERSION)
+
+    delete_signal_scores(session, second)
+
+    assert get_cached_scores(session, second, "h2", {first: "h1", third: "h3"}, VERSION) == {}
+    assert get_cached_scores(session, first, "h1", {third: "h3"}, VERSION) == {third: 13.0}
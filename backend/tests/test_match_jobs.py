@@ -0,0 +1,39 @@
+"""Materializacja dopasowań w tle po zapisie sygnału."""
+from sqlmodel import or_, select
+
+from config import settings
+from models.match import SignalMatch
+
+
+def _scored_with(session, signal_id: int) -> set[int]:
+    rows = session.exec(select(SignalMatch).where(
+        or_(SignalMatch.signal_low_id == signal_id, SignalMatch.signal_high_id == signal_id)
+    )).all()
+    return {row.signal_high_id if row.signal_low_id == signal_id else row.signal_low_id for row in rows}
+
+
+def test_new_signal_is_scored_for_counterparts_that_would_select_it(client, auth_headers, session, monkeypatch):
+    # Kaskada przepuszcza do LLM tylko najlepszego kandydata wg heurystyki
+    monkeypatch.setattr(settings, "MATCH_CASCADE_HEURISTIC_TOP_N", 1)
+    freelancers, founders = auth_headers(), auth_headers()
+
+    def post(headers: dict, category_id: int, details: dict) -> int:
+        response = client.post("/api/v1/signals/", headers=headers, json={
+            "signal_category_id": category_id, "details": details,
+        })
+        return response.json()["id"]
+
+    best = post(freelancers, 1, {"skills": ["kotlin", "swift"]})
+    only_option = post(freelancers, 1, {"skills": ["kotlin"]})
+    has_better = post(freelancers, 1, {"skills": ["swift", "rust"]})
+    post(founders, 2, {"title": "rust app", "needed_skills": ["swift", "rust"]})
+
+    new_idea = post(founders, 2, {"title": "mobile app", "needed_skills": ["kotlin", "swift"]})
+
+    scored = _scored_with(session, new_idea)
+    # Kaskada nowego pomysłu: tylko `best`
+    assert best in scored
+    # Dla `only_option` nowy pomysł jest jedynym kandydatem - para liczona w tle
+    assert only_option in scored
+    # `has_better` ma lepszy pomysł (rust app) - jego kaskada odcina nowy
+    assert has_better not in scored
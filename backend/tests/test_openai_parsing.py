@@ -0,0 +1,65 @@
+"""Odczyt wyników z odpowiedzi modelu - także uciętych (finish_reason=length)."""
+import json
+
+from services.openai import _iter_json_objects, _parse_chunk_results
+
+
+def test_iter_complete_array():
+    assert _iter_json_objects('[{"a": 1}, {"a": 2}]') == ([{"a": 1}, {"a": 2}], True)
+
+
+def test_iter_truncated_array_keeps_complete_objects():
+    items, complete = _iter_json_objects('{"results": [{"a": 1}, {"a": 2}, {"a"')
+    assert items == [{"a": 1}, {"a": 2}]
+    assert not complete
+
+
+def test_iter_truncated_after_separator():
+    assert _iter_json_objects('[{"a": 1},\n ') == ([{"a": 1}], False)
+
+
+def test_iter_without_array():
+    assert _iter_json_objects("no json here") == ([], False)
+
+
+def test_parse_structured_output():
+    content = json.dumps({"results": [{"signal_id": 1, "accurate": 82.4}, {"signal_id": 2, "accurate": 40}]})
+    by_id, complete = _parse_chunk_results(content, [1, 2])
+    assert complete
+    assert by_id[1]["accurate"] == 82.4 and by_id[2]["accurate"] == 40.0
+
+
+def test_parse_salvages_truncated_reply():
+    content = '{"results": [{"signal_id": 1, "accurate": 82.4}, {"signal_id": 2, "accurate": 71.9}, {"signal_id": 3, "acc'
+    by_id, complete = _parse_chunk_results(content, [1, 2, 3])
+    assert not complete
+    assert sorted(by_id) == [1, 2]
+
+
+def test_parse_legacy_markdown_array():
+    content = '```json\n[{"signal_id": 5, "accurate": 55.5}]\n```'
+    by_id, complete = _parse_chunk_results(content, [5])
+    assert complete and by_id[5]["accurate"] == 55.5
+
+
+def test_parse_single_object():
+    by_id, complete = _parse_chunk_results('{"signal_id": 7, "accurate": 66}', [7])
+    assert complete and by_id[7]["accurate"] == 66.0
+
+
+def test_parse_skips_foreign_and_invalid_results():
+    content = json.dumps({"results": [
+        {"signal_id": 1, "accurate": 150},
+        {"signal_id": 2, "accurate": "n/a"},
+        {"signal_id": 3, "accurate": float("nan")},
+        {"signal_id": 99, "accurate": 50},
+        {"accurate": 50},
+        "junk",
+    ]})
+    by_id, complete = _parse_chunk_results(content, [1, 2, 3])
+    assert complete
+    assert by_id == {1: {"signal_id": 1, "accurate": 100.0, "details": None}}
+
+
+def test_parse_empty_reply():
+    assert _parse_chunk_results(None, [1]) == ({}, False)
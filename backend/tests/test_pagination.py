@@ -0,0 +1,119 @@
+"""Kursor stron dopasowań i stronicowanie po przerwanym (top-k) scoringu."""
+import pytest
+from sqlmodel import Session
+
+from config import settings
+from services import matching
+from services.db import engine
+from services.match_cache import delete_signal_scores
+from services.matching import _next_cursor, _page, decode_cursor, encode_cursor
+
+
+def _match(accurate: float, signal_id: int) -> dict:
+    return {"signal_id": signal_id, "accurate": accurate, "details": None}
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(((80.0, 3), ()))) == ((80.0, 3), ())
+    cursor = ((80.0, 3), ((75.0, 9), (60.5, 4)))
+    assert decode_cursor(encode_cursor(cursor)) == cursor
+    assert decode_cursor(encode_cursor((None, ((90.0, 1),)))) == (None, ((90.0, 1),))
+
+
+def test_cursor_without_seen_keeps_legacy_format():
+    # Kursory wydane przed dodaniem `seen` - sama para [accurate, signal_id]
+    assert encode_cursor(((80.0, 3), ())) == "WzgwLjAsM10="
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "eyJhZnRlciI6IDF9", "WzFd"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_complete_page_moves_position():
+    matches = [_match(90.0, 1), _match(80.0, 2), _match(70.0, 3)]
+    page, next_cursor = _page(matches, 2, None, complete=True)
+    assert [m["signal_id"] for m in page] == [1, 2]
+    assert decode_cursor(next_cursor) == ((80.0, 2), ())
+
+
+def test_complete_last_page_has_no_cursor():
+    page, next_cursor = _page([_match(90.0, 1)], 2, None, complete=True)
+    assert len(page) == 1 and next_cursor is None
+
+
+def test_partial_page_keeps_position_and_records_served():
+    page = [_match(90.0, 5), _match(85.0, 7)]
+    cursor = _next_cursor(page, ((95.0, 1), ()), complete=False)
+    # Pary ocenione później mogą mieć wyższy wynik niż wydane - pozycja zostaje
+    assert cursor == ((95.0, 1), ((90.0, 5), (85.0, 7)))
+
+
+def test_complete_page_drops_seen_pairs_before_position():
+    page = [_match(80.0, 4), _match(70.0, 8)]
+    cursor = _next_cursor(page, (None, ((90.0, 5), (60.0, 2))), complete=True)
+    assert cursor == ((70.0, 8), ((60.0, 2),))
+
+
+@pytest.fixture
+def early_stop_pool(client, auth_headers, monkeypatch):
+    """Sygnał z 12 kandydatami bez wyników w cache; każdy wynik jest "pewny"."""
+    # Scoring kończy się po pierwszej paczce z `limit` wynikami
+    monkeypatch.setattr(settings, "MATCH_TOPK_CONFIDENT_SCORE", 0)
+    monkeypatch.setattr(settings, "LLM_MAX_BATCH_SIZE", 2)
+    freelancer, founder = auth_headers(), auth_headers()
+
+    source_id = client.post("/api/v1/signals/", headers=freelancer, json={
+        "signal_category_id": 1,
+        "details": {"skills": ["python", "react"], "hourly_rate": 100, "categories": ["fintech"]},
+    }).json()["id"]
+    for i in range(12):
+        client.post("/api/v1/signals/", headers=founder, json={
+            "signal_category_id": 2,
+            "details": {"title": f"idea {i}", "needed_skills": ["python"], "funding_min": 1000,
+                        "funding_max": 5000 + i, "categories": ["fintech"]},
+        })
+    # Zadania w tle policzyły już wszystkie pary - bez cache scoring zatrzyma się po top-k
+    with Session(engine) as session:
+        delete_signal_scores(session, source_id)
+    return source_id, freelancer
+
+
+def _page_through(client, source_id: int, headers: dict, limit: int) -> tuple[list[int], list[str]]:
+    """Wszystkie strony od pierwszej: (wydane ID, kolejne kursory)."""
+    served: list[int] = []
+    cursors: list[str] = []
+    params: dict = {"limit": limit}
+    while True:
+        response = client.get(f"/api/v1/signals/match/{source_id}", headers=headers, params=params).json()
+        served += [m["signal_id"] for m in response["matches"]]
+        if not response["next_cursor"]:
+            return served, cursors
+        cursors.append(response["next_cursor"])
+        params["cursor"] = response["next_cursor"]
+
+
+def test_pages_after_early_stop_cover_full_ranking(client, early_stop_pool):
+    source_id, headers = early_stop_pool
+    served, cursors = _page_through(client, source_id, headers, limit=3)
+
+    _, seen = decode_cursor(cursors[0])
+    assert seen, "first page should come from an early-stopped ranking"
+    full = client.get(f"/api/v1/signals/match/{source_id}", headers=headers).json()["matches"]
+    assert len(served) == len(set(served))
+    assert set(served) == {m["signal_id"] for m in full}
+
+
+def test_cursor_seen_pairs_are_capped(client, early_stop_pool, monkeypatch):
+    monkeypatch.setattr(matching, "MAX_CURSOR_SEEN", 4)
+    source_id, headers = early_stop_pool
+    served, cursors = _page_through(client, source_id, headers, limit=2)
+
+    seen_sizes = [len(decode_cursor(cursor)[1]) for cursor in cursors]
+    assert seen_sizes[:2] == [2, 4]
+    assert max(seen_sizes) <= 4
+    assert max(len(cursor) for cursor in cursors) < 200
+    full = client.get(f"/api/v1/signals/match/{source_id}", headers=headers).json()["matches"]
+    assert len(served) == len(set(served))
+    assert set(served) == {m["signal_id"] for m in full}
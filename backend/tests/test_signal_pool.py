@@ -0,0 +1,76 @@
+"""Pula sygnałów w pamięci - przyrostowe wczytywanie i uzgadnianie z bazą."""
+import pytest
+from sqlmodel import func, select
+
+from config import settings
+from models.signal import UserSignal
+from services.signal_pool import SignalPool
+
+# Kategoria spoza seedów - sygnały testów nie trafiają do pul innych testów
+CATEGORY = 901
+
+
+@pytest.fixture
+def add_signal(session):
+    """Dodaje aktywny sygnał o podanym ID; na końcu testu wszystkie dezaktywuje."""
+    created: list[UserSignal] = []
+
+    def add(signal_id: int, user_id: int = 1) -> None:
+        signal = UserSignal(id=signal_id, user_id=user_id, signal_category_id=CATEGORY, details={"skills": ["go"]})
+        session.add(signal)
+        session.commit()
+        created.append(signal)
+
+    yield add
+    for signal in created:
+        signal.is_active = False
+        session.add(signal)
+    session.commit()
+
+
+def _free_id(session) -> int:
+    return (session.exec(select(func.max(UserSignal.id))).one() or 0) + 1000
+
+
+def test_sync_loads_new_signals(session, add_signal):
+    pool = SignalPool()
+    pool.sync(session)
+    base = _free_id(session)
+    add_signal(base)
+    add_signal(base + 1, user_id=2)
+    pool.sync(session)
+    assert {sig.id for sig in pool.candidates([CATEGORY], exclude_user_id=2)} == {base}
+
+
+def test_reconcile_adds_signal_committed_below_watermark(session, add_signal, monkeypatch):
+    monkeypatch.setattr(settings, "MATCH_SIGNAL_POOL_RECONCILE_SECONDS", 3600)
+    pool = SignalPool()
+    pool.sync(session)
+    base = _free_id(session)
+    add_signal(base + 10)
+    pool.sync(session)
+
+    # Niższe ID zatwierdzone po wczytaniu wyższego - watermark je pomija
+    add_signal(base)
+    pool.sync(session)
+    assert {sig.id for sig in pool.candidates([CATEGORY], exclude_user_id=0)} == {base + 10}
+
+    monkeypatch.setattr(settings, "MATCH_SIGNAL_POOL_RECONCILE_SECONDS", 0)
+    pool.sync(session)
+    assert {sig.id for sig in pool.candidates([CATEGORY], exclude_user_id=0)} == {base, base + 10}
+
+
+def test_reconcile_drops_signal_deactivated_elsewhere(session, add_signal, monkeypatch):
+    monkeypatch.setattr(settings, "MATCH_SIGNAL_POOL_RECONCILE_SECONDS", 0)
+    pool = SignalPool()
+    pool.sync(session)
+    base = _free_id(session)
+    add_signal(base)
+    pool.sync(session)
+
+    signal = session.get(UserSignal, base)
+    signal.is_active = False
+    session.add(signal)
+    session.commit()
+    pool.sync(session)
+    assert pool.candidates([CATEGORY], exclude_user_id=0) == []
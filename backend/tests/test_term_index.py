@@ -0,0 +1,74 @@
+"""Indeks terminów - przyrostowe wczytywanie i uzgadnianie z bazą."""
+import pytest
+from sqlmodel import func, select
+
+from config import settings
+from models.signal import UserSignal
+from services.term_index import TermIndex, signal_terms
+
+# Kategoria spoza seedów - sygnały testów nie trafiają do pul innych testów
+CATEGORY = 902
+
+
+@pytest.fixture
+def add_signal(session):
+    """Dodaje aktywny sygnał o podanym ID; na końcu testu wszystkie dezaktywuje."""
+    created: list[UserSignal] = []
+
+    def add(signal_id: int, skills: list[str]) -> None:
+        signal = UserSignal(id=signal_id, user_id=1, signal_category_id=CATEGORY, details={"skills": skills})
+        session.add(signal)
+        session.commit()
+        created.append(signal)
+
+    yield add
+    for signal in created:
+        signal.is_active = False
+        session.add(signal)
+    session.commit()
+
+
+def _free_id(session) -> int:
+    return (session.exec(select(func.max(UserSignal.id))).one() or 0) + 1000
+
+
+def test_signal_terms():
+    terms = signal_terms({"skills": ["Machine Learning", "AI/ML"], "bio": "ignored"})
+    assert {"machinelearning", "machine", "learning", "aiml", "ai", "ml"} <= terms
+    assert "ignored" not in terms
+
+
+def test_reconcile_indexes_signal_committed_below_watermark(session, add_signal, monkeypatch):
+    monkeypatch.setattr(settings, "MATCH_SIGNAL_POOL_RECONCILE_SECONDS", 3600)
+    index = TermIndex()
+    index.sync(session)
+    base = _free_id(session)
+    add_signal(base + 10, ["elixir"])
+    index.sync(session)
+
+    # Niższe ID zatwierdzone po wczytaniu wyższego - watermark je pomija
+    add_signal(base, ["elixir", "erlang"])
+    index.sync(session)
+    assert index.filter_ids(["elixir"]) == {base + 10}
+
+    monkeypatch.setattr(settings, "MATCH_SIGNAL_POOL_RECONCILE_SECONDS", 0)
+    index.sync(session)
+    assert index.filter_ids(["elixir"]) == {base, base + 10}
+    assert index.candidate_ids(["erlang"], [CATEGORY], exclude_user_id=0) == {base}
+
+
+def test_reconcile_drops_signal_deactivated_elsewhere(session, add_signal, monkeypatch):
+    monkeypatch.setattr(settings, "MATCH_SIGNAL_POOL_RECONCILE_SECONDS", 0)
+    index = TermIndex()
+    index.sync(session)
+    base = _free_id(session)
+    add_signal(base, ["haskell"])
+    index.sync(session)
+    assert index.filter_ids(["haskell"]) == {base}
+
+    signal = session.get(UserSignal, base)
+    signal.is_active = False
+    session.add(signal)
+    session.commit()
+    index.sync(session)
+    assert index.filter_ids(["haskell"]) == set()
@@ -0,0 +1,81 @@
+"""Magazyn embeddingów - zgodność wierszy z wektorami, także po przerwanym zapisie."""
+import os
+
+import numpy as np
+import pytest
+
+from services.vector_store import VectorStore
+
+DIM = 8
+
+
+def _vector(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture(params=["float16", "int8"])
+def store_path(tmp_path, request):
+    return str(tmp_path), request.param
+
+
+def test_get_returns_vector_of_its_signal(store_path):
+    path, dtype = store_path
+    store = VectorStore(path, dtype)
+    for signal_id in range(1, 6):
+        store.append(signal_id, _vector(signal_id))
+    for signal_id in range(1, 6):
+        np.testing.assert_allclose(store.get(signal_id), _unit(_vector(signal_id)), atol=0.02)
+
+
+def test_reappend_and_tombstone(store_path):
+    path, dtype = store_path
+    store = VectorStore(path, dtype)
+    store.append(1, _vector(1))
+    store.append(2, _vector(2))
+    store.append(1, _vector(10))
+    np.testing.assert_allclose(store.get(1), _unit(_vector(10)), atol=0.02)
+    store.tombstone(2)
+    assert 2 not in store and store.get(2) is None
+    # Inny proces widzi ten sam stan
+    other = VectorStore(path, dtype)
+    assert 1 in other and 2 not in other
+
+
+def test_top_k(store_path):
+    path, dtype = store_path
+    store = VectorStore(path, dtype)
+    for signal_id in range(1, 6):
+        store.append(signal_id, _vector(signal_id))
+    query = _vector(3)
+    assert store.top_k(query, [1, 2, 3, 4, 5, 99], 1) == [3]
+    assert len(store.top_k(query, [1, 2, 3, 4, 5], 10)) == 5
+    assert store.top_k(query, [99], 3) == []
+
+
+@pytest.mark.parametrize("torn_file", ["vectors.bin", "rows.bin"])
+def test_torn_write_does_not_shift_rows(store_path, torn_file):
+    path, dtype = store_path
+    store = VectorStore(path, dtype)
+    for signal_id in range(1, 4):
+        store.append(signal_id, _vector(signal_id))
+
+    # Zapis przerwany w połowie (awaria procesu): resztka na końcu jednego z plików
+    with open(os.path.join(path, torn_file), "ab") as f:
+        f.write(b"\x7f" * 5)
+    if torn_file == "rows.bin":
+        # Wektor zapisany w całości, wiersz nie
+        with open(os.path.join(path, "vectors.bin"), "ab") as f:
+            f.write(np.ones(DIM, dtype=dtype).tobytes())
+
+    reopened = VectorStore(path, dtype)
+    assert 4 not in reopened
+    reopened.append(4, _vector(4))
+    reopened.append(5, _vector(5))
+
+    fresh = VectorStore(path, dtype)
+    for signal_id in range(1, 6):
+        np.testing.assert_allclose(fresh.get(signal_id), _unit(_vector(signal_id)), atol=0.02)